@@ -18,11 +18,22 @@ if config.config_file_name is not None:
 # for 'autogenerate' support
 from recurly.models.user import User
 from recurly.models.task import Task
+from recurly.models.reminder import TaskReminder
+from recurly.models.completion import TaskCompletion, TaskStats, UserTaskStats
+from recurly.models.shard import UserShard
+from recurly.models.revoked_token import RevokedToken
 from sqlmodel import SQLModel
 
 # Import all models to ensure they are registered with SQLModel
 target_metadata = SQLModel.metadata
 
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Leave the FTS5 search table and its shadow tables out of autogenerate."""
+    return not (type_ == "table" and reflected and name.startswith("tasks_fts"))
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -47,6 +58,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -68,7 +80,8 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
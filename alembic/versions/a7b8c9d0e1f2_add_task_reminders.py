@@ -0,0 +1,46 @@
+"""Add task reminder outbox and global change sequence indexes
+
+Revision ID: a7b8c9d0e1f2
+Revises: f6a7b8c9d0e1
+Create Date: 2025-01-27 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7b8c9d0e1f2'
+down_revision: Union[str, Sequence[str], None] = 'f6a7b8c9d0e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The standalone scheduler follows every user's changes, not one assignee's
+    op.create_index(op.f('ix_tasks_change_seq'), 'tasks', ['change_seq'], unique=False)
+    op.create_index(op.f('ix_task_tombstones_change_seq'), 'task_tombstones', ['change_seq'], unique=False)
+
+    op.create_table('task_reminders',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('task_id', sa.Integer(), nullable=False),
+    sa.Column('assigned_to', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('due_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('delivered_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('task_id', 'due_at', name='uq_task_reminders_task_id_due_at')
+    )
+    op.create_index(op.f('ix_task_reminders_delivered_at'), 'task_reminders', ['delivered_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_task_reminders_delivered_at'), table_name='task_reminders')
+    op.drop_table('task_reminders')
+    op.drop_index(op.f('ix_task_tombstones_change_seq'), table_name='task_tombstones')
+    op.drop_index(op.f('ix_tasks_change_seq'), table_name='tasks')
@@ -0,0 +1,33 @@
+"""Add (next_due_at, id) indexes for due-ordered task lists
+
+Revision ID: b4c5d6e7f8a9
+Revises: a3b4c5d6e7f8
+Create Date: 2025-03-03 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4c5d6e7f8a9'
+down_revision: Union[str, Sequence[str], None] = 'a3b4c5d6e7f8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_tasks_next_due_at_id', 'tasks', ['next_due_at', 'id'], unique=False)
+    op.create_index('ix_tasks_assigned_to_next_due_at_id', 'tasks', ['assigned_to', 'next_due_at', 'id'], unique=False)
+    # Covered by ix_tasks_next_due_at_id, which leads with the same column
+    op.drop_index(op.f('ix_tasks_next_due_at'), table_name='tasks')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_tasks_next_due_at'), 'tasks', ['next_due_at'], unique=False)
+    op.drop_index('ix_tasks_assigned_to_next_due_at_id', table_name='tasks')
+    op.drop_index('ix_tasks_next_due_at_id', table_name='tasks')
@@ -0,0 +1,81 @@
+"""Add task completion history and statistics rollups
+
+Revision ID: b8c9d0e1f2a3
+Revises: a7b8c9d0e1f2
+Create Date: 2025-01-29 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8c9d0e1f2a3'
+down_revision: Union[str, Sequence[str], None] = 'a7b8c9d0e1f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _stats_columns():
+    return [
+        sa.Column('total_completions', sa.Integer(), nullable=False),
+        sa.Column('on_time_completions', sa.Integer(), nullable=False),
+        sa.Column('current_streak', sa.Integer(), nullable=False),
+        sa.Column('longest_streak', sa.Integer(), nullable=False),
+        sa.Column('last_completed_at', sa.DateTime(), nullable=True),
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    completions = op.create_table('task_completions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('task_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('completed_at', sa.DateTime(), nullable=False),
+    sa.Column('due_at', sa.DateTime(), nullable=True),
+    sa.Column('on_time', sa.Boolean(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_task_completions_task_id_completed_at', 'task_completions', ['task_id', 'completed_at'], unique=False)
+    op.create_index('ix_task_completions_user_id_completed_at', 'task_completions', ['user_id', 'completed_at'], unique=False)
+
+    task_stats = op.create_table('task_stats',
+    sa.Column('task_id', sa.Integer(), nullable=False),
+    *_stats_columns(),
+    sa.PrimaryKeyConstraint('task_id')
+    )
+    user_task_stats = op.create_table('user_task_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    *_stats_columns(),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+    # Only the latest completion of each task is known; count it as on time
+    tasks = sa.table('tasks', sa.column('id'), sa.column('assigned_to'), sa.column('last_completed'))
+    completed = tasks.c.last_completed.is_not(None)
+    op.execute(completions.insert().from_select(
+        ['task_id', 'user_id', 'completed_at', 'on_time'],
+        sa.select(tasks.c.id, tasks.c.assigned_to, tasks.c.last_completed, sa.true()).where(completed),
+    ))
+    op.execute(task_stats.insert().from_select(
+        ['task_id', 'total_completions', 'on_time_completions', 'current_streak', 'longest_streak', 'last_completed_at'],
+        sa.select(tasks.c.id, 1, 1, 1, 1, tasks.c.last_completed).where(completed),
+    ))
+    count = sa.func.count()
+    op.execute(user_task_stats.insert().from_select(
+        ['user_id', 'total_completions', 'on_time_completions', 'current_streak', 'longest_streak', 'last_completed_at'],
+        sa.select(tasks.c.assigned_to, count, count, count, count, sa.func.max(tasks.c.last_completed))
+        .where(completed).group_by(tasks.c.assigned_to),
+    ))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_task_stats')
+    op.drop_table('task_stats')
+    op.drop_index('ix_task_completions_user_id_completed_at', table_name='task_completions')
+    op.drop_index('ix_task_completions_task_id_completed_at', table_name='task_completions')
+    op.drop_table('task_completions')
@@ -0,0 +1,95 @@
+"""Add cadence schedule columns to tasks table
+
+Revision ID: c3d4e5f6a7b8
+Revises: b2c3d4e5f6a7
+Create Date: 2025-01-20 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from recurly.cadence import nearest_due, next_due_at, parse_cadence
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3d4e5f6a7b8'
+down_revision: Union[str, Sequence[str], None] = 'b2c3d4e5f6a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+tasks = sa.table(
+    'tasks',
+    sa.column('id', sa.Integer()),
+    sa.column('cadence', sa.String()),
+    sa.column('last_completed', sa.DateTime(timezone=True)),
+    sa.column('created_at', sa.DateTime(timezone=True)),
+    sa.column('interval', sa.Integer()),
+    sa.column('interval_unit', sa.String()),
+    sa.column('anchor_at', sa.DateTime()),
+    sa.column('next_due_at', sa.DateTime()),
+)
+
+
+def backfill_schedule() -> None:
+    """Normalise cadence for existing rows, BATCH_SIZE rows per round trip.
+
+    The due time each last completion met was never stored, so the nearest
+    occurrence stands in for it; an early completion still clears its period.
+    """
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(tasks.c.id, tasks.c.cadence, tasks.c.last_completed, tasks.c.created_at)
+            .where(tasks.c.id > last_id)
+            .order_by(tasks.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        updates = []
+        for row in rows:
+            cadence = parse_cadence(row.cadence)
+            anchor = row.created_at
+            updates.append({
+                'task_id': row.id,
+                'interval': cadence.interval if cadence else None,
+                'interval_unit': cadence.unit if cadence else None,
+                'anchor_at': anchor,
+                'next_due_at': next_due_at(
+                    cadence, anchor, row.last_completed, nearest_due(cadence, anchor, row.last_completed)
+                ),
+            })
+        bind.execute(
+            tasks.update()
+            .where(tasks.c.id == sa.bindparam('task_id'))
+            .values(
+                interval=sa.bindparam('interval'),
+                interval_unit=sa.bindparam('interval_unit'),
+                anchor_at=sa.bindparam('anchor_at'),
+                next_due_at=sa.bindparam('next_due_at'),
+            ),
+            updates,
+        )
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tasks', sa.Column('interval_unit', sa.String(length=10), nullable=True))
+    op.add_column('tasks', sa.Column('anchor_at', sa.DateTime(), nullable=True))
+    op.add_column('tasks', sa.Column('next_due_at', sa.DateTime(), nullable=True))
+    backfill_schedule()
+    op.create_index(op.f('ix_tasks_next_due_at'), 'tasks', ['next_due_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_tasks_next_due_at'), table_name='tasks')
+    op.drop_column('tasks', 'next_due_at')
+    op.drop_column('tasks', 'anchor_at')
+    op.drop_column('tasks', 'interval_unit')
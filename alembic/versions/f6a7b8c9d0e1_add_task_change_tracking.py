@@ -0,0 +1,58 @@
+"""Add change sequence and tombstones to tasks for delta sync
+
+Revision ID: f6a7b8c9d0e1
+Revises: e5f6a7b8c9d0
+Create Date: 2025-01-23 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6a7b8c9d0e1'
+down_revision: Union[str, Sequence[str], None] = 'e5f6a7b8c9d0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tasks', sa.Column('change_seq', sa.Integer(), nullable=True))
+    # Existing rows are numbered by id; new writes continue after the largest
+    op.execute('UPDATE tasks SET change_seq = id')
+    op.create_index('ix_tasks_assigned_to_change_seq', 'tasks', ['assigned_to', 'change_seq'], unique=False)
+
+    change_sequences = op.create_table('change_sequences',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.execute(
+        change_sequences.insert().from_select(
+            ['name', 'value'],
+            sa.select(sa.literal('tasks'), sa.func.coalesce(sa.func.max(sa.column('id')), 0))
+            .select_from(sa.table('tasks')),
+        )
+    )
+
+    op.create_table('task_tombstones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('task_id', sa.Integer(), nullable=False),
+    sa.Column('assigned_to', sa.Integer(), nullable=False),
+    sa.Column('change_seq', sa.Integer(), nullable=False),
+    sa.Column('removed_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_task_tombstones_assigned_to_change_seq', 'task_tombstones', ['assigned_to', 'change_seq'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_task_tombstones_assigned_to_change_seq', table_name='task_tombstones')
+    op.drop_table('task_tombstones')
+    op.drop_table('change_sequences')
+    op.drop_index('ix_tasks_assigned_to_change_seq', table_name='tasks')
+    op.drop_column('tasks', 'change_seq')
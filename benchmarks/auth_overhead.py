@@ -0,0 +1,67 @@
+"""Per-request cost of the authentication dependencies.
+
+Calls verify_token and get_current_user directly (no HTTP) and reports the
+mean time per call for the cold path and each cache layer.
+
+Usage:
+    python benchmarks/auth_overhead.py --iterations 5000
+"""
+import argparse
+import asyncio
+import os
+
+from common import Timer, load_app, temp_database_url
+
+
+async def run(iterations: int) -> None:
+    await load_app()
+    from recurly import auth
+    from recurly.database import dispose_engines, open_session
+    from recurly.models.user import User
+
+    async with open_session() as session:
+        user = User(email="bench@example.com", password_hash=auth.get_password_hash("benchmark-password"))
+        session.add(user)
+        await session.commit()
+        token = auth.create_user_access_token(user)
+
+    def report(label, timer):
+        print(f"{label:<48} {timer.elapsed / iterations * 1e6:9.1f} us/call")
+
+    with Timer() as timer:
+        for _ in range(iterations):
+            auth.token_cache.clear()
+            auth.verify_token(token)
+    report("verify_token, signature check every time", timer)
+
+    with Timer() as timer:
+        for _ in range(iterations):
+            auth.verify_token(token)
+    report("verify_token, verified-token cache", timer)
+
+    async with open_session() as session:
+        with Timer() as timer:
+            for _ in range(iterations):
+                auth.token_cache.clear()
+                auth.user_cache.clear()
+                await auth.get_current_user(token, session)
+        report("get_current_user, no caches (decode + SELECT)", timer)
+
+        with Timer() as timer:
+            for _ in range(iterations):
+                await auth.get_current_user(token, session)
+        report("get_current_user, both caches warm", timer)
+    await dispose_engines()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DATABASE_URL", temp_database_url())
+    asyncio.run(run(args.iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Rows per second for the batch task endpoints versus one request per task.
+
+Usage:
+    python benchmarks/batch_throughput.py --rows 2000 --batch-size 500
+"""
+import argparse
+import asyncio
+import os
+
+from common import Timer, client, load_app, register_and_login, temp_database_url
+
+
+async def run(rows: int, batch_size: int) -> None:
+    from recurly.database import dispose_engines
+
+    app = await load_app()
+    async with client(app) as http:
+        headers = await register_and_login(http, "bench@example.com")
+        items = [
+            {"title": f"Task {i}", "cadence": "daily", "assigned_to": 1} for i in range(rows)
+        ]
+
+        with Timer() as single_create:
+            for item in items:
+                (await http.post("/api/tasks", json=item, headers=headers)).raise_for_status()
+
+        with Timer() as batch_create:
+            created = []
+            for start in range(0, rows, batch_size):
+                response = await http.post(
+                    "/api/tasks:batch", json={"items": items[start:start + batch_size]}, headers=headers
+                )
+                response.raise_for_status()
+                created.extend(r["task"]["id"] for r in response.json()["results"])
+
+        with Timer() as single_complete:
+            for task_id in range(1, rows + 1):
+                (await http.patch(f"/api/tasks/{task_id}/complete", json={}, headers=headers)).raise_for_status()
+
+        with Timer() as batch_complete:
+            for start in range(0, rows, batch_size):
+                chunk = [{"id": task_id} for task_id in created[start:start + batch_size]]
+                response = await http.post("/api/tasks:batchComplete", json={"items": chunk}, headers=headers)
+                response.raise_for_status()
+    await dispose_engines()
+
+    for label, timer in (
+        ("create, one request per task", single_create),
+        (f"create, batches of {batch_size}", batch_create),
+        ("complete, one request per task", single_complete),
+        (f"complete, batches of {batch_size}", batch_complete),
+    ):
+        print(f"{label:<36} {rows / timer.elapsed:10.1f} rows/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DATABASE_URL", temp_database_url())
+    os.environ.setdefault("PASSWORD_HASH_EXECUTOR", "inline")
+    asyncio.run(run(args.rows, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Latency of calendar feed polls: re-rendered, served from cache, and 304.
+
+A user with many recurring tasks polls their .ics feed. "render" drops the
+cached feed before every poll; "cached" is an unchanged feed; "revalidate"
+sends the previous ETag and gets 304 Not Modified.
+
+Usage:
+    python benchmarks/calendar_feed.py --tasks 200 --polls 200
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from common import client, load_app, register_and_login, summarize, temp_database_url
+
+CADENCES = ("daily", "weekly", "every 3 days", "monthly", "weekdays")
+
+
+async def run(task_count: int, polls: int) -> None:
+    app = await load_app()
+    from recurly.ical import feed_cache
+
+    async with client(app) as http:
+        headers = await register_and_login(http, "feed@example.com")
+        user_id = (await http.get("/auth/me", headers=headers)).json()["id"]
+        items = [
+            {"title": f"Task {i}", "cadence": CADENCES[i % len(CADENCES)], "assigned_to": user_id}
+            for i in range(task_count)
+        ]
+        for offset in range(0, task_count, 500):
+            (await http.post("/api/tasks:batch", json={"items": items[offset:offset + 500]}, headers=headers)).raise_for_status()
+        url = (await http.get("/api/tasks/calendar", headers=headers)).json()["url"]
+
+        async def poll(label: str, before=None, **kwargs) -> None:
+            samples = []
+            for _ in range(polls):
+                if before is not None:
+                    before()
+                start = time.perf_counter()
+                response = await http.get(url, **kwargs)
+                samples.append(time.perf_counter() - start)
+            summarize(f"{label} ({response.status_code}, {len(response.content):,} bytes)", samples)
+
+        first = await http.get(url)
+        events = first.text.count("BEGIN:VEVENT")
+        print(f"{task_count} tasks, {events} events per feed, {polls} polls each:")
+        await poll("render", before=feed_cache.clear)
+        await poll("cached")
+        await poll("revalidate", headers={"If-None-Match": first.headers["ETag"]})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--polls", type=int, default=200)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DATABASE_URL", temp_database_url())
+    os.environ.setdefault("PASSWORD_HASH_EXECUTOR", "inline")
+    asyncio.run(run(args.tasks, args.polls))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Shared setup for the benchmark scripts.
+
+Each benchmark runs the FastAPI app in-process against a throwaway SQLite
+database. Environment variables must be set before ``main`` is imported, so
+await ``load_app()`` after configuring them.
+"""
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def temp_database_url(prefix: str = "sqlite") -> str:
+    """Return a URL pointing at a fresh temporary SQLite file."""
+    fd, path = tempfile.mkstemp(suffix=".db", prefix="recurly-bench-")
+    os.close(fd)
+    os.unlink(path)
+    return f"{prefix}:///{path}"
+
+
+async def load_app():
+    """Import the app with SQL echo silenced and tables created."""
+    from main import app
+    from recurly import database
+
+    database.engine.echo = False
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
+    await database.create_db_and_tables()
+    return app
+
+
+def client(app):
+    import httpx
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+
+async def register_and_login(http, email: str, password: str = "benchmark-password") -> dict:
+    """Create a user and return an Authorization header for it."""
+    await http.post(
+        "/auth/register",
+        json={"email": email, "password": password, "password_confirm": password},
+    )
+    response = await http.post("/auth/login", data={"username": email, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(label: str, samples) -> None:
+    """Print latency percentiles (in milliseconds) for a list of seconds."""
+    ms = [s * 1000 for s in samples]
+    print(
+        f"{label:<40} n={len(ms):<6} "
+        f"p50={percentile(ms, 50):8.2f}ms p99={percentile(ms, 99):8.2f}ms "
+        f"mean={statistics.fmean(ms) if ms else 0:8.2f}ms"
+    )
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
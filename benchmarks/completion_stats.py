@@ -0,0 +1,163 @@
+"""Completion statistics from rollup rows versus scanning the completion history.
+
+Fills ``task_completions`` with ``--completions`` rows spread over
+``--users`` users and two years, then compares ``GET /api/tasks/my/stats``
+and ``GET /api/tasks/{id}/stats`` (rollup rows plus a 30-day index range
+count) with recomputing the same numbers from one user's full history.
+
+Usage:
+    python benchmarks/completion_stats.py --completions 2000000 --users 1000
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from datetime import timedelta
+
+from common import Timer, client, load_app, register_and_login, summarize, temp_database_url
+
+HISTORY = timedelta(days=730)
+
+
+def _fill_history(session, completions: int, users: int, tasks_per_user: int, bench_tasks: list) -> None:
+    """Insert the history with Core and build the benchmark user's rollups from it."""
+    from sqlalchemy import insert
+    from recurly.cadence import utc_now
+    from recurly.models.completion import TaskCompletion, TaskStats, UserTaskStats
+
+    start = utc_now() - HISTORY
+    step = HISTORY / (completions // users)
+    user_stats = UserTaskStats(user_id=1)
+    task_stats = {task_id: TaskStats(task_id=task_id) for task_id in bench_tasks}
+    table = TaskCompletion.__table__
+    batch = []
+    # Users take turns, so each user's history is spread evenly over the period
+    for i in range(completions):
+        user_id = i % users + 1
+        completed_at = start + step * (i // users) + timedelta(seconds=random.random() * 3600)
+        if user_id == 1:
+            task_id = random.choice(bench_tasks)
+        else:
+            task_id = 1_000_000 + user_id * tasks_per_user + random.randrange(tasks_per_user)
+        on_time = random.random() < 0.9
+        batch.append({
+            "task_id": task_id, "user_id": user_id, "completed_at": completed_at,
+            "due_at": completed_at + timedelta(hours=1), "on_time": on_time,
+        })
+        if user_id == 1:
+            task_stats[task_id].record(completed_at, on_time)
+            user_stats.record(completed_at, on_time)
+        if len(batch) == 50_000:
+            session.execute(insert(table), batch)
+            batch = []
+    if batch:
+        session.execute(insert(table), batch)
+    session.add(user_stats)
+    session.add_all(task_stats.values())
+    session.commit()
+
+
+def _scan_history(session, criteria) -> dict:
+    """What the endpoints would do without rollups: read and fold the whole history."""
+    from sqlmodel import select
+    from recurly.cadence import utc_now
+    from recurly.models.completion import CompletionStats, TaskCompletion
+
+    stats = CompletionStats()
+    recent = 0
+    since = utc_now() - timedelta(days=30)
+    rows = session.exec(
+        select(TaskCompletion.completed_at, TaskCompletion.on_time)
+        .where(criteria).order_by(TaskCompletion.completed_at)
+    )
+    for completed_at, on_time in rows:
+        stats.record(completed_at, on_time)
+        recent += completed_at >= since
+    return {**stats.model_dump(), "completions_30d": recent}
+
+
+def _read_rollup(session, model, key: int, criteria) -> dict:
+    """The database work behind the stats endpoints: one primary key read and a range count."""
+    from sqlmodel import func, select
+    from recurly.cadence import utc_now
+    from recurly.models.completion import TaskCompletion
+
+    stats = session.get(model, key)
+    since = utc_now() - timedelta(days=30)
+    recent = session.exec(
+        select(func.count()).select_from(TaskCompletion).where(criteria, TaskCompletion.completed_at >= since)
+    ).one()
+    return {**stats.model_dump(), "completions_30d": recent}
+
+
+async def run(completions: int, users: int, tasks_per_user: int, rounds: int) -> None:
+    from recurly.database import dispose_engines, open_session
+    from recurly.models.completion import TaskCompletion, TaskStats, UserTaskStats
+
+    app = await load_app()
+    async with client(app) as http:
+        headers = await register_and_login(http, "bench@example.com")
+        items = [{"title": f"Task {i}", "cadence": "daily", "assigned_to": 1} for i in range(tasks_per_user)]
+        response = await http.post("/api/tasks:batch", json={"items": items}, headers=headers)
+        response.raise_for_status()
+        bench_tasks = [result["task"]["id"] for result in response.json()["results"]]
+
+        with Timer() as setup:
+            async with open_session() as session:
+                await session.run_sync(_fill_history, completions, users, tasks_per_user, bench_tasks)
+        print(f"inserted {completions:,} completions ({completions // users:,} per user) in {setup.elapsed:.1f} s")
+
+        task_id = bench_tasks[0]
+        scenarios = (
+            ("GET /tasks/my/stats", lambda: http.get("/api/tasks/my/stats", headers=headers)),
+            ("GET /tasks/{id}/stats", lambda: http.get(f"/api/tasks/{task_id}/stats", headers=headers)),
+        )
+        for label, request in scenarios:
+            samples = []
+            for _ in range(rounds):
+                start = time.perf_counter()
+                (await request()).raise_for_status()
+                samples.append(time.perf_counter() - start)
+            summarize(label, samples)
+
+        # Without HTTP and auth overhead, the rollup read against the scan it replaces
+        for label, work in (
+            ("user stats, rollup queries", (_read_rollup, UserTaskStats, 1, TaskCompletion.user_id == 1)),
+            ("user stats, history scan", (_scan_history, TaskCompletion.user_id == 1)),
+            ("task stats, rollup queries", (_read_rollup, TaskStats, task_id, TaskCompletion.task_id == task_id)),
+            ("task stats, history scan", (_scan_history, TaskCompletion.task_id == task_id)),
+        ):
+            samples = []
+            for _ in range(rounds):
+                start = time.perf_counter()
+                async with open_session() as session:
+                    await session.run_sync(*work)
+                samples.append(time.perf_counter() - start)
+            summarize(label, samples)
+
+        samples = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            (await http.patch(f"/api/tasks/{random.choice(bench_tasks)}/complete", json={}, headers=headers)).raise_for_status()
+            samples.append(time.perf_counter() - start)
+        summarize("complete, with history and rollups", samples)
+    await dispose_engines()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--completions", type=int, default=2_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--tasks-per-user", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DATABASE_URL", temp_database_url())
+    # The bulk insert would otherwise be logged as slow queries
+    os.environ.setdefault("SLOW_QUERY_MS", "-1")
+    asyncio.run(run(args.completions, args.users, args.tasks_per_user, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
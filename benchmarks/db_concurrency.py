@@ -0,0 +1,70 @@
+"""Requests per second for the sync (threadpool) and native async database modes.
+
+Usage:
+    python benchmarks/db_concurrency.py                    # sqlite vs sqlite+aiosqlite
+    python benchmarks/db_concurrency.py --url postgresql+asyncpg://... --concurrency 64
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+from common import client, load_app, register_and_login, temp_database_url
+
+
+async def run(concurrency: int, requests: int) -> None:
+    from recurly.database import dispose_engines
+
+    app = await load_app()
+    async with client(app) as http:
+        headers = await register_and_login(http, "bench@example.com")
+        for i in range(100):
+            await http.post(
+                "/api/tasks",
+                json={"title": f"Task {i}", "cadence": "daily", "assigned_to": 1},
+                headers=headers,
+            )
+
+        remaining = requests
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                response = await http.get("/api/tasks/my", headers=headers)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    await dispose_engines()
+
+    url = os.environ["DATABASE_URL"].split(":///")[0]
+    print(f"{url:<25} concurrency={concurrency:<4} {requests / elapsed:8.1f} req/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="database URL to benchmark (default: temporary SQLite in both modes)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    if args.url is None:
+        for prefix in ("sqlite", "sqlite+aiosqlite"):
+            subprocess.run(
+                [sys.executable, __file__, "--url", temp_database_url(prefix),
+                 "--concurrency", str(args.concurrency), "--requests", str(args.requests)],
+                check=True,
+            )
+        return
+
+    os.environ["DATABASE_URL"] = args.url
+    os.environ.setdefault("PASSWORD_HASH_EXECUTOR", "inline")
+    asyncio.run(run(args.concurrency, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Bytes on the wire and encode CPU of a task list, per representation and coding.
+
+Encodes the same rows as JSON objects, columnar JSON and msgpack (when
+installed), each sent as is and compressed with every available content
+coding, and reports the body size and the CPU time to produce it, both
+scaled to 10,000 tasks. Timings are process CPU time, so they exclude
+waiting and match what a worker spends per response.
+
+Usage:
+    python benchmarks/encoding.py --tasks 10000 --rounds 5
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from common import load_app, temp_database_url
+
+
+def cpu_time(fn, rounds: int) -> float:
+    start = time.process_time()
+    for _ in range(rounds):
+        fn()
+    return (time.process_time() - start) / rounds
+
+
+async def run(count: int, rounds: int) -> None:
+    await load_app()
+    from sqlmodel import select
+    from recurly.compression import COMPRESSORS, compress
+    from recurly.database import dispose_engines, open_session
+    from recurly.models.task import Task
+    from recurly.models.user import User
+    from recurly.serialization import LIST_MEDIA_TYPES, TASK_READ_COLUMNS, encode_rows
+
+    async with open_session() as session:
+        user = User(email="bench@example.com", password_hash="-")
+        session.add(user)
+        await session.flush()
+        session.add_all(
+            Task(title=f"Water the plants in room {i}", description="Check the soil first" if i % 3 else None,
+                 cadence=("daily", "weekly", "every 3 days")[i % 3], assigned_to=user.id)
+            for i in range(count)
+        )
+        await session.commit()
+        rows = (await session.exec(select(*TASK_READ_COLUMNS).order_by(Task.id))).all()
+    await dispose_engines()
+
+    scale = 10_000 / count
+    print(f"{count} tasks, {rounds} rounds, per 10,000 tasks:")
+    print(f"  {'representation':<40} {'coding':<9} {'bytes':>11} {'encode CPU':>12}")
+    for media_type in LIST_MEDIA_TYPES:
+        body = encode_rows(rows, media_type=media_type)
+        encode = cpu_time(lambda: encode_rows(rows, media_type=media_type), rounds)
+        print(f"  {media_type:<40} {'identity':<9} {len(body) * scale:11,.0f} {encode * scale * 1000:9.2f} ms")
+        for encoding in COMPRESSORS:
+            size = len(compress(encoding, body))
+            total = encode + cpu_time(lambda: compress(encoding, body), rounds)
+            print(f"  {'':<40} {encoding:<9} {size * scale:11,.0f} {total * scale * 1000:9.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=10_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DATABASE_URL", temp_database_url())
+    asyncio.run(run(args.tasks, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
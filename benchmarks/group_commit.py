@@ -0,0 +1,76 @@
+"""complete_task throughput with and without write-behind group commit.
+
+Each of ``--clients`` concurrent clients completes its own task
+``--completions`` times, first with one commit per request and then with
+``task_write_behind`` grouping the completions queued at the same time.
+Pass ``--synchronous FULL`` to fsync every commit, as a rollback journal
+or a stricter durability setting would.
+
+Usage:
+    python benchmarks/group_commit.py --clients 1 16 64 --completions 100
+"""
+import argparse
+import asyncio
+import os
+
+from common import Timer, client, load_app, register_and_login, temp_database_url
+
+
+async def run(client_counts, completions: int, max_delay_ms: float) -> None:
+    from recurly.database import dispose_engines
+    from recurly.write_behind import task_write_behind
+
+    app = await load_app()
+    task_write_behind.max_delay = max_delay_ms / 1000
+    async with client(app) as http:
+        headers = await register_and_login(http, "bench@example.com")
+        items = [{"title": f"Task {i}", "cadence": "daily", "assigned_to": 1} for i in range(max(client_counts))]
+        response = await http.post("/api/tasks:batch", json={"items": items}, headers=headers)
+        response.raise_for_status()
+        task_ids = [result["task"]["id"] for result in response.json()["results"]]
+
+        errors = 0
+
+        async def complete(task_id: int) -> None:
+            nonlocal errors
+            for _ in range(completions):
+                try:
+                    (await http.patch(f"/api/tasks/{task_id}/complete", json={}, headers=headers)).raise_for_status()
+                except Exception:  # e.g. "database is locked" when a writer gives up
+                    errors += 1
+
+        print(f"{'clients':>8} {'one commit each':>24} {'group commit':>24} {'writes/commit':>14}")
+        for clients in client_counts:
+            columns = []
+            for enabled in (False, True):
+                task_write_behind.enabled = enabled
+                before = task_write_behind.stats()
+                errors = 0
+                with Timer() as timer:
+                    await asyncio.gather(*(complete(task_id) for task_id in task_ids[:clients]))
+                rate = (clients * completions - errors) / timer.elapsed
+                columns.append(f"{rate:>8.0f} ops/s {errors:>4} errors")
+            after = task_write_behind.stats()
+            per_commit = (after["writes"] - before["writes"]) / max(1, after["batches"] - before["batches"])
+            print(f"{clients:>8} {columns[0]:>24} {columns[1]:>24} {per_commit:>14.1f}")
+        await task_write_behind.close()
+    await dispose_engines()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--completions", type=int, default=100, help="per client")
+    parser.add_argument("--max-delay-ms", type=float, default=0)
+    parser.add_argument("--synchronous", default=None, help="SQLite synchronous pragma, e.g. FULL")
+    parser.add_argument("--database-url", default=None, help="default: a temporary SQLite file")
+    args = parser.parse_args()
+
+    os.environ.setdefault("DATABASE_URL", args.database_url or temp_database_url())
+    if args.synchronous:
+        os.environ["SQLITE_SYNCHRONOUS"] = args.synchronous
+    asyncio.run(run(args.clients, args.completions, args.max_delay_ms))
+
+
+if __name__ == "__main__":
+    main()
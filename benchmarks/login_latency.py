@@ -0,0 +1,82 @@
+"""p99 latency of GET /api/tasks while a burst of logins is running.
+
+Usage:
+    python benchmarks/login_latency.py                 # compare all executors
+    python benchmarks/login_latency.py --executor thread --logins 16
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+from common import client, load_app, register_and_login, summarize, temp_database_url
+
+EXECUTORS = ("inline", "thread", "process")
+
+
+async def run(logins: int, duration: float) -> None:
+    app = await load_app()
+    async with client(app) as http:
+        headers = await register_and_login(http, "reader@example.com")
+        await register_and_login(http, "login@example.com")
+        for i in range(50):
+            await http.post(
+                "/api/tasks",
+                json={"title": f"Task {i}", "cadence": "daily", "assigned_to": 1},
+                headers=headers,
+            )
+
+        async def poll(samples, stop_at):
+            while time.perf_counter() < stop_at:
+                start = time.perf_counter()
+                response = await http.get("/api/tasks", headers=headers)
+                response.raise_for_status()
+                samples.append(time.perf_counter() - start)
+                await asyncio.sleep(0.005)
+
+        async def login(counts, stop_at):
+            while time.perf_counter() < stop_at:
+                response = await http.post(
+                    "/auth/login",
+                    data={"username": "login@example.com", "password": "benchmark-password"},
+                )
+                counts[response.status_code] = counts.get(response.status_code, 0) + 1
+
+        idle = []
+        await poll(idle, time.perf_counter() + duration / 2)
+
+        busy, counts = [], {}
+        stop_at = time.perf_counter() + duration
+        await asyncio.gather(poll(busy, stop_at), *(login(counts, stop_at) for _ in range(logins)))
+
+    executor = os.environ["PASSWORD_HASH_EXECUTOR"]
+    summarize(f"[{executor}] /api/tasks idle", idle)
+    summarize(f"[{executor}] /api/tasks during logins", busy)
+    print(f"[{executor}] login responses by status: {counts}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--executor", choices=EXECUTORS)
+    parser.add_argument("--logins", type=int, default=8, help="concurrent login clients")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per phase")
+    args = parser.parse_args()
+
+    if args.executor is None:
+        for executor in EXECUTORS:
+            subprocess.run(
+                [sys.executable, __file__, "--executor", executor,
+                 "--logins", str(args.logins), "--duration", str(args.duration)],
+                check=True,
+            )
+        return
+
+    os.environ["PASSWORD_HASH_EXECUTOR"] = args.executor
+    os.environ["DATABASE_URL"] = temp_database_url()
+    asyncio.run(run(args.logins, args.duration))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Reminder scheduler start-up time and memory with many scheduled tasks.
+
+Bulk-inserts ``--tasks`` tasks due uniformly over ``--spread-days`` and
+compares loading every due time into the heap (what a naive scheduler does
+on restart) with the scheduler's horizon window, then times incremental
+schedule changes.
+
+Usage:
+    python benchmarks/scheduler_load.py --tasks 1000000 --horizon 3600
+"""
+import argparse
+import asyncio
+import heapq
+import os
+import random
+import tracemalloc
+from datetime import timedelta
+
+from common import Timer, load_app, temp_database_url
+
+
+def _insert_tasks(session, count: int, spread: timedelta) -> None:
+    from sqlalchemy import insert
+    from recurly.cadence import utc_now
+    from recurly.models.task import Task
+    from recurly.models.user import User
+
+    user = User(email="bench@example.com", password_hash="-")
+    session.add(user)
+    session.flush()
+    now = utc_now()
+    table = Task.__table__
+    for start in range(0, count, 50_000):
+        session.execute(insert(table), [
+            {
+                "title": f"Task {i}", "cadence": "daily", "assigned_to": user.id,
+                "next_due_at": now + spread * random.random(), "created_at": now,
+            }
+            for i in range(start, min(start + 50_000, count))
+        ])
+    session.commit()
+
+
+async def run(count: int, horizon: float, spread_days: float, max_loaded: int) -> None:
+    await load_app()
+    from sqlmodel import select
+    from recurly.cadence import utc_now
+    from recurly.database import dispose_engines, open_session
+    from recurly.models.task import Task
+    from recurly.scheduler import LogSink, ReminderScheduler
+
+    with Timer() as setup:
+        async with open_session() as session:
+            await session.run_sync(_insert_tasks, count, timedelta(days=spread_days))
+    print(f"inserted {count:,} tasks in {setup.elapsed:.1f} s")
+
+    async def load_all() -> list:
+        async with open_session() as session:
+            rows = (await session.exec(
+                select(Task.next_due_at, Task.id).where(Task.next_due_at.is_not(None))
+            )).all()
+        heap = [tuple(row) for row in rows]
+        heapq.heapify(heap)
+        return heap
+
+    async def load_window() -> ReminderScheduler:
+        scheduler = ReminderScheduler(LogSink(), horizon=horizon, max_loaded=max_loaded)
+        await scheduler.refill(now)
+        return scheduler
+
+    now = utc_now()
+    print(f"  {'start-up':<26} {'time':>10} {'entries':>10} {'memory':>10}")
+    loaded = None
+    for name, load in ((f"load {horizon:g} s window", load_window), ("load every due time", load_all)):
+        del loaded  # Freeing the previous heap is not part of the next load
+        with Timer() as timer:
+            loaded = await load()
+        del loaded
+        # Measured separately: tracing allocations slows the load down several times
+        tracemalloc.start()
+        loaded = await load()
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"  {name:<26} {timer.elapsed * 1000:7.1f} ms {len(loaded):>10,} {memory / 2**20:6.1f} MiB")
+        if load is load_window:
+            scheduler = loaded
+
+    # Changes from commits: half move inside the window, half move out of it
+    changes = [
+        (random.randint(1, count), now + timedelta(seconds=random.random() * horizon * 2))
+        for _ in range(100_000)
+    ]
+    with Timer() as incremental:
+        scheduler._apply_changes(changes)
+    print(f"  {len(changes):,} incremental changes {incremental.elapsed * 1000:7.1f} ms "
+          f"({len(changes) / incremental.elapsed:,.0f}/s), heap now {len(scheduler):,} entries")
+    await dispose_engines()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=200_000)
+    parser.add_argument("--horizon", type=float, default=3600, help="seconds of due times held in memory")
+    parser.add_argument("--spread-days", type=float, default=30)
+    parser.add_argument("--max-loaded", type=int, default=100_000)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DATABASE_URL", temp_database_url())
+    # The bulk insert would otherwise be logged as slow queries
+    os.environ.setdefault("SLOW_QUERY_MS", "-1")
+    asyncio.run(run(args.tasks, args.horizon, args.spread_days, args.max_loaded))
+
+
+if __name__ == "__main__":
+    main()
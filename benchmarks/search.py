@@ -0,0 +1,112 @@
+"""Task search latency, full-text index versus ``LIKE '%q%'`` scans.
+
+Bulk-inserts ``--tasks`` tasks with titles and descriptions drawn from a
+small vocabulary, then times the first page (``--limit`` rows) of the
+``/api/tasks/search`` query and of the equivalent ``LIKE`` filter over
+title and description, for rare, two-word, prefix and common queries.
+Ranking scores every match, so the full-text query slows down as a term
+matches a larger share of the table (``garden`` is in ~10% of titles),
+while an unranked ``LIKE`` can stop at the first page.
+
+Usage:
+    python benchmarks/search.py --tasks 200000 --rounds 20
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+
+from common import load_app, summarize, temp_database_url
+
+WORDS = (
+    "water plants garden kitchen laundry rent invoice dentist passport renew "
+    "filter vacuum recycle groceries insurance taxes backup server oil tyres "
+    "gutters smoke alarm battery license subscription pharmacy vet dog cat"
+).split()
+RARE = "zeppelin"
+# Description words follow a Zipf-like distribution over a larger vocabulary
+VOCABULARY = [f"term{i}" for i in range(5000)]
+WEIGHTS = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+
+
+def _insert_tasks(session, count: int) -> None:
+    from sqlalchemy import insert
+    from recurly.models.task import Task
+    from recurly.models.user import User
+
+    user = User(email="bench@example.com", password_hash="-")
+    session.add(user)
+    session.flush()
+    rows = []
+    for i in range(count):
+        title = " ".join(random.sample(WORDS, 3))
+        if i % 10_000 == 0:
+            title += f" {RARE}"
+        rows.append({
+            "title": title.capitalize(),
+            "description": " ".join(random.choices(VOCABULARY, WEIGHTS, k=12)),
+            "cadence": "weekly",
+            "assigned_to": user.id,
+        })
+        if len(rows) == 50_000:
+            session.execute(insert(Task.__table__), rows)
+            rows = []
+    if rows:
+        session.execute(insert(Task.__table__), rows)
+    session.commit()
+
+
+async def run(count: int, rounds: int, limit: int) -> None:
+    await load_app()
+    from sqlmodel import or_, select
+    from recurly.database import dispose_engines, open_session
+    from recurly.models.task import Task
+    from recurly.search import match_tasks
+    from recurly.serialization import TASK_READ_COLUMNS
+
+    async with open_session() as session:
+        await session.run_sync(_insert_tasks, count)
+
+    def fts(q):
+        matches = match_tasks(q)
+        return (
+            select(*TASK_READ_COLUMNS).join(matches, matches.c.id == Task.id)
+            .order_by(matches.c.rank, Task.id).limit(limit)
+        )
+
+    def like(q):
+        statement = select(*TASK_READ_COLUMNS).order_by(Task.id).limit(limit)
+        for word in q.split():
+            pattern = f"%{word}%"
+            statement = statement.where(or_(Task.title.like(pattern), Task.description.like(pattern)))
+        return statement
+
+    print(f"{count:,} tasks, first page of {limit}")
+    for q in (RARE, "term3000", "dentist renew", "vet passpo", "garden"):
+        for name, build in (("fts", fts), ("like", like)):
+            samples = []
+            for _ in range(rounds):
+                async with open_session() as session:
+                    start = time.perf_counter()
+                    rows = (await session.exec(build(q))).all()
+                    samples.append(time.perf_counter() - start)
+            summarize(f"{name:<5} {q!r} ({len(rows)} rows)", samples)
+    await dispose_engines()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=200_000)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DATABASE_URL", temp_database_url())
+    # The bulk insert would otherwise be logged as slow queries
+    os.environ.setdefault("SLOW_QUERY_MS", "-1")
+    asyncio.run(run(args.tasks, args.rounds, args.limit))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Serialisation cost of a task list page, ORM + response_model versus column rows.
+
+Times only the work after the query: the "before" path mirrors what FastAPI
+does for ``select(Task)`` with ``response_model=List[TaskRead]`` (dump each
+SQLModel instance, validate into TaskRead, serialise, json.dumps); the
+"after" path is ``json_rows_response`` over ``select(*TASK_READ_COLUMNS)``.
+
+Usage:
+    python benchmarks/serialization.py --tasks 1000 --rounds 50
+"""
+import argparse
+import asyncio
+import json
+import os
+from typing import List
+
+from common import Timer, load_app, temp_database_url
+
+
+async def run(count: int, rounds: int) -> None:
+    await load_app()
+    from pydantic import TypeAdapter
+    from sqlmodel import select
+    from recurly.database import dispose_engines, open_session
+    from recurly.models.task import Task
+    from recurly.models.user import User
+    from recurly.schemas import TaskRead
+    from recurly.serialization import TASK_READ_COLUMNS, json_rows_response, orjson
+
+    async with open_session() as session:
+        user = User(email="bench@example.com", password_hash="-")
+        session.add(user)
+        await session.flush()
+        session.add_all(
+            Task(title=f"Task {i}", description="x" * 200, cadence="weekly", assigned_to=user.id)
+            for i in range(count)
+        )
+        await session.commit()
+
+    adapter = TypeAdapter(List[TaskRead])
+
+    def before(tasks) -> bytes:
+        content = [task.model_dump(by_alias=True) for task in tasks]
+        value = adapter.validate_python(content)
+        return json.dumps(
+            adapter.dump_python(value, mode="json"), ensure_ascii=False, separators=(",", ":")
+        ).encode()
+
+    def after(rows) -> bytes:
+        return json_rows_response(rows).body
+
+    # A fresh session per round, as each request gets, so the identity map starts empty
+    with Timer() as load_orm:
+        for _ in range(rounds):
+            async with open_session() as session:
+                tasks = (await session.exec(select(Task).order_by(Task.id))).all()
+    with Timer() as load_rows:
+        for _ in range(rounds):
+            async with open_session() as session:
+                rows = (await session.exec(select(*TASK_READ_COLUMNS).order_by(Task.id))).all()
+
+    assert json.loads(before(tasks)) == json.loads(after(rows))
+
+    with Timer() as encode_before:
+        for _ in range(rounds):
+            before(tasks)
+    with Timer() as encode_after:
+        for _ in range(rounds):
+            after(rows)
+
+    per_1000 = 1000 / count / rounds * 1000
+    encoder = "orjson" if orjson is not None else "pydantic-core"
+    print(f"{count} tasks, {rounds} rounds, per 1,000 tasks:")
+    print(f"  query, select(Task) ORM instances     {load_orm.elapsed * per_1000:8.2f} ms")
+    print(f"  query, select(*TASK_READ_COLUMNS)      {load_rows.elapsed * per_1000:8.2f} ms")
+    print(f"  serialise, response_model + json      {encode_before.elapsed * per_1000:8.2f} ms")
+    print(f"  serialise, rows + {encoder:<20} {encode_after.elapsed * per_1000:8.2f} ms")
+    await dispose_engines()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DATABASE_URL", temp_database_url())
+    asyncio.run(run(args.tasks, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
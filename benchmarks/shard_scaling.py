@@ -0,0 +1,137 @@
+"""complete_task throughput as tasks are spread over 1 to 4 SQLite shards.
+
+Several processes complete tasks for users whose tasks live on
+``user_id % shards``. With one shard every commit takes the same file's
+write lock; with more, commits for different users proceed in parallel.
+
+Usage:
+    python benchmarks/shard_scaling.py --shards 1 2 4 --processes 4 --clients 8 --completions 300
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+
+from common import client, load_app, temp_database_url
+
+# Users per process, per shard, so every process writes to every shard
+USERS_PER_SHARD = 2
+
+
+async def setup(users: int) -> None:
+    await load_app()
+    from recurly.database import dispose_engines, open_session
+    from recurly.models.task import Task
+    from recurly.models.user import User
+    from recurly.sharding import user_task_session
+
+    async with open_session() as session:
+        session.add_all(User(email=f"user{index}@example.com", password_hash="-") for index in range(users))
+        await session.commit()
+        for user_id in range(1, users + 1):
+            async with user_task_session(session, user_id, write=True) as tasks:
+                tasks.add(Task(title=f"Task {user_id}", cadence="daily", assigned_to=user_id))
+                await tasks.commit()
+    await dispose_engines()
+
+
+async def worker(user_ids, clients: int, completions: int, results) -> None:
+    app = await load_app()
+    from sqlmodel import select
+    from recurly.auth import create_user_access_token
+    from recurly.database import dispose_engines, open_session
+    from recurly.models.task import Task
+    from recurly.models.user import User
+    from recurly.sharding import user_task_session
+
+    targets = []
+    async with open_session() as session:
+        for user_id in user_ids:
+            user = await session.get(User, user_id)
+            async with user_task_session(session, user_id) as tasks:
+                task_id = (await tasks.exec(select(Task.id).where(Task.assigned_to == user_id))).first()
+            targets.append((task_id, {"Authorization": f"Bearer {create_user_access_token(user)}"}))
+
+    ok = errors = 0
+    remaining = completions
+
+    start = time.perf_counter()
+    async with client(app) as http:
+        async def complete(offset: int):
+            nonlocal ok, errors, remaining
+            while remaining > 0:
+                remaining -= 1
+                task_id, headers = targets[(remaining + offset) % len(targets)]
+                try:
+                    response = await http.patch(f"/api/tasks/{task_id}/complete", json={}, headers=headers)
+                    ok += response.status_code == 200
+                    errors += response.status_code != 200
+                except Exception:
+                    errors += 1
+
+        await asyncio.gather(*(complete(offset) for offset in range(clients)))
+    elapsed = time.perf_counter() - start
+    await dispose_engines()
+    results.put((ok, errors, elapsed))
+
+
+def run_setup(users):
+    asyncio.run(setup(users))
+
+
+def run_worker(user_ids, clients, completions, results):
+    asyncio.run(worker(user_ids, clients, completions, results))
+
+
+def run_shards(shards: int, args) -> float:
+    os.environ["DATABASE_URL"] = temp_database_url()
+    os.environ["TASK_SHARD_URLS"] = ",".join(temp_database_url() for _ in range(shards))
+    users_per_process = USERS_PER_SHARD * shards
+    # The app binds its engines at import time, so every step gets a fresh process
+    setup_proc = multiprocessing.Process(target=run_setup, args=(args.processes * users_per_process,))
+    setup_proc.start()
+    setup_proc.join()
+
+    results = multiprocessing.Queue()
+    procs = [
+        multiprocessing.Process(target=run_worker, args=(
+            range(index * users_per_process + 1, (index + 1) * users_per_process + 1),
+            args.clients, args.completions, results,
+        ))
+        for index in range(args.processes)
+    ]
+    for proc in procs:
+        proc.start()
+    totals = [results.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+
+    ok = sum(t[0] for t in totals)
+    errors = sum(t[1] for t in totals)
+    # Workers start at slightly different times; use the slowest as wall time
+    rate = ok / max(t[2] for t in totals)
+    print(f"{shards} shard(s){'':<31} {rate:8.1f} completions/s  errors={errors}")
+    return rate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--clients", type=int, default=8, help="concurrent callers per process")
+    parser.add_argument("--completions", type=int, default=300, help="completions per process")
+    parser.add_argument("--synchronous", default="FULL",
+                        help="SQLite synchronous setting; FULL syncs every commit to disk")
+    args = parser.parse_args()
+
+    os.environ.setdefault("RECURLY_ENV", "test")
+    os.environ.setdefault("SLOW_QUERY_MS", "-1")
+    os.environ["SQLITE_SYNCHRONOUS"] = args.synchronous
+    rates = [run_shards(shards, args) for shards in args.shards]
+    print(f"speed-up {args.shards[-1]} vs {args.shards[0]} shard(s): {rates[-1] / rates[0]:.2f}x")
+
+
+if __name__ == "__main__":
+    multiprocessing.set_start_method("spawn")
+    main()
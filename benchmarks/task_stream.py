@@ -0,0 +1,83 @@
+"""Idle subscriber footprint and fan-out latency of the task event stream.
+
+Subscribes N consumers of the SSE generator to one user's events in-process
+(no sockets), reports the memory held per idle subscriber, then completes a
+task several times and measures the time from commit to each consumer
+receiving the event.
+
+Usage:
+    python benchmarks/task_stream.py --subscribers 1000 10000 --events 20
+"""
+import argparse
+import asyncio
+import gc
+import os
+import time
+import tracemalloc
+
+from common import client, load_app, register_and_login, summarize, temp_database_url
+
+
+async def run(counts, events: int) -> None:
+    app = await load_app()
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session as ORMSession
+    from recurly.database import dispose_engines
+    from recurly.events import sse_events, task_events
+
+    commits = []
+    event.listen(ORMSession, "after_commit", lambda session: commits.append(time.perf_counter()), insert=True)
+
+    async with client(app) as http:
+        headers = await register_and_login(http, "stream@example.com")
+        await http.post("/api/tasks", json={"title": "Watched", "cadence": "daily", "assigned_to": 1}, headers=headers)
+
+        for count in counts:
+            received = []
+
+            async def consume(stream):
+                async for chunk in stream:
+                    if chunk.startswith("event: completed"):
+                        received.append(time.perf_counter())
+
+            gc.collect()
+            tracemalloc.start()
+            before = tracemalloc.get_traced_memory()[0]
+            streams = [sse_events(task_events.subscribe(1), heartbeat=30) for _ in range(count)]
+            consumers = [asyncio.create_task(consume(stream)) for stream in streams]
+            await asyncio.sleep(0.1)
+            held = tracemalloc.get_traced_memory()[0] - before
+            tracemalloc.stop()
+
+            latencies = []
+            for _ in range(events):
+                received.clear()
+                commits.clear()
+                await http.patch("/api/tasks/1/complete", json={}, headers=headers)
+                while len(received) < count:
+                    await asyncio.sleep(0.001)
+                committed_at = commits[-1]
+                latencies.extend(moment - committed_at for moment in received)
+
+            for consumer in consumers:
+                consumer.cancel()
+            await asyncio.gather(*consumers, return_exceptions=True)
+
+            print(f"{count} idle subscribers: {held / count / 1024:.1f} KiB each")
+            summarize(f"  fan-out latency, commit to delivery ({events} events)", latencies)
+    await dispose_engines()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--events", type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DATABASE_URL", temp_database_url())
+    os.environ.setdefault("PASSWORD_HASH_EXECUTOR", "inline")
+    asyncio.run(run(args.subscribers, args.events))
+
+
+if __name__ == "__main__":
+    main()
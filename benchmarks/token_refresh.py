@@ -0,0 +1,80 @@
+"""Cost of renewing a session with /auth/refresh instead of /auth/login.
+
+Also times an authenticated request with many revoked tokens loaded, to
+show that the revocation check stays a set lookup.
+
+Usage:
+    python benchmarks/token_refresh.py --renewals 50 --revoked 100000
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+from datetime import timedelta
+
+from common import client, load_app, register_and_login, summarize, temp_database_url
+
+PASSWORD = "benchmark-password"
+
+
+async def run(renewals: int, revoked: int, requests: int) -> None:
+    app = await load_app()
+    from recurly.cadence import utc_now
+    from recurly.revocation import revocations
+
+    async with client(app) as http:
+        headers = await register_and_login(http, "refresh@example.com", PASSWORD)
+
+        async def timed(call):
+            samples = []
+            for _ in range(renewals):
+                start = time.perf_counter()
+                response = await call()
+                response.raise_for_status()
+                samples.append(time.perf_counter() - start)
+            return samples, response
+
+        login, response = await timed(lambda: http.post(
+            "/auth/login", data={"username": "refresh@example.com", "password": PASSWORD}
+        ))
+        refresh_token = response.json()["refresh_token"]
+
+        async def refresh():
+            nonlocal refresh_token
+            response = await http.post("/auth/refresh", json={"refresh_token": refresh_token})
+            refresh_token = response.json()["refresh_token"]
+            return response
+
+        refreshed, _ = await timed(refresh)
+        summarize("/auth/login (bcrypt)", login)
+        summarize("/auth/refresh", refreshed)
+
+        async def me():
+            samples = []
+            for _ in range(requests):
+                start = time.perf_counter()
+                (await http.get("/auth/me", headers=headers)).raise_for_status()
+                samples.append(time.perf_counter() - start)
+            return samples
+
+        summarize(f"/auth/me, {len(revocations)} revoked tokens", await me())
+        expires_at = utc_now() + timedelta(days=1)
+        revocations.add([(uuid.uuid4().hex, expires_at) for _ in range(revoked)])
+        summarize(f"/auth/me, {len(revocations)} revoked tokens", await me())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--renewals", type=int, default=50)
+    parser.add_argument("--revoked", type=int, default=100_000, help="revoked tokens to load before the second /auth/me run")
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DATABASE_URL", temp_database_url())
+    os.environ.setdefault("PASSWORD_HASH_EXECUTOR", "inline")
+    asyncio.run(run(args.renewals, args.revoked, args.requests))
+
+
+if __name__ == "__main__":
+    main()
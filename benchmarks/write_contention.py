@@ -0,0 +1,126 @@
+"""complete_task throughput with several processes writing to one SQLite file.
+
+Compares the default engine configuration (WAL, synchronous=NORMAL,
+busy_timeout) with SQLite's rollback-journal defaults.
+
+Usage:
+    python benchmarks/write_contention.py --processes 4 --clients 8 --completions 200
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+
+from common import client, load_app, temp_database_url
+
+CONFIGS = {
+    "rollback journal, synchronous=FULL": {
+        "SQLITE_JOURNAL_MODE": "DELETE",
+        "SQLITE_SYNCHRONOUS": "FULL",
+        "SQLITE_BUSY_TIMEOUT_MS": "-1",
+        "SQLITE_MMAP_SIZE": "-1",
+    },
+    "WAL, synchronous=NORMAL, busy_timeout": {},
+}
+
+
+async def setup(processes: int) -> None:
+    await load_app()
+    from recurly.database import dispose_engines, open_session
+    from recurly.models.task import Task
+    from recurly.models.user import User
+
+    async with open_session() as session:
+        for worker in range(processes):
+            user = User(email=f"worker{worker}@example.com", password_hash="-")
+            session.add(user)
+            await session.flush()
+            session.add(Task(title=f"Task {worker}", cadence="daily", assigned_to=user.id))
+        await session.commit()
+    await dispose_engines()
+
+
+async def worker(index: int, clients: int, completions: int, results) -> None:
+    app = await load_app()
+    from recurly.auth import create_user_access_token
+    from recurly.database import dispose_engines, open_session
+    from recurly.models.user import User
+
+    async with open_session() as session:
+        user = await session.get(User, index + 1)
+    headers = {"Authorization": f"Bearer {create_user_access_token(user)}"}
+
+    ok = errors = 0
+    remaining = completions
+
+    start = time.perf_counter()
+    async with client(app) as http:
+        async def complete():
+            nonlocal ok, errors, remaining
+            while remaining > 0:
+                remaining -= 1
+                try:
+                    response = await http.patch(f"/api/tasks/{index + 1}/complete", json={}, headers=headers)
+                    ok += response.status_code == 200
+                    errors += response.status_code != 200
+                except Exception:
+                    errors += 1
+
+        await asyncio.gather(*(complete() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    await dispose_engines()
+    results.put((ok, errors, elapsed))
+
+
+def run_setup(processes):
+    asyncio.run(setup(processes))
+
+
+def run_worker(index, clients, completions, results):
+    asyncio.run(worker(index, clients, completions, results))
+
+
+def run_config(label: str, overrides: dict, args) -> None:
+    os.environ.update(overrides)
+    os.environ["DATABASE_URL"] = temp_database_url()
+    # The app binds its engine at import time, so every step gets a fresh process
+    setup_proc = multiprocessing.Process(target=run_setup, args=(args.processes,))
+    setup_proc.start()
+    setup_proc.join()
+
+    results = multiprocessing.Queue()
+    procs = [
+        multiprocessing.Process(target=run_worker, args=(i, args.clients, args.completions, results))
+        for i in range(args.processes)
+    ]
+    for proc in procs:
+        proc.start()
+    totals = [results.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+    for name in overrides:
+        del os.environ[name]
+
+    ok = sum(t[0] for t in totals)
+    errors = sum(t[1] for t in totals)
+    # Workers start at slightly different times; use the slowest as wall time
+    elapsed = max(t[2] for t in totals)
+    print(f"{label:<40} {ok / elapsed:8.1f} completions/s  errors={errors}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--clients", type=int, default=8, help="concurrent callers per process")
+    parser.add_argument("--completions", type=int, default=200, help="completions per process")
+    args = parser.parse_args()
+
+    os.environ.setdefault("RECURLY_ENV", "test")
+    for label, overrides in CONFIGS.items():
+        run_config(label, overrides, args)
+
+
+if __name__ == "__main__":
+    multiprocessing.set_start_method("spawn")
+    main()
@@ -1,9 +1,19 @@
 from typing import Union
 from fastapi import FastAPI, Depends
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
 from recurly.routes.auth import router as auth_router
 from recurly.routes.task import router as task_router
-from recurly.database import create_db_and_tables
+from recurly.routes.task_calendar import router as task_calendar_router
+from recurly.routes.task_batch import router as task_batch_router
+from recurly.compression import CompressionMiddleware
+from recurly.database import create_db_and_tables, dispose_engines
+from recurly.hashing import password_hasher
+from recurly.revocation import revocations
+from recurly.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, render as render_metrics
+from recurly.profiling import ProfilingMiddleware
+from recurly.scheduler import SCHEDULER_ENABLED, start_scheduler, stop_scheduler
+from recurly.write_behind import task_write_behind
 from recurly.models.user import User
 from recurly.auth import get_current_active_user
 
@@ -18,16 +28,39 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# zstd/br/gzip by Accept-Encoding for responses of COMPRESSION_MIN_BYTES or more
+app.add_middleware(CompressionMiddleware)
+
+# Server-Timing breakdown for a PROFILE_SAMPLE_RATE share of requests
+app.add_middleware(ProfilingMiddleware)
+
+# Request counts and latency per route, exposed at /metrics
+app.add_middleware(MetricsMiddleware)
+
 # Include authentication routes
 app.include_router(auth_router, prefix="/auth", tags=["authentication"])
 
-# Include task routes
+# Include task routes; /tasks/occurrences and /tasks/calendar come before /tasks/{task_id}
+app.include_router(task_calendar_router, prefix="/api", tags=["tasks"])
 app.include_router(task_router, prefix="/api", tags=["tasks"])
+app.include_router(task_batch_router, prefix="/api", tags=["tasks"])
 
 # Create database tables on startup
 @app.on_event("startup")
-def on_startup():
-    create_db_and_tables()
+async def on_startup():
+    await create_db_and_tables()
+    await revocations.start()
+    if SCHEDULER_ENABLED:
+        start_scheduler()
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await stop_scheduler()
+    await revocations.stop()
+    await task_write_behind.close()
+    password_hasher.shutdown()
+    await dispose_engines()
 
 
 @app.get("/")
@@ -35,6 +68,12 @@ def read_root():
     return {"Hello": "World", "message": "Recurly API is running!"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    """Prometheus metrics for this worker process."""
+    return Response(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
 @app.get("/items/{item_id}")
 def read_item(item_id: int, q: Union[str, None] = None):
     return {"item_id": item_id, "q": q}
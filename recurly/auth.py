@@ -1,24 +1,102 @@
-from datetime import datetime, timedelta
+import os
+import time
+import uuid
+from datetime import timedelta
 from typing import Optional, Union
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
-from sqlmodel import Session, select
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session as ORMSession
+from sqlmodel import select
+from .cache import TTLCache
+from .cadence import utc_now
 from .models.user import User
-from .database import get_session
+from .database import DBSession, get_session
+from .hashing import PasswordHasherBusy, password_hasher, pwd_context
+from .metrics import jwt_duration, password_hash_duration
+from .profiling import record_auth_time
+from .revocation import revocations, revoke_token
 
 # Configuration
 SECRET_KEY = "your-secret-key-change-this-in-production"  # Change this in production!
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
-
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+# Refresh tokens trade for new tokens at /auth/refresh without the password
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+USER_CACHE_MAXSIZE = int(os.getenv("USER_CACHE_MAXSIZE", "10000"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+TOKEN_CACHE_MAXSIZE = int(os.getenv("TOKEN_CACHE_MAXSIZE", "10000"))
+# Calendar apps keep a feed URL for good, so its token outlives access tokens
+CALENDAR_TOKEN_EXPIRE_DAYS = int(os.getenv("CALENDAR_TOKEN_EXPIRE_DAYS", "365"))
+# Scope claims of calendar feed and refresh tokens; access tokens have none
+CALENDAR_SCOPE = "calendar"
+REFRESH_SCOPE = "refresh"
+# Trust token claims for the token lifetime: cached users are only reloaded
+# when a token carries a newer token version than the cached row. The cache
+# is per process; users changed through another worker are dropped from it
+# when the revocation list next refreshes (REVOCATION_REFRESH_SECONDS).
+AUTH_TRUSTED_CLAIMS = os.getenv("AUTH_TRUSTED_CLAIMS", "false").lower() in ("1", "true", "yes")
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+# Authenticated users by user id (or email for tokens without one), holding
+# detached copies of the rows
+user_cache: TTLCache[User] = TTLCache(
+    USER_CACHE_MAXSIZE,
+    ACCESS_TOKEN_EXPIRE_MINUTES * 60 if AUTH_TRUSTED_CLAIMS else USER_CACHE_TTL_SECONDS,
+)
+
+# Decoded claims of tokens whose signature has already been verified, kept
+# until the token expires
+token_cache: TTLCache[dict] = TTLCache(TOKEN_CACHE_MAXSIZE, ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+
+def _user_cache_keys(user: User) -> set:
+    """Every cache key a user may be stored under, including a just-changed email."""
+    keys = {user.id, user.email}
+    keys.update(inspect(user).attrs.email.history.deleted or ())
+    return keys
+
+
+@event.listens_for(User, "before_update")
+def _bump_token_version(mapper, connection, target: User) -> None:
+    """Invalidate outstanding tokens when a user is deactivated or changes email."""
+    state = inspect(target)
+    deactivated = state.attrs.is_active.history.has_changes() and not target.is_active
+    if deactivated or state.attrs.email.history.has_changes():
+        target.token_version = (target.token_version or 0) + 1
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target: User) -> None:
+    keys = _user_cache_keys(target)
+    for key in keys:
+        user_cache.pop(key)
+    # Drop them again once committed, in case a concurrent request re-cached
+    # the old row between this flush and the commit.
+    session = ORMSession.object_session(target)
+    if session is not None:
+        session.info.setdefault("invalidated_users", set()).update(keys)
+
+
+@event.listens_for(ORMSession, "after_commit")
+def _invalidate_cached_users_on_commit(session: ORMSession) -> None:
+    for key in session.info.pop("invalidated_users", ()):
+        user_cache.pop(key)
+
+
+def _forget_changed_users(changed: list) -> None:
+    """Drop users changed by any worker, as reported by the revocation list."""
+    for user_id, email in changed:
+        user_cache.pop(user_id)
+        user_cache.pop(email)
+
+
+revocations.user_listeners.append(_forget_changed_users)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
@@ -30,51 +108,160 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def hash_password(password: str) -> str:
+    """Hash a password without blocking the event loop."""
+    start = time.perf_counter()
+    try:
+        return await password_hasher.hash(password)
+    except PasswordHasherBusy:
+        raise _password_hasher_busy()
+    finally:
+        elapsed = time.perf_counter() - start
+        password_hash_duration.observe(elapsed, ("hash",))
+        record_auth_time(elapsed)
+
+
+def _password_hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server is busy, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
-    """Create a JWT access token."""
-    to_encode = data.copy()
+    """Create a JWT access token with a unique ``jti``, so it can be revoked."""
+    to_encode = {"jti": uuid.uuid4().hex, **data}
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = utc_now() + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = utc_now() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": utc_now()})
+    start = time.perf_counter()
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    jwt_duration.observe(time.perf_counter() - start, ("encode",))
     return encoded_jwt
 
 
+def create_user_access_token(user: User, expires_delta: Optional[timedelta] = None) -> str:
+    """Create an access token carrying the user's id and current token version."""
+    return create_access_token(
+        data={"sub": user.email, "uid": user.id, "ver": user.token_version},
+        expires_delta=expires_delta,
+    )
+
+
+def create_calendar_token(user: User) -> str:
+    """Create a long-lived token that can only read the user's calendar feed.
+
+    Like access tokens, it is revoked when the user's token version is bumped.
+    """
+    return create_access_token(
+        data={"sub": user.email, "uid": user.id, "ver": user.token_version, "scope": CALENDAR_SCOPE},
+        expires_delta=timedelta(days=CALENDAR_TOKEN_EXPIRE_DAYS),
+    )
+
+
+def create_refresh_token(user: User) -> str:
+    """Create a single-use token that /auth/refresh exchanges for new tokens."""
+    return create_access_token(
+        data={"sub": user.email, "uid": user.id, "ver": user.token_version, "scope": REFRESH_SCOPE},
+        expires_delta=timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+
+
 def verify_token(token: str) -> Optional[dict]:
-    """Verify and decode a JWT token."""
+    """Verify and decode a JWT token, reusing claims of already-verified tokens."""
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
+    start = time.perf_counter()
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except JWTError:
         return None
+    finally:
+        jwt_duration.observe(time.perf_counter() - start, ("decode",))
+    expires_in = payload.get("exp", 0) - time.time()
+    if expires_in > 0:
+        token_cache.set(token, payload, ttl=expires_in)
+    return payload
 
 
-def get_user_by_email(session: Session, email: str) -> Optional[User]:
+async def get_user_by_email(session: DBSession, email: str) -> Optional[User]:
     """Get a user by email."""
     statement = select(User).where(User.email == email)
-    return session.exec(statement).first()
+    return (await session.exec(statement)).first()
 
 
-def authenticate_user(session: Session, email: str, password: str) -> Union[User, bool]:
-    """Authenticate a user with email and password."""
-    user = get_user_by_email(session, email)
+async def authenticate_user(session: DBSession, email: str, password: str) -> Union[User, bool]:
+    """Authenticate a user with email and password, upgrading outdated hashes."""
+    user = await get_user_by_email(session, email)
     if not user:
         return False
-    if not verify_password(password, user.password_hash):
+    start = time.perf_counter()
+    try:
+        valid, new_hash = await password_hasher.verify_and_update(password, user.password_hash)
+    except PasswordHasherBusy:
+        raise _password_hasher_busy()
+    finally:
+        elapsed = time.perf_counter() - start
+        password_hash_duration.observe(elapsed, ("verify",))
+        record_auth_time(elapsed)
+    if not valid:
         return False
+    if new_hash is not None:
+        user.password_hash = new_hash
+        session.add(user)
+        await session.commit()
+        await session.refresh(user)
     return user
 
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    session: Session = Depends(get_session)
+    session: DBSession = Depends(get_session)
 ) -> User:
     """Get the current authenticated user from the JWT token."""
+    start = time.perf_counter()
+    try:
+        return await _load_current_user(token, session)
+    finally:
+        record_auth_time(time.perf_counter() - start)
+
+
+async def get_calendar_user(token: str, session: DBSession) -> User:
+    """Get the active user a calendar feed token was issued to."""
+    user = await _load_current_user(token, session, CALENDAR_SCOPE)
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+        )
+    return user
+
+
+async def use_refresh_token(token: str, session: DBSession) -> User:
+    """Get the active user of a refresh token, revoking the token as it is used.
+
+    Only one of several concurrent uses of the same token succeeds.
+    """
+    user = await _load_current_user(token, session, REFRESH_SCOPE)
+    if not user.is_active or not await revoke_token(session, verify_token(token), single_use=True):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+        )
+    return user
+
+
+async def _load_current_user(token: str, session: DBSession, scope: Optional[str] = None) -> User:
+    revocations.ensure_running()
     payload = verify_token(token)
-    if payload is None:
+    # A token only works where its scope is expected: feed tokens are not access
+    # tokens. The revocation check is a set lookup, never a query.
+    if payload is None or payload.get("scope") != scope or revocations.is_revoked(payload.get("jti")):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
@@ -89,8 +276,27 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = get_user_by_email(session, email)
-    if user is None:
+    user_id: Optional[int] = payload.get("uid")
+    token_version: int = payload.get("ver", 0)
+    cache_key = user_id if user_id is not None else email
+    user = user_cache.get(cache_key)
+    if user is None or user.token_version < token_version:
+        if user_id is not None:
+            user = await session.get(User, user_id)
+        else:
+            user = await get_user_by_email(session, email)
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Could not validate credentials",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        # Copy column values only; model_validate would lazy-load relationships.
+        user = User(**user.model_dump())
+        user_cache.set(cache_key, user)
+    
+    # Tokens issued before the user's token version was bumped are revoked
+    if user.token_version != token_version or user.email != email:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
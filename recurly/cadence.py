@@ -0,0 +1,155 @@
+import calendar
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+# Units a cadence can be normalised into
+HOUR = "hour"
+DAY = "day"
+WEEK = "week"
+MONTH = "month"
+YEAR = "year"
+WEEKDAY = "weekday"  # Monday through Friday
+
+_ALIASES = {
+    "hourly": (HOUR, 1),
+    "daily": (DAY, 1),
+    "nightly": (DAY, 1),
+    "weekly": (WEEK, 1),
+    "biweekly": (WEEK, 2),
+    "fortnightly": (WEEK, 2),
+    "monthly": (MONTH, 1),
+    "bimonthly": (MONTH, 2),
+    "quarterly": (MONTH, 3),
+    "yearly": (YEAR, 1),
+    "annually": (YEAR, 1),
+    "weekdays": (WEEKDAY, 1),
+}
+
+_EVERY = re.compile(r"^every\s+(?:(\d+|other)\s+)?(hour|day|week|month|year|weekday)s?$")
+
+_FIXED = {
+    HOUR: timedelta(hours=1),
+    DAY: timedelta(days=1),
+    WEEK: timedelta(weeks=1),
+}
+
+
+@dataclass(frozen=True)
+class Cadence:
+    """A normalised cadence: every ``interval`` ``unit``s."""
+    unit: str
+    interval: int
+
+
+def parse_cadence(text: Optional[str]) -> Optional[Cadence]:
+    """Parse free-text cadence such as "daily" or "every 2 weeks".
+
+    Returns None for cadences the server cannot schedule (e.g. "custom").
+    """
+    if not text:
+        return None
+    normalized = " ".join(text.lower().split())
+    if normalized in _ALIASES:
+        return Cadence(*_ALIASES[normalized])
+    match = _EVERY.match(normalized)
+    if match is None:
+        return None
+    count, unit = match.groups()
+    interval = 2 if count == "other" else int(count or 1)
+    if interval < 1 or (unit == WEEKDAY and interval != 1):
+        return None
+    return Cadence(unit, interval)
+
+
+def to_naive_utc(moment: datetime) -> datetime:
+    """Normalise to the naive UTC datetimes stored in the database."""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def utc_now() -> datetime:
+    """The current time as the naive UTC datetimes stored in the database."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _add_months(anchor: datetime, months: int) -> datetime:
+    month_index = anchor.month - 1 + months
+    year = anchor.year + month_index // 12
+    month = month_index % 12 + 1
+    day = min(anchor.day, calendar.monthrange(year, month)[1])
+    return anchor.replace(year=year, month=month, day=day)
+
+
+def next_occurrence(cadence: Cadence, anchor: datetime, after: datetime) -> datetime:
+    """Return the first occurrence of the schedule strictly after ``after``.
+
+    Occurrences are aligned to ``anchor`` (anchor + k * interval for k >= 1),
+    so completing a task late does not shift its schedule, and monthly
+    cadences keep the anchor's day of month, clamped to short months.
+    """
+    anchor = to_naive_utc(anchor)
+    after = max(to_naive_utc(after), anchor)
+
+    if cadence.unit in _FIXED:
+        step = _FIXED[cadence.unit] * cadence.interval
+        k = (after - anchor) // step + 1
+        return anchor + step * k
+
+    if cadence.unit in (MONTH, YEAR):
+        step = cadence.interval * (12 if cadence.unit == YEAR else 1)
+        months = (after.year - anchor.year) * 12 + after.month - anchor.month
+        k = max(1, months // step)
+        candidate = _add_months(anchor, k * step)
+        while candidate <= after:
+            k += 1
+            candidate = _add_months(anchor, k * step)
+        return candidate
+
+    if cadence.unit == WEEKDAY:
+        candidate = datetime.combine(after.date(), anchor.time())
+        if candidate <= after:
+            candidate += timedelta(days=1)
+        while candidate.weekday() >= 5:
+            candidate += timedelta(days=1)
+        return candidate
+
+    raise ValueError(f"Unknown cadence unit: {cadence.unit!r}")
+
+
+def next_due_at(cadence: Optional[Cadence], anchor: Optional[datetime],
+                last_completed: Optional[datetime],
+                satisfied_due: Optional[datetime] = None) -> Optional[datetime]:
+    """Compute when a task is next due, or None if it has no schedule.
+
+    ``satisfied_due`` is the due time the latest completion met: the one
+    that was outstanding when it was made, however early. The next due time
+    is the first occurrence after both, so an early completion still clears
+    its own period and a late one skips the periods it missed.
+    """
+    if cadence is None or anchor is None:
+        return None
+    after = to_naive_utc(last_completed or anchor)
+    if satisfied_due is not None:
+        after = max(after, to_naive_utc(satisfied_due))
+    return next_occurrence(cadence, anchor, after)
+
+
+def nearest_due(cadence: Optional[Cadence], anchor: Optional[datetime],
+                completed: Optional[datetime]) -> Optional[datetime]:
+    """Guess the due time a completion met when it was not recorded.
+
+    For rows completed before next_due_at existed. A completion within half
+    a period before an occurrence met it early and it is returned; otherwise
+    it met the previous occurrence on time or late, which ``next_due_at()``
+    handles without it, and None is returned.
+    """
+    if cadence is None or anchor is None or completed is None:
+        return None
+    upcoming = next_occurrence(cadence, anchor, completed)
+    following = next_occurrence(cadence, anchor, upcoming)
+    if (upcoming - to_naive_utc(completed)) * 2 < following - upcoming:
+        return upcoming
+    return None
@@ -0,0 +1,149 @@
+import os
+import zlib
+from typing import Any, Callable, Dict, List, Optional
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from .negotiation import negotiate
+
+try:  # Optional: brotli compresses JSON noticeably better than gzip
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+try:  # Optional: zstd, from the standard library on Python 3.14+ or the zstandard package
+    from compression import zstd
+except ImportError:  # pragma: no cover - depends on the environment
+    zstd = None
+    try:
+        import zstandard
+    except ImportError:
+        zstandard = None
+
+# Configuration
+# Responses smaller than this go out uncompressed; the headers would eat the saving
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+# Levels trade CPU for bytes; the defaults favour CPU, as responses are compressed per request
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+COMPRESSION_ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))
+# Bodies at least this large are compressed in the threadpool instead of on the event loop
+COMPRESSION_THREADPOOL_BYTES = int(os.getenv("COMPRESSION_THREADPOOL_BYTES", str(256 * 1024)))
+
+# Compressible media types besides text/*; text/event-stream is never compressed
+COMPRESSIBLE_TYPES = {"application/json", "application/msgpack", "application/x-ndjson"}
+
+
+class _BrotliCompressor:
+    """brotli.Compressor with the compress/flush interface of zlib's compressobj."""
+
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.finish()
+
+
+def _compressors() -> Dict[str, Callable[[], Any]]:
+    """Available content codings, in the server's order of preference."""
+    codecs: Dict[str, Callable[[], Any]] = {}
+    if zstd is not None:
+        codecs["zstd"] = lambda: zstd.ZstdCompressor(level=COMPRESSION_ZSTD_LEVEL)
+    elif zstandard is not None:
+        codecs["zstd"] = lambda: zstandard.ZstdCompressor(level=COMPRESSION_ZSTD_LEVEL).compressobj()
+    if brotli is not None:
+        codecs["br"] = lambda: _BrotliCompressor(COMPRESSION_BROTLI_QUALITY)
+    # wbits=31 writes a gzip header and trailer around the deflate stream
+    codecs["gzip"] = lambda: zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+    return codecs
+
+
+# Content coding -> factory of an object with compress(bytes) and flush()
+COMPRESSORS = _compressors()
+
+
+def compress(encoding: str, body: bytes) -> bytes:
+    """Compress a whole body with one of ``COMPRESSORS``."""
+    compressor = COMPRESSORS[encoding]()
+    return compressor.compress(body) + compressor.flush()
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type == "text/event-stream":
+        return False
+    return media_type.startswith("text/") or media_type.endswith("+json") or media_type in COMPRESSIBLE_TYPES
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses by Accept-Encoding (zstd, br, gzip).
+
+    Picks the coding the client weights highest, preferring zstd, then br,
+    then gzip on ties; only gzip is always available. Single-body responses
+    under ``COMPRESSION_MIN_BYTES`` are left alone, as are already encoded
+    bodies, event streams and media types that do not compress. Streamed
+    responses are compressed chunk by chunk.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"), list(COMPRESSORS))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[dict] = None
+        compressor: Any = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = MutableHeaders(raw=list(start["headers"]))
+                if (
+                    "content-encoding" in headers
+                    or not is_compressible(headers.get("content-type"))
+                    or (not more_body and len(body) < self.minimum_size)
+                ):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                headers.add_vary_header("Accept-Encoding")
+                headers["Content-Encoding"] = encoding
+                if not more_body:
+                    if len(body) >= COMPRESSION_THREADPOOL_BYTES:
+                        body = await run_in_threadpool(compress, encoding, body)
+                    else:
+                        body = compress(encoding, body)
+                    headers["Content-Length"] = str(len(body))
+                    await send({**start, "headers": headers.raw})
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                del headers["Content-Length"]
+                await send({**start, "headers": headers.raw})
+                compressor = COMPRESSORS[encoding]()
+
+            chunks: List[bytes] = [compressor.compress(body)]
+            if not more_body:
+                chunks.append(compressor.flush())
+            await send({"type": "http.response.body", "body": b"".join(chunks), "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,18 +1,250 @@
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, List, Optional, Sequence, Tuple, Union
+from fastapi import Request, Response
 from sqlmodel import SQLModel, create_engine, Session
-from sqlalchemy import create_engine as sa_create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import Row, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from starlette.concurrency import run_in_threadpool
 import os
+from .engine_config import engine_kwargs, install_sqlite_pragmas, load_engine_config
+from .metrics import instrument_engine
+from .profiling import install_query_profiler
 
-# Database URL - you can change this to PostgreSQL or MySQL
+# Database URL - you can change this to PostgreSQL or MySQL.
+# An async driver (e.g. sqlite+aiosqlite://, postgresql+asyncpg://) selects
+# the native async mode; a sync driver runs each query in the threadpool.
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./recurly.db")
+# Optional comma-separated read replicas (same driver mode as DATABASE_URL);
+# GET and HEAD requests read from them, everything else uses the primary.
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+# After a write, the client reads from the primary for this long, so it sees its own writes
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+# Cookie carrying the end of the sticky window (Unix time)
+STICKY_COOKIE = "recurly_primary_until"
+# Optional comma-separated task shards (same driver mode as DATABASE_URL).
+# Users stay on the primary; each user's tasks live on one shard, see sharding.py.
+TASK_SHARD_URLS = [url.strip() for url in os.getenv("TASK_SHARD_URLS", "").split(",") if url.strip()]
+
+
+def is_async_url(url: str) -> bool:
+    """Return True if the URL names an asyncio driver."""
+    return bool(getattr(make_url(url).get_dialect(), "is_async", False))
+
+
+# Engine and pool settings for RECURLY_ENV, see engine_config.py
+ENGINE_CONFIG = load_engine_config()
+
+
+def _create_engines(url: str) -> Tuple[Optional[AsyncEngine], Any]:
+    """Create the (async engine or None, sync engine) pair for ``url``, instrumented."""
+    async_engine: Optional[AsyncEngine] = None
+    if is_async_url(url):
+        async_engine = create_async_engine(url, **engine_kwargs(url, ENGINE_CONFIG))
+        engine = async_engine.sync_engine
+    else:
+        engine = create_engine(url, **engine_kwargs(url, ENGINE_CONFIG))
+    install_sqlite_pragmas(engine, ENGINE_CONFIG)
+    instrument_engine(engine)
+    install_query_profiler(engine)
+    return async_engine, engine
+
 
 # Create engine
-engine = create_engine(DATABASE_URL, echo=True)
+async_engine, engine = _create_engines(DATABASE_URL)
+
+
+def _create_secondary_engines(urls: List[str], role: str) -> List[Tuple[Optional[AsyncEngine], Any]]:
+    engines = []
+    for url in urls:
+        if is_async_url(url) != (async_engine is not None):
+            raise ValueError(f"{role} {make_url(url).render_as_string()} must use the same sync/async driver mode as DATABASE_URL")
+        engines.append(_create_engines(url))
+    return engines
+
+
+# Replica engines, used in turn
+replica_engines = _create_secondary_engines(DATABASE_REPLICA_URLS, "Replica")
+_next_replica = itertools.cycle(replica_engines)
+
+# Task shard engines, indexed by shard number
+shard_engines = _create_secondary_engines(TASK_SHARD_URLS, "Shard")
+
+# Results are buffered inside the worker thread so that iterating them
+# afterwards never touches the cursor from the event loop.
+_BUFFERED = {"prebuffer_rows": True}
+
+
+class ThreadedSession:
+    """Awaitable facade over a synchronous ``Session``.
+
+    Mirrors the subset of ``AsyncSession`` used by the routes so they can be
+    written once; every blocking call runs in the threadpool.
+    """
+
+    def __init__(self, session: Session):
+        self.sync_session = session
+
+    @property
+    def info(self) -> dict:
+        return self.sync_session.info
+
+    def add(self, instance: Any) -> None:
+        self.sync_session.add(instance)
+
+    def add_all(self, instances: Any) -> None:
+        self.sync_session.add_all(instances)
+
+    async def exec(self, statement: Any, **kwargs: Any) -> Any:
+        kwargs["execution_options"] = {**kwargs.get("execution_options", {}), **_BUFFERED}
+        return await run_in_threadpool(self.sync_session.exec, statement, **kwargs)
+
+    async def execute(self, statement: Any, *args: Any, **kwargs: Any) -> Any:
+        kwargs["execution_options"] = {**kwargs.get("execution_options", {}), **_BUFFERED}
+        return await run_in_threadpool(self.sync_session.execute, statement, *args, **kwargs)
+
+    async def scalar(self, statement: Any, *args: Any, **kwargs: Any) -> Any:
+        return await run_in_threadpool(self.sync_session.scalar, statement, *args, **kwargs)
+
+    async def get(self, entity: Any, ident: Any, **kwargs: Any) -> Any:
+        return await run_in_threadpool(self.sync_session.get, entity, ident, **kwargs)
+
+    async def delete(self, instance: Any) -> None:
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def flush(self) -> None:
+        await run_in_threadpool(self.sync_session.flush)
+
+    async def commit(self) -> None:
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self) -> None:
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def refresh(self, instance: Any, **kwargs: Any) -> None:
+        await run_in_threadpool(self.sync_session.refresh, instance, **kwargs)
+
+    async def run_sync(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Call ``fn(sync_session, *args)`` in the threadpool, like ``AsyncSession.run_sync``."""
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+    async def close(self) -> None:
+        await run_in_threadpool(self.sync_session.close)
+
+
+DBSession = Union[AsyncSession, ThreadedSession]
+
+
+def _create_tables(connection: Any, shard: bool = False) -> None:
+    SQLModel.metadata.create_all(connection)
+    if shard and connection.dialect.name == "postgresql":
+        # Assignees live in the primary's users table, not on the shard
+        connection.exec_driver_sql("ALTER TABLE tasks DROP CONSTRAINT IF EXISTS tasks_assigned_to_fkey")
+
+
+def _create_tables_with(target: Any, shard: bool = False) -> None:
+    with target.begin() as connection:
+        _create_tables(connection, shard)
+
+
+async def create_db_and_tables():
+    """Create database tables, on the primary and on every task shard."""
+    for index, (async_target, target) in enumerate([(async_engine, engine), *shard_engines]):
+        if async_target is not None:
+            async with async_target.begin() as conn:
+                await conn.run_sync(_create_tables, index > 0)
+        else:
+            await run_in_threadpool(_create_tables_with, target, index > 0)
+
+
+async def dispose_engines():
+    """Close pooled connections; async drivers keep worker threads alive until then."""
+    for async_target, target in [(async_engine, engine), *replica_engines, *shard_engines]:
+        if async_target is not None:
+            await async_target.dispose()
+        else:
+            await run_in_threadpool(target.dispose)
+
+
+def _engines_for(replica: bool = False, shard: Optional[int] = None) -> Tuple[Optional[AsyncEngine], Any]:
+    if shard is not None:
+        return shard_engines[shard]
+    return next(_next_replica) if replica and replica_engines else (async_engine, engine)
+
+
+@asynccontextmanager
+async def open_session(replica: bool = False, shard: Optional[int] = None) -> AsyncIterator[DBSession]:
+    """Open a session for the configured database mode.
+
+    With ``replica=True`` the session reads from the next replica, if any;
+    replicas may lag behind the primary and must not be written to. With
+    ``shard`` it opens that task shard instead (``session.info["shard"]``).
+    """
+    async_target, target = _engines_for(replica, shard)
+    if async_target is not None:
+        async with AsyncSession(async_target, expire_on_commit=False, info={"shard": shard}) as session:
+            yield session
+    else:
+        session = ThreadedSession(Session(target, expire_on_commit=False, info={"shard": shard}))
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+async def stream_partitions(
+    statement: Any, batch_size: int = 1000, shard: Optional[int] = None
+) -> AsyncIterator[Sequence[Row]]:
+    """Yield rows of a Core statement in partitions from a server-side cursor.
+
+    Uses a dedicated connection rather than the request session, so it can
+    outlive the handler while a streaming response is being sent.
+    """
+    async_engine, engine = _engines_for(shard=shard)
+    if async_engine is not None:
+        async with async_engine.connect() as conn:
+            result = await conn.stream(statement.execution_options(yield_per=batch_size))
+            async for partition in result.partitions():
+                yield partition
+        return
+
+    conn = await run_in_threadpool(engine.connect)
+    try:
+        result = await run_in_threadpool(
+            conn.execution_options(yield_per=batch_size).execute, statement
+        )
+        partitions = result.partitions()
+        while (partition := await run_in_threadpool(next, partitions, None)) is not None:
+            yield partition
+    finally:
+        await run_in_threadpool(conn.close)
+
+
+def reads_from_replica(request: Request, response: Response) -> bool:
+    """Route a request to a replica or the primary, by method and sticky window.
+
+    A request that may write sets the sticky cookie, so the same client's
+    reads go to the primary until replicas have caught up with the write.
+    """
+    if not replica_engines:
+        return False
+    now = time.time()
+    if request.method not in ("GET", "HEAD"):
+        response.set_cookie(
+            STICKY_COOKIE, f"{now + REPLICA_STICKY_SECONDS:.3f}",
+            max_age=int(REPLICA_STICKY_SECONDS) + 1, httponly=True, samesite="lax",
+        )
+        return False
+    try:
+        primary_until = float(request.cookies.get(STICKY_COOKIE, 0))
+    except ValueError:
+        primary_until = 0
+    return primary_until <= now
 
-def create_db_and_tables():
-    """Create database tables."""
-    SQLModel.metadata.create_all(engine)
 
-def get_session():
-    """Get database session."""
-    with Session(engine) as session:
+async def get_session(request: Request, response: Response):
+    """Get database session: a replica for reads when configured, else the primary."""
+    async with open_session(replica=reads_from_replica(request, response)) as session:
         yield session
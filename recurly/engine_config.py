@@ -0,0 +1,125 @@
+import os
+from dataclasses import dataclass, fields, replace
+from typing import Any, Dict, Mapping, Optional
+from sqlalchemy import event, make_url
+from sqlalchemy.engine import Engine
+
+# Deployment environment selecting the engine preset
+RECURLY_ENV = os.getenv("RECURLY_ENV", "development")
+
+
+@dataclass(frozen=True)
+class EngineConfig:
+    """Engine, connection pool and SQLite connection settings."""
+    echo: bool = False
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30.0
+    pool_pre_ping: bool = False
+    pool_recycle: int = -1
+    # Applied with PRAGMA on every new SQLite connection; empty/negative skips
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+
+
+PRESETS: Dict[str, EngineConfig] = {
+    # SQL echo is opt-in everywhere, see RECURLY_SQL_ECHO
+    "development": EngineConfig(),
+    "test": EngineConfig(),
+    "production": EngineConfig(
+        pool_size=10,
+        max_overflow=20,
+        pool_pre_ping=True,
+        pool_recycle=1800,
+    ),
+}
+
+# Environment variables overriding individual preset fields
+ENV_OVERRIDES = {
+    "RECURLY_SQL_ECHO": "echo",
+    "DB_POOL_SIZE": "pool_size",
+    "DB_MAX_OVERFLOW": "max_overflow",
+    "DB_POOL_TIMEOUT": "pool_timeout",
+    "DB_POOL_PRE_PING": "pool_pre_ping",
+    "DB_POOL_RECYCLE": "pool_recycle",
+    "SQLITE_JOURNAL_MODE": "sqlite_journal_mode",
+    "SQLITE_SYNCHRONOUS": "sqlite_synchronous",
+    "SQLITE_BUSY_TIMEOUT_MS": "sqlite_busy_timeout_ms",
+    "SQLITE_MMAP_SIZE": "sqlite_mmap_size",
+}
+
+
+def _coerce(value: str, kind: type) -> Any:
+    if kind is bool:
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return kind(value)
+
+
+def load_engine_config(env: Optional[str] = None, environ: Mapping[str, str] = os.environ) -> EngineConfig:
+    """Return the preset for ``env`` (default: RECURLY_ENV) with env overrides applied."""
+    env = env or RECURLY_ENV
+    if env not in PRESETS:
+        raise ValueError(f"Unknown RECURLY_ENV {env!r}; expected one of {sorted(PRESETS)}")
+    types = {field.name: type(getattr(PRESETS[env], field.name)) for field in fields(EngineConfig)}
+    overrides = {
+        name: _coerce(environ[variable], types[name])
+        for variable, name in ENV_OVERRIDES.items()
+        if variable in environ
+    }
+    return replace(PRESETS[env], **overrides)
+
+
+def _is_sqlite_memory(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:")
+
+
+def engine_kwargs(url: str, config: EngineConfig) -> Dict[str, Any]:
+    """Keyword arguments for create_engine/create_async_engine."""
+    kwargs: Dict[str, Any] = {"echo": config.echo, "pool_pre_ping": config.pool_pre_ping}
+    # In-memory SQLite uses a single shared connection, not a sized pool
+    if not _is_sqlite_memory(url):
+        kwargs.update(
+            pool_size=config.pool_size,
+            max_overflow=config.max_overflow,
+            pool_timeout=config.pool_timeout,
+            pool_recycle=config.pool_recycle,
+        )
+    return kwargs
+
+
+def sqlite_pragmas(config: EngineConfig) -> Dict[str, Any]:
+    """The PRAGMA statements to run on each new SQLite connection."""
+    pragmas: Dict[str, Any] = {}
+    if config.sqlite_journal_mode:
+        pragmas["journal_mode"] = config.sqlite_journal_mode
+    if config.sqlite_synchronous:
+        pragmas["synchronous"] = config.sqlite_synchronous
+    if config.sqlite_busy_timeout_ms >= 0:
+        pragmas["busy_timeout"] = config.sqlite_busy_timeout_ms
+    if config.sqlite_mmap_size >= 0:
+        pragmas["mmap_size"] = config.sqlite_mmap_size
+    return pragmas
+
+
+def install_sqlite_pragmas(engine: Engine, config: EngineConfig) -> None:
+    """Apply the configured pragmas whenever the pool opens a SQLite connection.
+
+    For async engines pass ``async_engine.sync_engine``.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    pragmas = sqlite_pragmas(config)
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
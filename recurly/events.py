@@ -0,0 +1,193 @@
+import asyncio
+import json
+import os
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session as ORMSession
+from .models.task import Task, TaskTombstone, committed_assignee
+from .schemas import TaskRead as TaskReadSchema
+
+# Events buffered per connection before it is considered too slow and dropped
+TASK_STREAM_BUFFER_SIZE = int(os.getenv("TASK_STREAM_BUFFER_SIZE", "100"))
+# Idle seconds between keep-alive comments on an event stream
+TASK_STREAM_HEARTBEAT_SECONDS = float(os.getenv("TASK_STREAM_HEARTBEAT_SECONDS", "15"))
+
+# Event types pushed to subscribers
+CREATED = "created"
+UPDATED = "updated"
+COMPLETED = "completed"
+DELETED = "deleted"
+
+# Queued in place of the backlog when a subscriber falls behind
+_OVERFLOW = object()
+
+
+@dataclass(frozen=True)
+class TaskEvent:
+    """A committed task change, addressed to the user whose list it affects."""
+    type: str
+    user_id: int
+    task_id: int
+    change_seq: Optional[int]
+    task: Optional[Dict[str, Any]] = None
+
+    @cached_property
+    def sse(self) -> str:
+        """The wire format, encoded once however many subscribers receive it."""
+        data: Dict[str, Any] = {"task_id": self.task_id, "change_seq": self.change_seq}
+        if self.task is not None:
+            data["task"] = self.task
+        return _format_sse(self.type, data, self.change_seq)
+
+
+@dataclass(eq=False)
+class Subscription:
+    """One connection's bounded event buffer."""
+    user_id: int
+    queue: "asyncio.Queue[Any]" = field(default_factory=lambda: asyncio.Queue(TASK_STREAM_BUFFER_SIZE))
+    dropped: bool = False
+
+
+class TaskEventHub:
+    """In-process fan-out of committed task changes to per-user subscribers.
+
+    ``publish`` may be called from any thread (commits run in the threadpool
+    for sync drivers); delivery always happens on the event loop, so the
+    subscriber registry is only touched from one thread. Events are only
+    seen by subscribers of the same worker process.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.delivered = 0
+        self.dropped = 0
+
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subscribers)
+
+    def subscribe(self, user_id: int) -> Subscription:
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(user_id)
+        self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.user_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.user_id]
+
+    def publish(self, events: List[TaskEvent]) -> None:
+        """Hand events to the loop; safe to call from any thread."""
+        loop = self._loop
+        if loop is None or loop.is_closed() or not events:
+            return
+        loop.call_soon_threadsafe(self._deliver, events)
+
+    def _deliver(self, events: List[TaskEvent]) -> None:
+        for task_event in events:
+            for subscription in tuple(self._subscribers.get(task_event.user_id, ())):
+                try:
+                    subscription.queue.put_nowait(task_event)
+                    self.delivered += 1
+                except asyncio.QueueFull:
+                    self._drop(subscription)
+
+    def _drop(self, subscription: Subscription) -> None:
+        """Disconnect a subscriber that cannot keep up instead of buffering without bound."""
+        self.unsubscribe(subscription)
+        subscription.dropped = True
+        self.dropped += 1
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(_OVERFLOW)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "subscribers": sum(len(subscribers) for subscribers in self._subscribers.values()),
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+
+task_events = TaskEventHub()
+
+
+def _format_sse(event_type: str, data: Any, event_id: Optional[int] = None) -> str:
+    lines = [f"event: {event_type}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def sse_events(
+    subscription: Subscription,
+    hub: TaskEventHub = task_events,
+    heartbeat: float = TASK_STREAM_HEARTBEAT_SECONDS,
+) -> AsyncIterator[str]:
+    """Render a subscription as a Server-Sent Events stream.
+
+    Each event's ``id`` is its change sequence, so a reconnecting client can
+    catch up with ``GET /api/tasks/changes?since=<Last-Event-ID>``.
+    """
+    try:
+        while True:
+            try:
+                item = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if item is _OVERFLOW:
+                yield _format_sse("overflow", {"detail": "Too many pending events; resync and reconnect"})
+                return
+            yield item.sse
+    finally:
+        hub.unsubscribe(subscription)
+
+
+@event.listens_for(ORMSession, "after_flush")
+def _collect_task_events(session: ORMSession, flush_context) -> None:
+    # new/dirty/deleted and attribute history still show the pre-flush state here
+    if not task_events.has_subscribers:
+        return
+    events = session.info.setdefault("task_events", [])
+    tombstones = {
+        (obj.task_id, obj.assigned_to): obj.change_seq
+        for obj in session.new if isinstance(obj, TaskTombstone)
+    }
+    for task in session.new:
+        if isinstance(task, Task):
+            events.append(_task_event(CREATED, task))
+    for task in session.dirty:
+        if not isinstance(task, Task) or not session.is_modified(task):
+            continue
+        previous = committed_assignee(task)
+        if previous != task.assigned_to:
+            events.append(TaskEvent(DELETED, previous, task.id, tombstones.get((task.id, previous))))
+        completed = inspect(task).attrs.last_completed.history.has_changes()
+        events.append(_task_event(COMPLETED if completed else UPDATED, task))
+    for task in session.deleted:
+        if isinstance(task, Task):
+            previous = committed_assignee(task)
+            events.append(TaskEvent(DELETED, previous, task.id, tombstones.get((task.id, previous))))
+
+
+def _task_event(event_type: str, task: Task) -> TaskEvent:
+    snapshot = TaskReadSchema.model_validate(task, from_attributes=True).model_dump(mode="json")
+    return TaskEvent(event_type, task.assigned_to, task.id, task.change_seq, snapshot)
+
+
+@event.listens_for(ORMSession, "after_commit")
+def _publish_task_events(session: ORMSession) -> None:
+    task_events.publish(session.info.pop("task_events", []))
+
+
+@event.listens_for(ORMSession, "after_rollback")
+def _discard_task_events(session: ORMSession) -> None:
+    session.info.pop("task_events", None)
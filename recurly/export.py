@@ -0,0 +1,49 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, Sequence
+from sqlalchemy import Row
+from .serialization import TASK_READ_COLUMNS
+
+# Columns written by the task export, in output order (the TaskRead fields)
+EXPORT_COLUMNS = TASK_READ_COLUMNS
+EXPORT_FIELDS = tuple(column.key for column in EXPORT_COLUMNS)
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _csv_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+async def ndjson_chunks(partitions: AsyncIterator[Sequence[Row]]) -> AsyncIterator[bytes]:
+    """Encode row partitions as newline-delimited JSON, one chunk per partition."""
+    async for rows in partitions:
+        yield "".join(
+            json.dumps(dict(zip(EXPORT_FIELDS, row)), default=_json_default) + "\n"
+            for row in rows
+        ).encode()
+
+
+async def csv_chunks(partitions: AsyncIterator[Sequence[Row]]) -> AsyncIterator[bytes]:
+    """Encode row partitions as CSV with a header line, one chunk per partition."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    async for rows in partitions:
+        writer.writerows([_csv_value(value) for value in row] for row in rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
@@ -0,0 +1,94 @@
+import os
+from datetime import datetime, time, timedelta
+from itertools import islice
+from typing import Hashable, Iterable, List, NamedTuple, Tuple
+from .cache import TTLCache
+from .cadence import to_naive_utc
+from .occurrences import Occurrence
+
+# Configuration
+# A feed covers whole UTC days, from CALENDAR_FEED_PAST_DAYS ago (so recently
+# overdue tasks stay visible) to CALENDAR_FEED_DAYS ahead
+CALENDAR_FEED_PAST_DAYS = int(os.getenv("CALENDAR_FEED_PAST_DAYS", "7"))
+CALENDAR_FEED_DAYS = int(os.getenv("CALENDAR_FEED_DAYS", "90"))
+# Cap on events per feed, so an hourly task cannot make it huge
+CALENDAR_FEED_MAX_EVENTS = int(os.getenv("CALENDAR_FEED_MAX_EVENTS", "5000"))
+CALENDAR_FEED_CACHE_MAXSIZE = int(os.getenv("CALENDAR_FEED_CACHE_MAXSIZE", "10000"))
+
+CALENDAR_MEDIA_TYPE = "text/calendar"
+
+# Longest content line in octets before it is folded (RFC 5545, section 3.1)
+_LINE_OCTETS = 75
+
+
+class CachedFeed(NamedTuple):
+    """A rendered feed and the validator of the task list it was rendered from."""
+    validator: Hashable
+    body: bytes
+
+
+# Rendered feeds by user id. An entry is replaced when its validator no
+# longer matches, and a new day starts a new window, so entries older than
+# a day are never served.
+feed_cache: TTLCache[CachedFeed] = TTLCache(CALENDAR_FEED_CACHE_MAXSIZE, 24 * 60 * 60)
+
+
+def feed_window(now: datetime) -> Tuple[datetime, datetime]:
+    """The ``[start, end)`` range a feed rendered at ``now`` covers."""
+    today = datetime.combine(to_naive_utc(now).date(), time())
+    return today - timedelta(days=CALENDAR_FEED_PAST_DAYS), today + timedelta(days=CALENDAR_FEED_DAYS)
+
+
+def _escape(text: str) -> str:
+    text = text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+    return text.replace("\r\n", "\\n").replace("\r", "\\n").replace("\n", "\\n")
+
+
+def _fold(line: str) -> str:
+    """Split a content line into 75-octet pieces without breaking a UTF-8 character."""
+    if len(line.encode()) <= _LINE_OCTETS:
+        return line
+    pieces: List[str] = []
+    piece, size = [], 0
+    for char in line:
+        width = len(char.encode())
+        # Continuation lines start with a space, which counts towards the limit
+        if size + width > _LINE_OCTETS - (1 if pieces else 0):
+            pieces.append("".join(piece))
+            piece, size = [], 0
+        piece.append(char)
+        size += width
+    pieces.append("".join(piece))
+    return "\r\n ".join(pieces)
+
+
+def _utc(moment: datetime) -> str:
+    return to_naive_utc(moment).strftime("%Y%m%dT%H%M%SZ")
+
+
+def render_calendar(occurrences: Iterable[Occurrence], name: str = "Recurly tasks") -> bytes:
+    """Render occurrences as an iCalendar (RFC 5545) feed of zero-length events."""
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//Recurly//Recurly API//EN",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{_escape(name)}",
+    ]
+    for occurrence in islice(occurrences, CALENDAR_FEED_MAX_EVENTS):
+        task = occurrence.task
+        due = _utc(occurrence.due_at)
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:task-{occurrence.task_id}-{due}@recurly",
+            # The task's last change, so an unchanged event renders identically
+            f"DTSTAMP:{_utc(task.updated_at)}",
+            f"DTSTART:{due}",
+            f"SUMMARY:{_escape(task.title)}",
+        ]
+        if task.description:
+            lines.append(f"DESCRIPTION:{_escape(task.description)}")
+        lines.append("END:VEVENT")
+    lines.append("END:VCALENDAR")
+    return ("\r\n".join(_fold(line) for line in lines) + "\r\n").encode()
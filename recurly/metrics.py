@@ -0,0 +1,279 @@
+import bisect
+from abc import ABC, abstractmethod
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Latency buckets in seconds, from sub-millisecond queries to slow requests
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = Tuple[str, ...]
+
+
+class _Metric(ABC):
+    """Base for metrics pre-aggregated in one shard per thread.
+
+    Recording only touches the calling thread's shard, so the hot path takes
+    no lock; the lock guards the list of shards, which changes once per
+    thread. Shards are summed when the metrics are scraped.
+    """
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def _snapshots(self) -> List[dict]:
+        with self._lock:
+            shards = list(self._shards)
+        # dict.copy() runs without releasing the GIL, so it never sees a half-applied update
+        return [shard.copy() for shard in shards]
+
+    def _format_labels(self, labels: Labels, extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labels)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    @abstractmethod
+    def samples(self) -> Iterator[str]:
+        """The metric's sample lines, without the HELP and TYPE header."""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+    kind = "counter"
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def values(self) -> Dict[Labels, float]:
+        totals: Dict[Labels, float] = {}
+        for shard in self._snapshots():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+    def samples(self) -> Iterator[str]:
+        for labels, value in sorted(self.values().items()):
+            yield f"{self.name}{self._format_labels(labels)} {value:g}"
+
+
+class Gauge(Counter):
+    """Value that goes up and down, e.g. requests in flight."""
+    kind = "gauge"
+
+    def dec(self, labels: Labels = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+
+class Histogram(_Metric):
+    """Observations counted into fixed buckets, plus their sum and count."""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        shard = self._shard()
+        # [count per bucket..., count above the last bucket, sum]
+        entry = shard.get(labels)
+        if entry is None:
+            entry = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        entry[bisect.bisect_left(self.buckets, value)] += 1
+        entry[-1] += value
+
+    def values(self) -> Dict[Labels, List[float]]:
+        totals: Dict[Labels, List[float]] = {}
+        for shard in self._snapshots():
+            for labels, entry in shard.items():
+                entry = list(entry)
+                total = totals.get(labels)
+                totals[labels] = entry if total is None else [a + b for a, b in zip(total, entry)]
+        return totals
+
+    def samples(self) -> Iterator[str]:
+        for labels, entry in sorted(self.values().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), entry):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound:g}"'
+                yield f"{self.name}_bucket{self._format_labels(labels, le)} {cumulative}"
+            yield f"{self.name}_sum{self._format_labels(labels)} {entry[-1]:g}"
+            yield f"{self.name}_count{self._format_labels(labels)} {cumulative}"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+REGISTRY: List[_Metric] = []
+
+
+def render() -> str:
+    """All registered metrics in the Prometheus text exposition format."""
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+# HTTP
+http_requests = Counter("http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "Time to handle an HTTP request.", ("method", "route")
+)
+http_requests_in_flight = Gauge("http_requests_in_flight", "HTTP requests being handled.")
+
+# Database
+db_queries = Counter("db_queries_total", "SQL statements executed.")
+db_query_duration = Histogram("db_query_duration_seconds", "Time to execute one SQL statement.")
+db_queries_per_request = Histogram(
+    "db_queries_per_request", "SQL statements executed per HTTP request.", ("method", "route"), COUNT_BUCKETS
+)
+db_time_per_request = Histogram(
+    "db_time_per_request_seconds", "Time spent executing SQL per HTTP request.", ("method", "route")
+)
+db_pool_connections_in_use = Gauge("db_pool_connections_in_use", "Pooled connections checked out.")
+db_pool_connection_hold = Histogram(
+    "db_pool_connection_hold_seconds", "Time a pooled connection stays checked out."
+)
+db_pool_checkout_wait = Histogram(
+    "db_pool_checkout_wait_seconds", "Time to check a connection out of the pool, including queueing."
+)
+
+# Authentication
+password_hash_duration = Histogram(
+    "password_hash_duration_seconds", "Time to hash or verify a password, including queueing.", ("operation",)
+)
+jwt_duration = Histogram("jwt_duration_seconds", "Time to sign or verify an access token.", ("operation",))
+
+
+class RequestStats:
+    """Database work attributed to the current request."""
+    __slots__ = ("queries", "db_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+
+# Shared with threadpool workers, which run with a copy of the request context
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request counts, latency and in-flight requests.
+
+    Requests are labelled by route template (``/api/tasks/{task_id}``), not by
+    raw path, to keep the number of series bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        http_requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_flight.dec()
+            current_request_stats.reset(token)
+            route = scope.get("route")
+            route = getattr(route, "path", UNMATCHED_ROUTE)
+            method = scope["method"]
+            http_requests.inc((method, route, str(status_code)))
+            http_request_duration.observe(elapsed, (method, route))
+            db_queries_per_request.observe(stats.queries, (method, route))
+            db_time_per_request.observe(stats.db_time, (method, route))
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Count and time every statement and pool checkout on ``engine``.
+
+    For async engines pass ``async_engine.sync_engine``.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_query(conn, cursor, statement, parameters, context, executemany) -> None:
+        context._metrics_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _end_query(conn, cursor, statement, parameters, context, executemany) -> None:
+        elapsed = time.perf_counter() - context._metrics_start
+        db_queries.inc()
+        db_query_duration.observe(elapsed)
+        stats = current_request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += elapsed
+
+    # The pool has no event for the start of a checkout, so the engine's
+    # checkout call is timed instead. It is kept on the engine rather than the
+    # pool because dispose() replaces the pool. Async engines check out through
+    # their sync engine too, with the wait awaited inside this call.
+    raw_connection = engine.raw_connection
+
+    def _timed_raw_connection():
+        start = time.perf_counter()
+        try:
+            return raw_connection()
+        finally:
+            db_pool_checkout_wait.observe(time.perf_counter() - start)
+
+    engine.raw_connection = _timed_raw_connection
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+        connection_record.info["metrics_checked_out_at"] = time.perf_counter()
+        db_pool_connections_in_use.inc()
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record) -> None:
+        checked_out_at = connection_record.info.pop("metrics_checked_out_at", None)
+        if checked_out_at is not None:
+            db_pool_connections_in_use.dec()
+            db_pool_connection_hold.observe(time.perf_counter() - checked_out_at)
@@ -1,7 +1,13 @@
 from .user import User, UserBase, UserCreate, UserRead, UserUpdate
-from .task import Task, TaskBase, TaskCreate, TaskRead, TaskUpdate
+from .reminder import TaskReminder
+from .task import ChangeSequence, Task, TaskBase, TaskCreate, TaskRead, TaskTombstone, TaskUpdate
+from .completion import TaskCompletion, TaskStats, UserTaskStats
+from .shard import UserShard
+from .revoked_token import RevokedToken
 
 __all__ = [
     "User", "UserBase", "UserCreate", "UserRead", "UserUpdate",
-    "Task", "TaskBase", "TaskCreate", "TaskRead", "TaskUpdate"
+    "Task", "TaskBase", "TaskCreate", "TaskRead", "TaskUpdate", "TaskTombstone", "ChangeSequence",
+    "TaskReminder", "TaskCompletion", "TaskStats", "UserTaskStats", "UserShard",
+    "RevokedToken"
 ]
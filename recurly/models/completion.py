@@ -0,0 +1,100 @@
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Index, delete, event, inspect, select
+from sqlalchemy.orm import Session as ORMSession
+from ..cadence import to_naive_utc
+from .task import Task, committed_next_due_at
+
+
+class TaskCompletion(SQLModel, table=True):
+    """Append-only history: one row per completion of a task."""
+    __tablename__ = "task_completions"
+    __table_args__ = (
+        Index("ix_task_completions_task_id_completed_at", "task_id", "completed_at"),
+        Index("ix_task_completions_user_id_completed_at", "user_id", "completed_at"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    task_id: int  # No foreign key: history outlives the task
+    user_id: int  # The assignee who completed it
+    completed_at: datetime
+    due_at: Optional[datetime] = None  # The due time this completion met; None if unscheduled
+    on_time: bool
+
+
+class CompletionStats(SQLModel):
+    """Rollup columns updated on every completion."""
+    total_completions: int = Field(default=0)
+    on_time_completions: int = Field(default=0)
+    current_streak: int = Field(default=0)  # On-time completions since the last late one
+    longest_streak: int = Field(default=0)
+    last_completed_at: Optional[datetime] = None
+
+    def record(self, completed_at: datetime, on_time: bool) -> None:
+        self.total_completions += 1
+        if on_time:
+            self.on_time_completions += 1
+            self.current_streak += 1
+            self.longest_streak = max(self.longest_streak, self.current_streak)
+        else:
+            self.current_streak = 0
+        if self.last_completed_at is None or completed_at > self.last_completed_at:
+            self.last_completed_at = completed_at
+
+
+class TaskStats(CompletionStats, table=True):
+    """Per-task rollup of the completion history."""
+    __tablename__ = "task_stats"
+
+    task_id: int = Field(primary_key=True)
+
+
+class UserTaskStats(CompletionStats, table=True):
+    """Per-user rollup over every task the user completed."""
+    __tablename__ = "user_task_stats"
+
+    user_id: int = Field(primary_key=True)
+
+
+def _locked_rows(session: ORMSession, model, key, ids: Iterable[int]) -> Dict[int, CompletionStats]:
+    """Load rollup rows for update, creating the missing ones."""
+    ids = set(ids)
+    rows = {
+        getattr(row, key.key): row
+        for row in session.execute(select(model).where(key.in_(ids)).with_for_update()).scalars()
+    }
+    for missing in ids.difference(rows):
+        rows[missing] = model(**{key.key: missing})
+        session.add(rows[missing])
+    return rows
+
+
+@event.listens_for(ORMSession, "before_flush")
+def _record_task_completions(session: ORMSession, flush_context, instances) -> None:
+    """Append a TaskCompletion and update the rollups whenever last_completed is set."""
+    completed = [
+        task for task in session.dirty
+        if isinstance(task, Task) and task.last_completed is not None
+        and inspect(task).attrs.last_completed.history.has_changes()
+    ]
+    removed = [task.id for task in session.deleted if isinstance(task, Task)]
+    if removed:
+        session.execute(delete(TaskStats).where(TaskStats.task_id.in_(removed)))
+    if not completed:
+        return
+
+    task_stats = _locked_rows(session, TaskStats, TaskStats.task_id, (task.id for task in completed))
+    user_stats = _locked_rows(session, UserTaskStats, UserTaskStats.user_id, (task.assigned_to for task in completed))
+    for task in sorted(completed, key=lambda task: to_naive_utc(task.last_completed)):
+        completed_at = to_naive_utc(task.last_completed)
+        # The stored due time is the one outstanding when the task was completed;
+        # rescheduling moves past it, however early the completion
+        due_at = committed_next_due_at(task)
+        on_time = due_at is None or completed_at <= due_at
+        session.add(TaskCompletion(
+            task_id=task.id, user_id=task.assigned_to, completed_at=completed_at,
+            due_at=due_at, on_time=on_time,
+        ))
+        task_stats[task.id].record(completed_at, on_time)
+        user_stats[task.assigned_to].record(completed_at, on_time)
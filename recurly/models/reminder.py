@@ -0,0 +1,22 @@
+from datetime import datetime
+from typing import Optional
+from sqlmodel import SQLModel, Field
+from sqlalchemy import UniqueConstraint
+from ..cadence import utc_now
+
+
+class TaskReminder(SQLModel, table=True):
+    """Outbox row written when a task becomes due, for another process to deliver."""
+    __tablename__ = "task_reminders"
+    __table_args__ = (
+        # The same occurrence is only recorded once, even if the scheduler replays it
+        UniqueConstraint("task_id", "due_at", name="uq_task_reminders_task_id_due_at"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    task_id: int
+    assigned_to: int
+    title: str = Field(max_length=255)
+    due_at: datetime
+    created_at: datetime = Field(default_factory=utc_now)
+    delivered_at: Optional[datetime] = Field(default=None, index=True)
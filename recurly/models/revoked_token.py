@@ -0,0 +1,23 @@
+from datetime import datetime
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Column, DateTime, func
+
+
+class RevokedToken(SQLModel, table=True):
+    """A token revoked before it expired, by its ``jti`` claim (see revocation.py).
+
+    Rows are only needed until ``expires_at``; after that the token is
+    rejected anyway.
+    """
+    __tablename__ = "revoked_tokens"
+
+    jti: str = Field(primary_key=True, max_length=32)
+    user_id: int = Field(foreign_key="users.id")
+    expires_at: datetime = Field(index=True)
+    # Refresh tokens: the insert itself rejects a reuse, so workers never load them
+    single_use: bool = Field(default=False, sa_column_kwargs={"server_default": "0"})
+    # Set by the database, so every worker reads new rows against one clock
+    revoked_at: datetime = Field(
+        default=None,
+        sa_column=Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    )
@@ -0,0 +1,14 @@
+from sqlmodel import SQLModel, Field
+
+
+class UserShard(SQLModel, table=True):
+    """Directory entry placing a user's tasks on a shard (see sharding.py).
+
+    Users without an entry live on ``user_id % number of shards``.
+    """
+    __tablename__ = "user_shards"
+
+    user_id: int = Field(primary_key=True, foreign_key="users.id")
+    shard: int
+    # Set while the tasks are being copied to another shard; writes are refused
+    moving: bool = Field(default=False, sa_column_kwargs={"server_default": "0"})
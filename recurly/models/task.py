@@ -1,7 +1,10 @@
 from datetime import datetime
 from typing import Optional, TYPE_CHECKING
 from sqlmodel import SQLModel, Field, Relationship
-from sqlalchemy import Column, DateTime, func
+from sqlalchemy import DDL, Column, DateTime, Index, event, func, inspect, insert, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session as ORMSession
+from ..cadence import parse_cadence, next_due_at, utc_now
 
 if TYPE_CHECKING:
     from .user import User
@@ -19,22 +22,186 @@ class TaskBase(SQLModel):
 class Task(TaskBase, table=True):
     """Task model for database table"""
     __tablename__ = "tasks"
+    __table_args__ = (
+        Index("ix_tasks_assigned_to_id", "assigned_to", "id"),
+        Index("ix_tasks_assigned_to_change_seq", "assigned_to", "change_seq"),
+        # Due-time order of the task lists; the first also serves due-time ranges
+        Index("ix_tasks_next_due_at_id", "next_due_at", "id"),
+        Index("ix_tasks_assigned_to_next_due_at_id", "assigned_to", "next_due_at", "id"),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
     interval: Optional[int] = Field(default=None)  # Internal field, not exposed in user schemas
+    interval_unit: Optional[str] = Field(default=None, max_length=10)  # Internal, e.g. "day", "month"
+    anchor_at: Optional[datetime] = Field(default=None)  # Internal, start of the cadence schedule
+    next_due_at: Optional[datetime] = Field(default=None)
+    change_seq: Optional[int] = Field(default=None, index=True)  # Internal, set on every write for delta sync
     created_at: datetime = Field(
-        default_factory=datetime.utcnow,
+        default_factory=utc_now,
         sa_column=Column(DateTime(timezone=True), server_default=func.now())
     )
+    # Set client-side on update: microsecond resolution keeps list ETags
+    # distinct for rapid edits, and the value need not be re-read after flush.
     updated_at: datetime = Field(
-        default_factory=datetime.utcnow,
-        sa_column=Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+        default_factory=utc_now,
+        sa_column=Column(DateTime(timezone=True), server_default=func.now(), onupdate=utc_now)
     )
     
     # Relationship to User
     user: Optional["User"] = Relationship(back_populates="tasks")
 
 
+    def reschedule(self, completed: bool = False) -> None:
+        """Normalise cadence into interval fields and recompute next_due_at.
+
+        With ``completed``, ``last_completed`` was just set and meets the
+        outstanding due time, so the task moves on to the one after it.
+        """
+        cadence = parse_cadence(self.cadence)
+        if self.anchor_at is None:
+            self.anchor_at = self.created_at or utc_now()
+        self.interval = cadence.interval if cadence else None
+        self.interval_unit = cadence.unit if cadence else None
+        satisfied = committed_next_due_at(self) if completed else None
+        self.next_due_at = next_due_at(cadence, self.anchor_at, self.last_completed, satisfied)
+
+
+@event.listens_for(Task, "before_insert")
+def _schedule_new_task(mapper, connection, target: Task) -> None:
+    target.reschedule()
+
+
+@event.listens_for(Task, "before_update")
+def _reschedule_task(mapper, connection, target: Task) -> None:
+    state = inspect(target)
+    cadence_changed = state.attrs.cadence.history.has_changes()
+    completion_changed = state.attrs.last_completed.history.has_changes()
+    completed = completion_changed and target.last_completed is not None
+    if cadence_changed or completion_changed or target.anchor_at is None:
+        # A new cadence restarts the schedule instead of building on the old due time
+        target.reschedule(completed=completed and not cadence_changed)
+
+
+def committed_next_due_at(task: Task) -> Optional[datetime]:
+    """The due time as stored in the database, before any pending change.
+
+    While a completion is being flushed, this is the due time it meets.
+    """
+    previous = inspect(task).attrs.next_due_at.history.deleted
+    return previous[0] if previous else task.next_due_at
+
+
+class TaskTombstone(SQLModel, table=True):
+    """Records that a task left a user's list (deleted or reassigned)."""
+    __tablename__ = "task_tombstones"
+    __table_args__ = (
+        Index("ix_task_tombstones_assigned_to_change_seq", "assigned_to", "change_seq"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    task_id: int  # No foreign key: the task row is usually gone
+    assigned_to: int
+    change_seq: int = Field(index=True)
+    removed_at: datetime = Field(default_factory=utc_now)
+
+
+class ChangeSequence(SQLModel, table=True):
+    """Named counter handing out change sequence numbers."""
+    __tablename__ = "change_sequences"
+
+    name: str = Field(primary_key=True, max_length=50)
+    value: int = Field(default=0)
+
+
+TASK_CHANGE_SEQUENCE = "tasks"
+
+event.listen(
+    ChangeSequence.__table__,
+    "after_create",
+    DDL(f"INSERT INTO change_sequences (name, value) VALUES ('{TASK_CHANGE_SEQUENCE}', 0)"),
+)
+
+
+# Full-text search over title and description (see search.py). SQLite keeps an
+# external-content FTS5 table in sync with triggers; PostgreSQL indexes the
+# tsvector expression directly, so writes need no extra work.
+TASKS_FTS_TABLE = "tasks_fts"
+TASKS_TSVECTOR = "to_tsvector('english'::regconfig, title || ' ' || coalesce(description, ''))"
+
+SQLITE_SEARCH_DDL = (
+    f"CREATE VIRTUAL TABLE {TASKS_FTS_TABLE} USING fts5("
+    "title, description, content='tasks', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER tasks_fts_insert AFTER INSERT ON tasks BEGIN "
+    f"INSERT INTO {TASKS_FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    f"CREATE TRIGGER tasks_fts_delete AFTER DELETE ON tasks BEGIN "
+    f"INSERT INTO {TASKS_FTS_TABLE}({TASKS_FTS_TABLE}, rowid, title, description) "
+    f"VALUES ('delete', old.id, old.title, old.description); END",
+    f"CREATE TRIGGER tasks_fts_update AFTER UPDATE OF title, description ON tasks BEGIN "
+    f"INSERT INTO {TASKS_FTS_TABLE}({TASKS_FTS_TABLE}, rowid, title, description) "
+    f"VALUES ('delete', old.id, old.title, old.description); "
+    f"INSERT INTO {TASKS_FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+)
+POSTGRESQL_SEARCH_DDL = (
+    f"CREATE INDEX ix_tasks_search ON tasks USING GIN ({TASKS_TSVECTOR})",
+)
+
+for _statement in SQLITE_SEARCH_DDL:
+    event.listen(Task.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+for _statement in POSTGRESQL_SEARCH_DDL:
+    event.listen(Task.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+event.listen(
+    Task.__table__,
+    "before_drop",
+    DDL(f"DROP TABLE IF EXISTS {TASKS_FTS_TABLE}").execute_if(dialect="sqlite"),
+)
+
+
+def allocate_change_seqs(connection: Connection, count: int, name: str = TASK_CHANGE_SEQUENCE) -> int:
+    """Reserve ``count`` consecutive sequence numbers and return the first.
+
+    The UPDATE holds the counter row's lock (on SQLite, the write lock) until
+    the transaction ends, so numbers become visible in the order they were
+    handed out and a client polling ``since=N`` never skips a slower writer.
+    """
+    table = ChangeSequence.__table__
+    updated = connection.execute(
+        update(table).where(table.c.name == name).values(value=table.c.value + count)
+    )
+    if updated.rowcount == 0:
+        connection.execute(insert(table).values(name=name, value=count))
+    last = connection.execute(select(table.c.value).where(table.c.name == name)).scalar_one()
+    return last - count + 1
+
+
+def committed_assignee(task: Task) -> int:
+    """The assignee as stored in the database, before any pending change."""
+    previous = inspect(task).attrs.assigned_to.history.deleted
+    return previous[0] if previous else task.assigned_to
+
+
+@event.listens_for(ORMSession, "before_flush")
+def _sequence_task_changes(session: ORMSession, flush_context, instances) -> None:
+    """Stamp written tasks with a change_seq and tombstone removed ones."""
+    written = [obj for obj in session.new if isinstance(obj, Task)]
+    written += [obj for obj in session.dirty if isinstance(obj, Task) and session.is_modified(obj)]
+    removed = [(obj.id, committed_assignee(obj)) for obj in session.deleted if isinstance(obj, Task)]
+    # A reassigned task disappears from the previous assignee's list
+    removed += [
+        (task.id, committed_assignee(task)) for task in written
+        if task.id is not None and committed_assignee(task) != task.assigned_to
+    ]
+    if not written and not removed:
+        return
+
+    seq = allocate_change_seqs(session.connection(), len(written) + len(removed))
+    for task in written:
+        task.change_seq = seq
+        seq += 1
+    for task_id, assigned_to in removed:
+        session.add(TaskTombstone(task_id=task_id, assigned_to=assigned_to, change_seq=seq))
+        seq += 1
+
+
 class TaskCreate(TaskBase):
     """Model for creating a new task"""
     pass
@@ -43,6 +210,7 @@ class TaskCreate(TaskBase):
 class TaskRead(TaskBase):
     """Model for reading task data"""
     id: int
+    next_due_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
 
@@ -2,6 +2,7 @@ from datetime import datetime
 from typing import Optional, TYPE_CHECKING
 from sqlmodel import SQLModel, Field, Relationship
 from sqlalchemy import Column, DateTime, func
+from ..cadence import utc_now
 
 if TYPE_CHECKING:
     from .task import Task
@@ -20,13 +21,16 @@ class User(UserBase, table=True):
     
     id: Optional[int] = Field(default=None, primary_key=True)
     password_hash: str = Field(max_length=255)
+    # Embedded in access tokens; bumping it revokes every token issued before
+    token_version: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
     created_at: datetime = Field(
-        default_factory=datetime.utcnow,
+        default_factory=utc_now,
         sa_column=Column(DateTime(timezone=True), server_default=func.now())
     )
     updated_at: datetime = Field(
-        default_factory=datetime.utcnow,
-        sa_column=Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+        default_factory=utc_now,
+        # Indexed for the revocation list, which reads users changed since its last refresh
+        sa_column=Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)
     )
     
     # Relationship to Tasks
@@ -0,0 +1,41 @@
+from typing import Dict, Optional, Sequence
+
+
+def quality_values(header: Optional[str]) -> Dict[str, float]:
+    """Parse an Accept or Accept-Encoding header into ``{value: q}``.
+
+    Values are lower-cased and parameters other than ``q`` are ignored; a
+    missing or malformed ``q`` counts as 1.
+    """
+    weights: Dict[str, float] = {}
+    for item in (header or "").split(","):
+        value, *params = (part.strip() for part in item.split(";"))
+        if not value:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, raw = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = min(max(float(raw), 0.0), 1.0)
+                except ValueError:
+                    pass
+        weights[value.lower()] = max(q, weights.get(value.lower(), 0.0))
+    return weights
+
+
+def negotiate(header: Optional[str], offers: Sequence[str], wildcards: Sequence[str] = ("*",)) -> Optional[str]:
+    """Pick the offer the client weights highest; ties go to the earlier offer.
+
+    An offer the header does not name takes the weight of the first of
+    ``wildcards`` it does name. Returns None when nothing is acceptable.
+    """
+    weights = quality_values(header)
+    best, best_q = None, 0.0
+    for offer in offers:
+        q = weights.get(offer)
+        if q is None:
+            q = next((weights[wildcard] for wildcard in wildcards if wildcard in weights), 0.0)
+        if q > best_q:
+            best, best_q = offer, q
+    return best
@@ -0,0 +1,73 @@
+import heapq
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Iterable, Iterator, Optional
+from .cadence import Cadence, next_occurrence, to_naive_utc
+from .models.task import Task
+
+# Task columns an expansion needs, besides what the caller wants to show
+OCCURRENCE_COLUMNS = (
+    Task.id,
+    Task.title,
+    Task.description,
+    Task.interval,
+    Task.interval_unit,
+    Task.anchor_at,
+    Task.next_due_at,
+    Task.updated_at,
+)
+
+_JUST_BEFORE = timedelta(microseconds=1)
+
+
+@dataclass(frozen=True)
+class Occurrence:
+    """One concrete due time of a recurring task."""
+    due_at: datetime
+    task_id: int
+    task: Any  # The row the occurrence was expanded from
+
+
+def task_occurrences(task: Any, start: datetime, end: Optional[datetime] = None) -> Iterator[datetime]:
+    """Yield a task's due times in ``[start, end)`` in order, computed lazily.
+
+    The first is the outstanding one, the stored ``next_due_at``. It is
+    yielded even when it is overdue, before ``start``, so a missed task is
+    not silently dropped. Later ones follow the schedule from ``anchor_at``,
+    as completing the task would leave them. ``task`` needs the
+    ``OCCURRENCE_COLUMNS``; tasks without a schedule yield nothing. Without
+    ``end`` the iterator is endless.
+    """
+    if (task.interval_unit is None or task.interval is None or task.anchor_at is None
+            or task.next_due_at is None):
+        return
+    cadence = Cadence(task.interval_unit, task.interval)
+    start = to_naive_utc(start)
+    due = task.next_due_at
+    if due < start:
+        yield due
+        # Jump straight to the window instead of stepping through the past
+        due = next_occurrence(cadence, task.anchor_at, start - _JUST_BEFORE)
+    while end is None or due < end:
+        yield due
+        due = next_occurrence(cadence, task.anchor_at, due)
+
+
+def expand(tasks: Iterable[Any], start: datetime, end: datetime) -> Iterator[Occurrence]:
+    """Merge the occurrences of many tasks in ``[start, end)``, ordered by (due_at, task_id).
+
+    Overdue occurrences from before ``start`` come first, see ``task_occurrences()``.
+
+    Lazy: taking the first n occurrences costs one step per task to start,
+    then about one per occurrence taken, however wide the window is.
+    """
+    end = to_naive_utc(end)
+    return heapq.merge(
+        *(_occurrences_of(task, start, end) for task in tasks),
+        key=lambda occurrence: (occurrence.due_at, occurrence.task_id),
+    )
+
+
+def _occurrences_of(task: Any, start: datetime, end: datetime) -> Iterator[Occurrence]:
+    for due_at in task_occurrences(task, start, end):
+        yield Occurrence(due_at, task.id, task)
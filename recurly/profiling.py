@@ -0,0 +1,187 @@
+import functools
+import inspect
+import logging
+import os
+import random
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Callable, Optional
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from .metrics import UNMATCHED_ROUTE
+
+# Fraction of requests (0.0-1.0) that get a Server-Timing breakdown and N+1 check
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# Statements slower than this are logged with their query plan; negative disables
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+# A statement repeated this many times in one profiled request is reported as N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+
+logger = logging.getLogger(__name__)
+
+# Query plan prefixes by dialect; other databases log slow statements without a plan
+EXPLAIN_PREFIXES = {
+    "sqlite": "EXPLAIN QUERY PLAN ",
+    "postgresql": "EXPLAIN ",
+    "mysql": "EXPLAIN ",
+}
+
+
+class Profile:
+    """Where one sampled request spent its time."""
+    __slots__ = ("start", "auth", "db", "queries", "statements", "handler_start", "handler_end")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.auth = 0.0
+        self.db = 0.0
+        self.queries = 0
+        self.statements: Counter = Counter()
+        self.handler_start: Optional[float] = None
+        self.handler_end: Optional[float] = None
+
+    def server_timing(self, now: float) -> str:
+        """Render the breakdown as a Server-Timing header value (milliseconds)."""
+        parts = [
+            f"auth;dur={self.auth * 1000:.2f}",
+            f'db;dur={self.db * 1000:.2f};desc="{self.queries} queries"',
+        ]
+        if self.handler_start is not None and self.handler_end is not None:
+            parts.append(f"handler;dur={(self.handler_end - self.handler_start) * 1000:.2f}")
+            parts.append(f"serialize;dur={(now - self.handler_end) * 1000:.2f}")
+        parts.append(f"total;dur={(now - self.start) * 1000:.2f}")
+        return ", ".join(parts)
+
+
+# Set only for sampled requests; threadpool workers see the same object
+current_profile: ContextVar[Optional[Profile]] = ContextVar("current_profile", default=None)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling a random PROFILE_SAMPLE_RATE share of requests.
+
+    Unsampled requests only pay for one random() call.
+    """
+
+    def __init__(self, app, sample_rate: float = PROFILE_SAMPLE_RATE):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", profile.server_timing(time.perf_counter()).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = current_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_profile.reset(token)
+            _report_repeated_statements(scope, profile)
+
+
+def _report_repeated_statements(scope, profile: Profile) -> None:
+    route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+    for statement, count in profile.statements.items():
+        if count >= N_PLUS_ONE_THRESHOLD:
+            logger.warning(
+                "Possible N+1: %s %s ran the same statement %d times: %s",
+                scope["method"], route, count, statement,
+            )
+
+
+class ProfiledRoute(APIRoute):
+    """Route class marking when the endpoint returns, to separate serialisation time."""
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        super().__init__(path, endpoint, **kwargs)
+        # Parameters were already read from the original signature, so only the
+        # call is wrapped; it must stay a coroutine function if it was one.
+        self.dependant.call = _timed_endpoint(self.dependant.call)
+
+
+def _timed_endpoint(call: Callable[..., Any]) -> Callable[..., Any]:
+    if inspect.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def timed(**values: Any) -> Any:
+            profile = current_profile.get()
+            if profile is None:
+                return await call(**values)
+            profile.handler_start = time.perf_counter()
+            try:
+                return await call(**values)
+            finally:
+                profile.handler_end = time.perf_counter()
+        return timed
+
+    @functools.wraps(call)
+    def timed_sync(**values: Any) -> Any:
+        profile = current_profile.get()
+        if profile is None:
+            return call(**values)
+        profile.handler_start = time.perf_counter()
+        try:
+            return call(**values)
+        finally:
+            profile.handler_end = time.perf_counter()
+    return timed_sync
+
+
+def record_auth_time(elapsed: float) -> None:
+    """Attribute authentication time to the current profile, if sampled."""
+    profile = current_profile.get()
+    if profile is not None:
+        profile.auth += elapsed
+
+
+def _explain(conn, statement: str, parameters: Any) -> Optional[str]:
+    prefix = EXPLAIN_PREFIXES.get(conn.dialect.name)
+    if prefix is None:
+        return None
+    # A separate cursor: the original one may still hold unread result rows
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        return "\n".join(" ".join(str(column) for column in row) for row in cursor.fetchall())
+    except Exception as exc:  # The plan is diagnostic only; never fail the query for it
+        return f"(EXPLAIN failed: {exc})"
+    finally:
+        cursor.close()
+
+
+def install_query_profiler(engine: Engine) -> None:
+    """Attribute statements to the sampled request and log slow ones with their plan.
+
+    For async engines pass ``async_engine.sync_engine``.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_query(conn, cursor, statement, parameters, context, executemany) -> None:
+        context._profile_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _end_query(conn, cursor, statement, parameters, context, executemany) -> None:
+        elapsed = time.perf_counter() - context._profile_start
+        profile = current_profile.get()
+        if profile is not None:
+            profile.db += elapsed
+            profile.queries += 1
+            profile.statements[statement] += 1
+        if 0 <= SLOW_QUERY_MS <= elapsed * 1000:
+            plan = None if executemany else _explain(conn, statement, parameters)
+            # Parameters are left out: they can hold password hashes and user data
+            logger.warning(
+                "Slow query (%.1f ms): %s\nPlan:\n%s",
+                elapsed * 1000, statement, plan or "(not available)",
+            )
@@ -0,0 +1,43 @@
+import argparse
+import logging
+import sqlite3
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def copy_database(source: str, destination: str) -> None:
+    """Copy a SQLite database file into another, consistently and in place.
+
+    Uses SQLite's online backup API, so writers on the source are not
+    stopped, and readers that already have the destination open see the
+    new contents instead of a replaced file.
+    """
+    with sqlite3.connect(source) as src, sqlite3.connect(destination, timeout=30) as dst:
+        src.backup(dst)
+
+
+def main() -> None:
+    """Local stand-in for replication: refresh a replica file from the primary every few seconds."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("source", help="primary SQLite file, e.g. recurly.db")
+    parser.add_argument("destination", help="replica SQLite file, e.g. replica.db")
+    parser.add_argument("--interval", type=float, default=2.0, help="seconds between copies")
+    parser.add_argument("--once", action="store_true", help="copy once and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    while True:
+        start = time.perf_counter()
+        copy_database(args.source, args.destination)
+        logger.info("Copied %s to %s in %.1f ms", args.source, args.destination, (time.perf_counter() - start) * 1000)
+        if args.once:
+            return
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy import delete, event, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session as ORMSession
+from sqlmodel import select
+from .cadence import to_naive_utc, utc_now
+from .database import DBSession, open_session
+from .models.revoked_token import RevokedToken
+from .models.user import User
+
+# Configuration
+# How often each worker reads new revocations; a token revoked by another
+# worker is accepted here for up to this long
+REVOCATION_REFRESH_SECONDS = float(os.getenv("REVOCATION_REFRESH_SECONDS", "5"))
+# Rows revoked up to this long before the newest row seen are read again, so
+# a transaction that committed late is not skipped
+REVOCATION_REFRESH_OVERLAP = timedelta(seconds=60)
+# How often a worker deletes rows whose tokens have expired anyway
+REVOCATION_PURGE_SECONDS = 3600.0
+
+_EPOCH = datetime(1970, 1, 1)
+
+logger = logging.getLogger(__name__)
+
+
+def _key(jti: str) -> bytes:
+    # jti values are 32 hex digits; 16 raw bytes halve the memory per entry
+    try:
+        return bytes.fromhex(jti)
+    except ValueError:
+        return jti.encode()
+
+
+class RevocationList:
+    """Revoked token ids, held in memory so checking a token never queries the database.
+
+    The ``revoked_tokens`` table is the source of truth. Each worker loads
+    it once, then reads only rows revoked since the newest one it has seen,
+    every ``REVOCATION_REFRESH_SECONDS``. Single-use rows are left out:
+    ``revoke_token`` alone rejects a reused refresh token. Revocations committed by this worker
+    apply at once. An exact set rather than a Bloom filter: entries leave
+    when their token expires, so it stays small, and a false positive would
+    log a user out.
+
+    Each refresh also reads the users updated since the last one and passes
+    their ``(id, email)`` to ``user_listeners``, so a user deactivated
+    through another worker drops out of this worker's caches too.
+    """
+
+    def __init__(self, refresh_interval: float = REVOCATION_REFRESH_SECONDS):
+        self.refresh_interval = refresh_interval
+        self.refreshes = 0
+        # Token id -> expiry (naive UTC); reads need no lock
+        self._expires: Dict[bytes, datetime] = {}
+        self._lock = threading.Lock()
+        self._seen_until: Optional[datetime] = None
+        self._users_seen_until: Optional[datetime] = None
+        self.user_listeners: List[Callable[[List[Tuple[int, str]]], None]] = []
+        self._purged_at: Optional[float] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        """O(1) check of a token's ``jti``; tokens without one cannot be revoked."""
+        return jti is not None and _key(jti) in self._expires
+
+    def add(self, revoked: List[Tuple[str, datetime]]) -> None:
+        """Record ``(jti, expires_at)`` pairs; safe to call from any thread."""
+        with self._lock:
+            for jti, expires_at in revoked:
+                self._expires[_key(jti)] = expires_at
+
+    def __len__(self) -> int:
+        return len(self._expires)
+
+    async def refresh(self) -> int:
+        """Read revocations committed since the last refresh; returns how many rows were read."""
+        now = utc_now()
+        statement = select(RevokedToken.jti, RevokedToken.expires_at, RevokedToken.revoked_at).where(
+            RevokedToken.expires_at > now, RevokedToken.single_use.is_(False)
+        )
+        if self._seen_until is not None:
+            statement = statement.where(RevokedToken.revoked_at >= self._seen_until - REVOCATION_REFRESH_OVERLAP)
+        # Revocations are written to the primary; a replica could lag behind it
+        async with open_session() as session:
+            rows = (await session.exec(statement)).all()
+            changed_users = await self._changed_users(session)
+        if changed_users:
+            for listener in self.user_listeners:
+                listener(changed_users)
+        self.add([(row.jti, row.expires_at) for row in rows])
+        if rows:
+            newest = max(row.revoked_at for row in rows)
+            self._seen_until = newest if self._seen_until is None else max(self._seen_until, newest)
+        with self._lock:
+            self._expires = {key: expires_at for key, expires_at in self._expires.items() if expires_at > now}
+        self.refreshes += 1
+        return len(rows)
+
+    async def _changed_users(self, session: DBSession) -> List[Tuple[int, str]]:
+        """Users updated since the previous call; the first call only sets the mark."""
+        if self._users_seen_until is None:
+            newest = (await session.exec(select(func.max(User.updated_at)))).one()
+            self._users_seen_until = to_naive_utc(newest) if newest is not None else _EPOCH
+            return []
+        rows = (await session.exec(
+            select(User.id, User.email, User.updated_at)
+            .where(User.updated_at >= self._users_seen_until - REVOCATION_REFRESH_OVERLAP)
+        )).all()
+        if rows:
+            newest = max(to_naive_utc(row.updated_at) for row in rows)
+            self._users_seen_until = max(self._users_seen_until, newest)
+        return [(row.id, row.email) for row in rows]
+
+    async def purge(self) -> int:
+        """Delete rows whose tokens have expired."""
+        async with open_session() as session:
+            result = await session.execute(delete(RevokedToken).where(RevokedToken.expires_at <= utc_now()))
+            await session.commit()
+        return result.rowcount
+
+    def ensure_running(self) -> None:
+        """Start refreshing in the background of the current event loop, if not yet running."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def start(self) -> None:
+        """Load the revocations, then keep refreshing them in the background."""
+        await self.refresh()
+        self.ensure_running()
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await self.refresh()
+                if self._purged_at is None or loop.time() - self._purged_at >= REVOCATION_PURGE_SECONDS:
+                    self._purged_at = loop.time()
+                    await self.purge()
+            except Exception:
+                logger.exception("Refreshing revoked tokens failed; keeping the current list")
+            await asyncio.sleep(self.refresh_interval)
+
+
+async def revoke_token(session: DBSession, payload: dict, single_use: bool = False) -> bool:
+    """Persist the revocation of a decoded token and commit.
+
+    Returns False if the token has no ``jti`` (or user id) or was already
+    revoked, which makes it usable as a compare-and-set for single-use tokens.
+    Tokens revoked with ``single_use`` are only ever checked that way, so they
+    are not added to the in-memory ``revocations``.
+    """
+    jti, user_id = payload.get("jti"), payload.get("uid")
+    if jti is None or user_id is None:
+        return False
+    expires_at = to_naive_utc(datetime.fromtimestamp(payload["exp"], timezone.utc))
+    session.add(RevokedToken(jti=jti, user_id=user_id, expires_at=expires_at, single_use=single_use))
+    try:
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        return False
+    return True
+
+
+revocations = RevocationList()
+
+
+@event.listens_for(RevokedToken, "after_insert")
+def _collect_revocation(mapper, connection, target: RevokedToken) -> None:
+    session = ORMSession.object_session(target)
+    if session is not None and not target.single_use:
+        session.info.setdefault("revoked_tokens", []).append((target.jti, target.expires_at))
+
+
+@event.listens_for(ORMSession, "after_commit")
+def _apply_revocations_on_commit(session: ORMSession) -> None:
+    revocations.add(session.info.pop("revoked_tokens", []))
+
+
+@event.listens_for(ORMSession, "after_rollback")
+def _discard_revocations(session: ORMSession) -> None:
+    session.info.pop("revoked_tokens", None)
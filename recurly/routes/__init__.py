@@ -1,4 +1,5 @@
 from .auth import router as auth_router
 from .task import router as task_router
+from .task_batch import router as task_batch_router
 
-__all__ = ["auth_router", "task_router"]
+__all__ = ["auth_router", "task_router", "task_batch_router"]
@@ -1,26 +1,34 @@
 from datetime import timedelta
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlmodel import Session, select
+from sqlmodel import select
 from ..auth import (
     authenticate_user, 
-    create_access_token, 
+    create_refresh_token,
+    create_user_access_token,
     get_current_user, 
     get_current_active_user,
-    get_password_hash,
-    ACCESS_TOKEN_EXPIRE_MINUTES
+    hash_password,
+    oauth2_scheme,
+    use_refresh_token,
+    verify_token,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    REFRESH_SCOPE
 )
-from ..database import get_session
+from ..database import DBSession, get_session
+from ..profiling import ProfiledRoute
+from ..revocation import revoke_token
 from ..models.user import User, UserCreate, UserRead
-from ..schemas import Token, UserLogin, UserRegister
+from ..schemas import Logout, Token, TokenRefresh, UserLogin, UserRegister
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 
 @router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED)
 async def register_user(
     user_data: UserRegister,
-    session: Session = Depends(get_session)
+    session: DBSession = Depends(get_session)
 ):
     """Register a new user."""
     # Check if passwords match
@@ -32,7 +40,7 @@ async def register_user(
     
     # Check if user already exists
     statement = select(User).where(User.email == user_data.email)
-    existing_user = session.exec(statement).first()
+    existing_user = (await session.exec(statement)).first()
     
     if existing_user:
         raise HTTPException(
@@ -41,7 +49,7 @@ async def register_user(
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await hash_password(user_data.password)
     user = User(
         email=user_data.email,
         password_hash=hashed_password,
@@ -50,8 +58,8 @@ async def register_user(
     )
     
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    await session.commit()
+    await session.refresh(user)
     
     return user
 
@@ -59,10 +67,10 @@ async def register_user(
 @router.post("/login", response_model=Token)
 async def login_user(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    session: Session = Depends(get_session)
+    session: DBSession = Depends(get_session)
 ):
-    """Login user and return access token."""
-    user = authenticate_user(session, form_data.username, form_data.password)
+    """Login user and return access and refresh tokens."""
+    user = await authenticate_user(session, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -71,11 +79,42 @@ async def login_user(
         )
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
-    )
+    access_token = create_user_access_token(user, expires_delta=access_token_expires)
     
-    return {"access_token": access_token, "token_type": "bearer"}
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": create_refresh_token(user)}
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh_tokens(
+    refresh_data: TokenRefresh,
+    session: DBSession = Depends(get_session)
+):
+    """Exchange a refresh token for new access and refresh tokens, without the password.
+
+    Each refresh token works once; reusing one fails with 401.
+    """
+    user = await use_refresh_token(refresh_data.refresh_token, session)
+    return {
+        "access_token": create_user_access_token(user),
+        "token_type": "bearer",
+        "refresh_token": create_refresh_token(user),
+    }
+
+
+@router.post("/logout")
+async def logout_user(
+    logout_data: Optional[Logout] = None,
+    token: str = Depends(oauth2_scheme),
+    current_user: User = Depends(get_current_user),
+    session: DBSession = Depends(get_session)
+):
+    """Revoke the access token used for this request, and the given refresh token."""
+    await revoke_token(session, verify_token(token))
+    if logout_data is not None and logout_data.refresh_token is not None:
+        payload = verify_token(logout_data.refresh_token)
+        if payload is not None and payload.get("scope") == REFRESH_SCOPE and payload.get("uid") == current_user.id:
+            await revoke_token(session, payload, single_use=True)
+    return {"message": "Logged out successfully"}
 
 
 @router.get("/me", response_model=UserRead)
@@ -88,10 +127,10 @@ async def read_users_me(current_user: User = Depends(get_current_active_user)):
 async def read_user(
     user_id: int,
     current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session)
+    session: DBSession = Depends(get_session)
 ):
     """Get user by ID (protected route example)."""
-    user = session.get(User, user_id)
+    user = await session.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
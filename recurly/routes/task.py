@@ -1,25 +1,71 @@
-from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
-from typing import List
+from datetime import datetime, timedelta
+from functools import partial
+from operator import attrgetter
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session, and_, func, or_, select, tuple_
+from typing import List, Literal, Optional
 from ..auth import get_current_active_user
-from ..database import get_session
+from ..cadence import to_naive_utc, utc_now
+from ..conditional import is_not_modified, make_etag, not_modified, validator_headers
+from ..database import DBSession, get_session, shard_engines
+from ..events import sse_events, task_events
+from ..export import EXPORT_COLUMNS, MEDIA_TYPES, csv_chunks, ndjson_chunks
+from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, decode_cursor, decode_id_cursor, encode_cursor
+from ..profiling import ProfiledRoute
+from ..search import match_tasks
+from ..sharding import (
+    fan_out,
+    fans_out,
+    get_task_session,
+    merge_rows,
+    move_task,
+    shard_for_user,
+    stream_shards,
+    task_session,
+    user_task_session,
+)
 from ..models.user import User
-from ..models.task import Task, TaskCreate, TaskRead, TaskUpdate
-from ..schemas import TaskCreate as TaskCreateSchema, TaskUpdate as TaskUpdateSchema, TaskRead as TaskReadSchema, TaskComplete
+from ..models.task import Task, TaskCreate, TaskRead, TaskTombstone, TaskUpdate
+from ..models.completion import CompletionStats, TaskCompletion, TaskStats, UserTaskStats
+from ..write_behind import task_write_behind
+from ..serialization import (
+    TASK_READ_COLUMNS,
+    json_row_response,
+    json_rows_response,
+    list_media_type,
+    parse_fields,
+    rows_response,
+    task_columns,
+)
+from ..schemas import TaskCreate as TaskCreateSchema, TaskUpdate as TaskUpdateSchema, TaskRead as TaskReadSchema, TaskChanges, TaskComplete
+from ..schemas import TaskStatsRead, UserTaskStatsRead
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
+
+# Window of the completions_30d statistic
+RECENT_COMPLETIONS_DAYS = 30
+
+_by_id = attrgetter("id")
+
+# List orderings: "id", or "due" for (next_due_at, id) with unscheduled tasks last
+ListOrder = Literal["id", "due"]
+
+
+def _by_due(row) -> tuple:
+    # Matches ORDER BY next_due_at NULLS LAST, id
+    return (row.next_due_at is None, row.next_due_at or datetime.min, row.id)
 
 
 @router.post("/tasks", response_model=TaskReadSchema, status_code=status.HTTP_201_CREATED)
 async def create_task(
     task_data: TaskCreateSchema,
     current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session)
+    session: DBSession = Depends(get_session)
 ):
     """Create a new task."""
     # Verify the assigned user exists
-    assigned_user = session.get(User, task_data.assigned_to)
+    assigned_user = await session.get(User, task_data.assigned_to)
     if not assigned_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -33,51 +79,439 @@ async def create_task(
         assigned_to=task_data.assigned_to
     )
     
-    session.add(task)
-    session.commit()
-    session.refresh(task)
+    async with user_task_session(session, task_data.assigned_to, write=True) as tasks:
+        tasks.add(task)
+        await tasks.commit()
+        await tasks.refresh(task)
     
     return task
 
 
 @router.get("/tasks", response_model=List[TaskReadSchema])
 async def read_tasks(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
-    skip: int = 0,
-    limit: int = 100
+    session: DBSession = Depends(get_session),
+    cursor: Optional[str] = None,
+    skip: int = Query(0, ge=0, deprecated=True),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = Query(None, description="Comma-separated TaskRead fields to return"),
+    ids: Optional[str] = Query(None, description="Comma-separated task ids to fetch in one request"),
+    order: ListOrder = Query("id", description="Sort by id, or by next due time then id")
 ):
-    """Get all tasks."""
-    statement = select(Task).offset(skip).limit(limit)
-    tasks = session.exec(statement).all()
-    return tasks
+    """Get all tasks, ordered by id or by ``(next_due_at, id)``.
+
+    Pass the ``X-Next-Cursor`` response header back as ``cursor`` to fetch the
+    next page; ``skip`` is kept for older clients but degrades on large tables.
+    With ``ids``, returns just those tasks (missing ids are left out) from
+    one ``IN`` query instead of paginating. With task shards, every shard is
+    queried concurrently and the pages are merged. The Accept header selects
+    JSON, columnar JSON or msgpack, see ``LIST_MEDIA_TYPES``.
+    """
+    projection = parse_fields(fields)
+    media_type = list_media_type(request)
+    if ids is not None:
+        task_ids = _parse_ids(ids)
+        criteria = Task.id.in_(task_ids)
+        headers = await _list_validators(session, criteria, task_ids, projection, media_type)
+        if is_not_modified(request, headers["ETag"]):
+            return not_modified(headers)
+        statement = select(*task_columns(projection)).where(criteria).order_by(Task.id)
+        rows = merge_rows(await fan_out(session, statement), _by_id)
+        return rows_response(rows, projection, media_type, headers=headers)
+
+    headers = await _list_validators(session, None, cursor, skip, limit, projection, media_type, order)
+    if is_not_modified(request, headers["ETag"]):
+        return not_modified(headers)
+    response.headers.update(headers)
+
+    statement = _ordered_list(select(*_list_columns(projection, order)), order, cursor)
+    if cursor is not None:
+        skip = 0
+    rows = await _read_page(session, statement, limit, response, order, skip)
+    return rows_response(rows, projection, media_type, headers=response.headers)
 
 
 @router.get("/tasks/my", response_model=List[TaskReadSchema])
 async def read_my_tasks(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_active_user),
+    session: DBSession = Depends(get_task_session),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = Query(None, description="Comma-separated TaskRead fields to return"),
+    order: ListOrder = Query("id", description="Sort by id, or by next due time then id")
+):
+    """Get tasks assigned to the current user, ordered like ``GET /tasks`` and paginated by cursor.
+
+    Negotiates the same representations as ``GET /tasks``.
+    """
+    projection = parse_fields(fields)
+    media_type = list_media_type(request)
+    criteria = Task.assigned_to == current_user.id
+    headers = await _list_validators(session, criteria, current_user.id, cursor, limit, projection, media_type, order)
+    if is_not_modified(request, headers["ETag"]):
+        return not_modified(headers)
+    response.headers.update(headers)
+
+    statement = _ordered_list(select(*_list_columns(projection, order)).where(criteria), order, cursor)
+    rows = await _read_page(session, statement, limit, response, order)
+    return rows_response(rows, projection, media_type, headers=response.headers)
+
+
+@router.get("/tasks/my/stats", response_model=UserTaskStatsRead)
+async def read_my_task_stats(
+    current_user: User = Depends(get_current_active_user),
+    session: DBSession = Depends(get_task_session)
+):
+    """Completion statistics over every task the current user has completed."""
+    stats = await session.get(UserTaskStats, current_user.id)
+    recent = await _count_recent_completions(session, TaskCompletion.user_id == current_user.id)
+    return UserTaskStatsRead(user_id=current_user.id, **_stats_fields(stats, recent))
+
+
+async def _count_recent_completions(session: DBSession, criteria) -> int:
+    """Count completions in the rolling window with a range scan of a completed_at index."""
+    since = utc_now() - timedelta(days=RECENT_COMPLETIONS_DAYS)
+    statement = select(func.count()).select_from(TaskCompletion).where(criteria, TaskCompletion.completed_at >= since)
+    return (await session.exec(statement)).one()
+
+
+def _stats_fields(stats: Optional[CompletionStats], recent: int) -> dict:
+    fields = {"completions_30d": recent}
+    if stats is not None:
+        fields.update(stats.model_dump(include=set(CompletionStats.model_fields)))
+        if stats.total_completions:
+            fields["adherence"] = stats.on_time_completions / stats.total_completions
+    return fields
+
+
+def _parse_ids(ids: str) -> List[int]:
+    """Parse ``ids=1,2,3`` into sorted unique ids, at most MAX_PAGE_SIZE of them."""
+    try:
+        task_ids = sorted({int(value) for value in ids.split(",") if value.strip()})
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be a comma-separated list of integers"
+        )
+    if not task_ids or len(task_ids) > MAX_PAGE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Pass between 1 and {MAX_PAGE_SIZE} ids"
+        )
+    return task_ids
+
+
+async def _list_validators(session: DBSession, criteria, *params) -> dict:
+    """Validators for a task list from one aggregate query, without loading rows.
+
+    Any insert, update or delete within ``criteria`` changes the count, the
+    highest id or the latest ``updated_at``. Only the ETag is used for
+    revalidation: a deletion does not move Last-Modified forward.
+    """
+    statement = select(func.count(Task.id), func.max(Task.id), func.max(Task.updated_at))
+    if criteria is not None:
+        statement = statement.where(criteria)
+    # One aggregate row per shard
+    rows = [rows[0] for rows in await fan_out(session, statement)]
+    count = sum(row[0] for row in rows)
+    max_id = max((row[1] for row in rows if row[1] is not None), default=None)
+    last_modified = max((row[2] for row in rows if row[2] is not None), default=None)
+    headers = validator_headers(make_etag(count, max_id, last_modified, *params), last_modified)
+    # Lists come in several representations, see list_media_type
+    headers["Vary"] = "Accept"
+    return headers
+
+
+def _list_columns(projection, order: ListOrder) -> tuple:
+    """The projection's columns, plus ``next_due_at`` as a trailing sort key if needed."""
+    columns = task_columns(projection)
+    if order == "due" and "next_due_at" not in projection:
+        columns += (Task.next_due_at,)
+    return columns
+
+
+def _ordered_list(statement, order: ListOrder, cursor: Optional[str]) -> list:
+    """Order a task list statement and start it after ``cursor``'s position.
+
+    Returns the statements to read in turn until a page is full. "due" lists
+    walk the ``(next_due_at, id)`` indexes, with unscheduled tasks (no due
+    time) after every scheduled one. A cursor among the scheduled tasks
+    splits the rest into two index range reads; one query with an OR over
+    both would scan the index from its start.
+    """
+    if order == "id":
+        statement = statement.order_by(Task.id)
+        if cursor is not None:
+            statement = statement.where(Task.id > decode_id_cursor(cursor))
+        return [statement]
+
+    if cursor is None:
+        return [statement.order_by(Task.next_due_at.asc().nulls_last(), Task.id)]
+    position = decode_cursor(cursor)
+    due, last_id = position.get("due"), position.get("id")
+    try:
+        due = datetime.fromisoformat(due) if due is not None else None
+    except (TypeError, ValueError):
+        last_id = None
+    if not isinstance(last_id, int):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    unscheduled = statement.where(Task.next_due_at.is_(None)).order_by(Task.id)
+    if due is None:
+        return [unscheduled.where(Task.id > last_id)]
+    scheduled = statement.where(tuple_(Task.next_due_at, Task.id) > tuple_(due, last_id))
+    return [scheduled.order_by(Task.next_due_at, Task.id), unscheduled]
+
+
+async def _read_page(
+    session: DBSession, statements: list, limit: int, response: Response, order: ListOrder = "id", skip: int = 0
+) -> list:
+    """Fetch one page from ``_ordered_list`` statements and set the next-page cursor header."""
+    key = _by_id if order == "id" else _by_due
+    rows: list = []
+    for statement in statements:
+        wanted = limit + 1 - len(rows)
+        if fans_out(session):
+            # Each shard returns its first skip + wanted rows; the merge drops the skipped ones
+            rows += merge_rows(await fan_out(session, statement.limit(skip + wanted)), key, wanted, skip)
+        else:
+            if skip:
+                statement = statement.offset(skip)
+            rows += (await session.exec(statement.limit(wanted))).all()
+        if len(rows) > limit:
+            break
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        if order == "id":
+            position = {"id": last.id}
+        else:
+            position = {"due": last.next_due_at.isoformat() if last.next_due_at else None, "id": last.id}
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(position)
+    return rows
+
+
+@router.get("/tasks/due", response_model=List[TaskReadSchema])
+async def read_due_tasks(
     current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session)
+    session: DBSession = Depends(get_session),
+    before: Optional[datetime] = None,
+    assigned_to: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
 ):
-    """Get tasks assigned to the current user."""
-    statement = select(Task).where(Task.assigned_to == current_user.id)
-    tasks = session.exec(statement).all()
-    return tasks
+    """Get tasks due at or before a point in time (default: now), soonest first."""
+    before = to_naive_utc(before) if before else utc_now()
+    statement = (
+        select(*TASK_READ_COLUMNS)
+        .where(Task.next_due_at.is_not(None), Task.next_due_at <= before)
+        .order_by(Task.next_due_at, Task.id)
+        .limit(limit)
+    )
+    if assigned_to is not None:
+        statement = statement.where(Task.assigned_to == assigned_to)
+    pages = await fan_out(session, statement, user_id=assigned_to)
+    rows = merge_rows(pages, lambda row: (row.next_due_at, row.id), limit)
+    return json_rows_response(rows)
+
+
+@router.get("/tasks/search", response_model=List[TaskReadSchema])
+async def search_tasks(
+    response: Response,
+    q: str = Query(..., min_length=1, description="Words to find in the title or description"),
+    current_user: User = Depends(get_current_active_user),
+    session: DBSession = Depends(get_session),
+    assigned_to: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = Query(None, description="Comma-separated TaskRead fields to return")
+):
+    """Full-text search over task titles and descriptions, best matches first.
+
+    Every word must match; the last one also matches as a prefix. Pages are
+    keyed by ``(rank, id)``; pass ``X-Next-Cursor`` back as ``cursor``. With
+    task shards, each shard ranks its own matches and the results are merged.
+    """
+    projection = parse_fields(fields)
+    matches = match_tasks(q)
+    statement = (
+        select(*task_columns(projection), matches.c.rank)
+        .join(matches, matches.c.id == Task.id)
+        .order_by(matches.c.rank, Task.id)
+        .limit(limit + 1)
+    )
+    if assigned_to is not None:
+        statement = statement.where(Task.assigned_to == assigned_to)
+    if cursor is not None:
+        position = decode_cursor(cursor)
+        rank, last_id = position.get("rank"), position.get("id")
+        if not isinstance(rank, (int, float)) or not isinstance(last_id, int):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        statement = statement.where(or_(matches.c.rank > rank, and_(matches.c.rank == rank, Task.id > last_id)))
+
+    pages = await fan_out(session, statement, user_id=assigned_to)
+    rows = merge_rows(pages, lambda row: (row.rank, row.id), limit + 1)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor({"rank": rows[-1].rank, "id": rows[-1].id})
+    # The trailing rank column is not in the projection, so it is not serialised
+    return json_rows_response(rows, projection, headers=response.headers)
+
+
+@router.get("/tasks/export", response_class=StreamingResponse)
+async def export_tasks(
+    current_user: User = Depends(get_current_active_user),
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    assigned_to: Optional[int] = None,
+    due_after: Optional[datetime] = None,
+    due_before: Optional[datetime] = None
+):
+    """Stream every matching task as NDJSON or CSV.
+
+    Rows are read from a server-side cursor and written as they arrive, so
+    memory use does not grow with the number of tasks. With task shards, the
+    shards are exported one after another, each ordered by id.
+    """
+    statement = select(*EXPORT_COLUMNS).order_by(Task.id)
+    if assigned_to is not None:
+        statement = statement.where(Task.assigned_to == assigned_to)
+    if due_after is not None:
+        statement = statement.where(Task.next_due_at >= to_naive_utc(due_after))
+    if due_before is not None:
+        statement = statement.where(Task.next_due_at <= to_naive_utc(due_before))
+
+    encode = ndjson_chunks if export_format == "ndjson" else csv_chunks
+    return StreamingResponse(
+        encode(stream_shards(statement)),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="tasks.{export_format}"'},
+    )
+
+
+@router.get("/tasks/changes", response_model=TaskChanges)
+async def read_task_changes(
+    current_user: User = Depends(get_current_active_user),
+    session: DBSession = Depends(get_task_session),
+    since: int = Query(0, ge=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+):
+    """Get the current user's tasks changed, and ids removed, after ``since``.
+
+    Start with ``since=0`` and pass ``next_since`` back on the next poll;
+    keep going while ``has_more`` is true. Both lookups are range scans of
+    the ``(assigned_to, change_seq)`` indexes.
+    """
+    tasks = (await session.exec(
+        select(Task)
+        .where(Task.assigned_to == current_user.id, Task.change_seq > since)
+        .order_by(Task.change_seq)
+        .limit(limit + 1)
+    )).all()
+    tombstones = (await session.exec(
+        select(TaskTombstone.change_seq, TaskTombstone.task_id)
+        .where(TaskTombstone.assigned_to == current_user.id, TaskTombstone.change_seq > since)
+        .order_by(TaskTombstone.change_seq)
+        .limit(limit + 1)
+    )).all()
+
+    entries = sorted(
+        [(task.change_seq, task) for task in tasks] + [(seq, task_id) for seq, task_id in tombstones],
+        key=lambda entry: entry[0],
+    )
+    page = entries[:limit]
+    changed = [entry for _, entry in page if isinstance(entry, Task)]
+    # A task row always carries its latest change, so it supersedes older tombstones
+    current_ids = {task.id for task in changed}
+    deleted = list(dict.fromkeys(
+        entry for _, entry in page if not isinstance(entry, Task) and entry not in current_ids
+    ))
+    return {
+        "changed": changed,
+        "deleted": deleted,
+        "next_since": page[-1][0] if page else since,
+        "has_more": len(entries) > limit,
+    }
+
+
+@router.get("/tasks/stream", response_class=StreamingResponse)
+async def stream_task_events(
+    current_user: User = Depends(get_current_active_user),
+    session: DBSession = Depends(get_session)
+):
+    """Push create, update, complete and delete events for the current user's tasks.
+
+    A Server-Sent Events stream with a keep-alive comment when idle. A client
+    that falls too far behind receives an ``overflow`` event and is
+    disconnected; it should resync via ``/tasks/changes`` and reconnect.
+    """
+    # The stream can stay open for hours; do not hold a pooled connection
+    await session.close()
+    subscription = task_events.subscribe(current_user.id)
+    return StreamingResponse(
+        sse_events(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/tasks/{task_id}", response_model=TaskReadSchema)
 async def read_task(
     task_id: int,
+    request: Request,
     current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session)
+    session: DBSession = Depends(get_session),
+    fields: Optional[str] = Query(None, description="Comma-separated TaskRead fields to return")
 ):
     """Get a specific task by ID."""
-    task = session.get(Task, task_id)
-    if not task:
+    projection = parse_fields(fields)
+    # updated_at is selected separately for the validators, whatever the projection
+    statement = select(*task_columns(projection), Task.updated_at.label("validator")).where(Task.id == task_id)
+    async with task_session(session, current_user.id, task_id) as tasks:
+        row = (await tasks.exec(statement)).first()
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found"
         )
-    return task
+    headers = validator_headers(make_etag(task_id, row.validator, projection), row.validator)
+    if is_not_modified(request, headers["ETag"], row.validator):
+        return not_modified(headers)
+    return json_row_response(row, projection, headers=headers)
+
+
+@router.get("/tasks/{task_id}/stats", response_model=TaskStatsRead)
+async def read_task_stats(
+    task_id: int,
+    current_user: User = Depends(get_current_active_user),
+    session: DBSession = Depends(get_session)
+):
+    """Completion statistics of a task, read from its rollup row."""
+    statement = (
+        select(Task.next_due_at, TaskStats)
+        .outerjoin(TaskStats, TaskStats.task_id == Task.id)
+        .where(Task.id == task_id)
+    )
+    async with task_session(session, current_user.id, task_id) as tasks:
+        row = (await tasks.exec(statement)).first()
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Task not found"
+            )
+        next_due_at, stats = row
+        fields = _stats_fields(stats, await _count_recent_completions(tasks, TaskCompletion.task_id == task_id))
+    if next_due_at is not None and next_due_at < utc_now():
+        # The streak ended when the due time passed, even before the next completion
+        fields["current_streak"] = 0
+    return TaskStatsRead(task_id=task_id, next_due_at=next_due_at, **fields)
 
 
 @router.put("/tasks/{task_id}", response_model=TaskReadSchema)
@@ -85,33 +519,50 @@ async def update_task(
     task_id: int,
     task_data: TaskUpdateSchema,
     current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session)
+    session: DBSession = Depends(get_session)
 ):
-    """Update a task."""
-    task = session.get(Task, task_id)
-    if not task:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Task not found"
-        )
-    
-    # If updating assigned_to, verify the user exists
-    if task_data.assigned_to is not None:
-        assigned_user = session.get(User, task_data.assigned_to)
-        if not assigned_user:
+    """Update a task.
+
+    With task shards, reassigning it to a user on another shard moves the
+    task, with its completion history, to that shard.
+    """
+    # Sharded updates may move the task between shards, so they are not queued
+    if task_write_behind.enabled and not shard_engines:
+        # Queued writes must not hold pooled connections the batch needs
+        await session.close()
+        return await task_write_behind.submit(task_id, partial(_apply_update, task_data=task_data))
+
+    async with task_session(session, current_user.id, task_id) as tasks:
+        task = await tasks.get(Task, task_id)
+        if not task:
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Assigned user not found"
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Task not found"
             )
-    
-    # Update task fields
-    task_dict = task_data.dict(exclude_unset=True)
-    for field, value in task_dict.items():
-        setattr(task, field, value)
-    
-    session.add(task)
-    session.commit()
-    session.refresh(task)
+        
+        # If updating assigned_to, verify the user exists
+        if task_data.assigned_to is not None:
+            assigned_user = await session.get(User, task_data.assigned_to)
+            if not assigned_user:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Assigned user not found"
+                )
+        
+        shard = await shard_for_user(session, task.assigned_to, write=True)
+        if task_data.assigned_to is not None:
+            shard = await shard_for_user(session, task_data.assigned_to, write=True)
+        task_dict = task_data.dict(exclude_unset=True)
+        if shard != tasks.info["shard"]:
+            return await move_task(tasks, task, shard, task_dict)
+        
+        # Update task fields
+        for field, value in task_dict.items():
+            setattr(task, field, value)
+        
+        tasks.add(task)
+        await tasks.commit()
+        await tasks.refresh(task)
     
     return task
 
@@ -121,10 +572,17 @@ async def complete_task(
     task_id: int,
     completion_data: TaskComplete,
     current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session)
+    session: DBSession = Depends(get_task_session)
 ):
     """Mark a task as completed."""
-    task = session.get(Task, task_id)
+    completed_at = completion_data.completed_at or utc_now()
+    if task_write_behind.enabled:
+        change = partial(_apply_completion, user_id=current_user.id, completed_at=completed_at)
+        shard = session.info["shard"]
+        await session.close()
+        return await task_write_behind.submit(task_id, change, shard)
+
+    task = await session.get(Task, task_id)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -139,30 +597,54 @@ async def complete_task(
         )
     
     # Set completion time
-    task.last_completed = completion_data.completed_at or datetime.utcnow()
+    task.last_completed = completed_at
     
     session.add(task)
-    session.commit()
-    session.refresh(task)
+    await session.commit()
+    await session.refresh(task)
     
     return task
 
 
+# Write-behind versions of update and complete, applied in a group commit
+
+
+def _apply_update(session: Session, task: Task, task_data: TaskUpdateSchema) -> None:
+    if task_data.assigned_to is not None and session.get(User, task_data.assigned_to) is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Assigned user not found"
+        )
+    for field, value in task_data.model_dump(exclude_unset=True).items():
+        setattr(task, field, value)
+
+
+def _apply_completion(session: Session, task: Task, user_id: int, completed_at: datetime) -> None:
+    if task.assigned_to != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You can only complete tasks assigned to you"
+        )
+    task.last_completed = completed_at
+
+
 @router.delete("/tasks/{task_id}")
 async def delete_task(
     task_id: int,
     current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session)
+    session: DBSession = Depends(get_session)
 ):
     """Delete a task."""
-    task = session.get(Task, task_id)
-    if not task:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Task not found"
-        )
-    
-    session.delete(task)
-    session.commit()
+    async with task_session(session, current_user.id, task_id) as tasks:
+        task = await tasks.get(Task, task_id)
+        if not task:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Task not found"
+            )
+        await shard_for_user(session, task.assigned_to, write=True)
+        
+        await tasks.delete(task)
+        await tasks.commit()
     
     return {"message": "Task deleted successfully"}
@@ -0,0 +1,268 @@
+import asyncio
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from fastapi import APIRouter, Depends, status
+from sqlmodel import Session, select
+from ..auth import get_current_active_user
+from ..cadence import utc_now
+from ..database import DBSession, get_session, open_session, shard_engines
+from ..profiling import ProfiledRoute
+from ..sharding import locate_tasks, shard_for_user, user_task_session
+from ..models.user import User
+from ..models.task import Task
+from ..schemas import (
+    TaskBatchComplete,
+    TaskBatchCompleteItem,
+    TaskBatchCreate,
+    TaskBatchDelete,
+    TaskBatchItemResult,
+    TaskBatchResult,
+    TaskBatchUpdate,
+    TaskBatchUpdateItem,
+    TaskCreate as TaskCreateSchema,
+    TaskRead as TaskReadSchema,
+)
+
+router = APIRouter(route_class=ProfiledRoute)
+
+# Each batch runs as one synchronous unit of work via session.run_sync, so a
+# request costs a single threadpool hop (or greenlet) and a single commit.
+# The ORM flush groups updates into executemany statements, and inserts too
+# where the dialect can match RETURNING rows to parameters (PostgreSQL);
+# SQLite inserts a row per statement, still inside the one transaction.
+# With task shards, each shard runs its share of the batch as one such unit,
+# and the shards run concurrently; users are always checked on the primary.
+
+
+def _ok(index: int, task: Task, status_code: int = status.HTTP_200_OK) -> TaskBatchItemResult:
+    return TaskBatchItemResult(
+        index=index,
+        status=status_code,
+        task=TaskReadSchema.model_validate(task, from_attributes=True),
+    )
+
+
+def _error(index: int, status_code: int, detail: str) -> TaskBatchItemResult:
+    return TaskBatchItemResult(index=index, status=status_code, detail=detail)
+
+
+def _existing_user_ids(session: Session, user_ids: Iterable[int]) -> Set[int]:
+    """Return which of the given user ids exist, using one IN query."""
+    ids = set(user_ids)
+    if not ids:
+        return set()
+    return set(session.exec(select(User.id).where(User.id.in_(ids))).all())
+
+
+def _tasks_by_id(session: Session, task_ids: Iterable[int]) -> Dict[int, Task]:
+    """Load the given tasks with one IN query."""
+    statement = select(Task).where(Task.id.in_(set(task_ids)))
+    return {task.id: task for task in session.exec(statement).all()}
+
+
+def _create_tasks(
+    session: Session, items: List[TaskCreateSchema], existing_users: Optional[Set[int]] = None
+) -> List[TaskBatchItemResult]:
+    if existing_users is None:
+        existing_users = _existing_user_ids(session, (item.assigned_to for item in items))
+    results: List[Optional[TaskBatchItemResult]] = [None] * len(items)
+    created = []
+    for index, item in enumerate(items):
+        if item.assigned_to not in existing_users:
+            results[index] = _error(index, status.HTTP_400_BAD_REQUEST, "Assigned user not found")
+            continue
+        created.append((index, Task(
+            title=item.title,
+            description=item.description,
+            cadence=item.cadence,
+            assigned_to=item.assigned_to
+        )))
+
+    session.add_all(task for _, task in created)
+    session.commit()
+
+    for index, task in created:
+        results[index] = _ok(index, task, status.HTTP_201_CREATED)
+    return results
+
+
+def _update_tasks(
+    session: Session, items: List[TaskBatchUpdateItem], existing_users: Optional[Set[int]] = None
+) -> List[TaskBatchItemResult]:
+    tasks = _tasks_by_id(session, (item.id for item in items))
+    if existing_users is None:
+        existing_users = _existing_user_ids(
+            session, (item.assigned_to for item in items if item.assigned_to is not None)
+        )
+    results: List[Optional[TaskBatchItemResult]] = [None] * len(items)
+    updated = []
+    for index, item in enumerate(items):
+        task = tasks.get(item.id)
+        if task is None:
+            results[index] = _error(index, status.HTTP_404_NOT_FOUND, "Task not found")
+            continue
+        if item.assigned_to is not None and item.assigned_to not in existing_users:
+            results[index] = _error(index, status.HTTP_400_BAD_REQUEST, "Assigned user not found")
+            continue
+        for field, value in item.model_dump(exclude_unset=True, exclude={"id"}).items():
+            setattr(task, field, value)
+        updated.append((index, task))
+
+    session.commit()
+
+    for index, task in updated:
+        results[index] = _ok(index, task)
+    return results
+
+
+def _complete_tasks(session: Session, items: List[TaskBatchCompleteItem], user_id: int) -> List[TaskBatchItemResult]:
+    tasks = _tasks_by_id(session, (item.id for item in items))
+    results: List[Optional[TaskBatchItemResult]] = [None] * len(items)
+    completed = []
+    now = utc_now()
+    for index, item in enumerate(items):
+        task = tasks.get(item.id)
+        if task is None:
+            results[index] = _error(index, status.HTTP_404_NOT_FOUND, "Task not found")
+            continue
+        if task.assigned_to != user_id:
+            results[index] = _error(
+                index, status.HTTP_403_FORBIDDEN, "You can only complete tasks assigned to you"
+            )
+            continue
+        task.last_completed = item.completed_at or now
+        completed.append((index, task))
+
+    session.commit()
+
+    for index, task in completed:
+        results[index] = _ok(index, task)
+    return results
+
+
+def _delete_tasks(session: Session, task_ids: List[int]) -> List[TaskBatchItemResult]:
+    tasks = _tasks_by_id(session, task_ids)
+    results = []
+    for index, task_id in enumerate(task_ids):
+        task = tasks.pop(task_id, None)
+        if task is None:
+            results.append(_error(index, status.HTTP_404_NOT_FOUND, "Task not found"))
+            continue
+        session.delete(task)
+        results.append(TaskBatchItemResult(
+            index=index, status=status.HTTP_200_OK, detail="Task deleted successfully"
+        ))
+
+    session.commit()
+    return results
+
+
+async def _run_by_shard(
+    shards: Dict[int, int],
+    apply: Callable[..., List[TaskBatchItemResult]],
+    items: list,
+    results: List[Optional[TaskBatchItemResult]],
+    *args,
+) -> List[TaskBatchItemResult]:
+    """Run ``apply`` once per shard on the items mapped to it (item index -> shard), concurrently.
+
+    Fills in ``results`` in request order; items not in ``shards`` keep theirs.
+    """
+    groups: Dict[int, List[int]] = {}
+    for index, shard in shards.items():
+        groups.setdefault(shard, []).append(index)
+
+    async def run(shard: int, indexes: List[int]) -> None:
+        async with open_session(shard=shard) as session:
+            shard_results = await session.run_sync(apply, [items[index] for index in indexes], *args)
+        for index, result in zip(indexes, shard_results):
+            result.index = index
+            results[index] = result
+
+    await asyncio.gather(*(run(shard, indexes) for shard, indexes in groups.items()))
+    return results
+
+
+@router.post("/tasks:batch", response_model=TaskBatchResult)
+async def create_tasks_batch(
+    batch: TaskBatchCreate,
+    current_user: User = Depends(get_current_active_user),
+    session: DBSession = Depends(get_session)
+):
+    """Create many tasks in one transaction, reporting a result per item."""
+    if not shard_engines:
+        results = await session.run_sync(_create_tasks, batch.items)
+        return TaskBatchResult(results=results)
+
+    existing_users = await session.run_sync(_existing_user_ids, (item.assigned_to for item in batch.items))
+    shards = {
+        index: await shard_for_user(session, item.assigned_to, write=True)
+        for index, item in enumerate(batch.items)
+    }
+    results = await _run_by_shard(shards, _create_tasks, batch.items, [None] * len(batch.items), existing_users)
+    return TaskBatchResult(results=results)
+
+
+@router.put("/tasks:batch", response_model=TaskBatchResult)
+async def update_tasks_batch(
+    batch: TaskBatchUpdate,
+    current_user: User = Depends(get_current_active_user),
+    session: DBSession = Depends(get_session)
+):
+    """Update many tasks in one transaction, reporting a result per item.
+
+    With task shards, reassigning a task to a user on another shard is
+    refused (409) here; ``PUT /api/tasks/{task_id}`` moves it.
+    """
+    if not shard_engines:
+        results = await session.run_sync(_update_tasks, batch.items)
+        return TaskBatchResult(results=results)
+
+    existing_users = await session.run_sync(
+        _existing_user_ids, (item.assigned_to for item in batch.items if item.assigned_to is not None)
+    )
+    located = await locate_tasks(session, (item.id for item in batch.items))
+    own = await shard_for_user(session, current_user.id)
+    results: List[Optional[TaskBatchItemResult]] = [None] * len(batch.items)
+    shards = {}
+    for index, item in enumerate(batch.items):
+        # Unknown ids go to the caller's shard, which reports them as not found
+        shard = located.get(item.id, own)
+        if item.id in located and item.assigned_to in existing_users:
+            if await shard_for_user(session, item.assigned_to, write=True) != shard:
+                results[index] = _error(
+                    index, status.HTTP_409_CONFLICT, "Assigned user's tasks are on another shard"
+                )
+                continue
+        shards[index] = shard
+    results = await _run_by_shard(shards, _update_tasks, batch.items, results, existing_users)
+    return TaskBatchResult(results=results)
+
+
+@router.post("/tasks:batchComplete", response_model=TaskBatchResult)
+async def complete_tasks_batch(
+    batch: TaskBatchComplete,
+    current_user: User = Depends(get_current_active_user),
+    session: DBSession = Depends(get_session)
+):
+    """Mark many tasks as completed in one transaction (only tasks assigned to you)."""
+    async with user_task_session(session, current_user.id, write=True) as tasks:
+        results = await tasks.run_sync(_complete_tasks, batch.items, current_user.id)
+    return TaskBatchResult(results=results)
+
+
+@router.post("/tasks:batchDelete", response_model=TaskBatchResult)
+async def delete_tasks_batch(
+    batch: TaskBatchDelete,
+    current_user: User = Depends(get_current_active_user),
+    session: DBSession = Depends(get_session)
+):
+    """Delete many tasks in one transaction, reporting a result per item."""
+    if not shard_engines:
+        results = await session.run_sync(_delete_tasks, batch.ids)
+        return TaskBatchResult(results=results)
+
+    located = await locate_tasks(session, batch.ids)
+    own = await shard_for_user(session, current_user.id)
+    shards = {index: located.get(task_id, own) for index, task_id in enumerate(batch.ids)}
+    results = await _run_by_shard(shards, _delete_tasks, batch.ids, [None] * len(batch.ids))
+    return TaskBatchResult(results=results)
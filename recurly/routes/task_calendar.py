@@ -0,0 +1,134 @@
+import os
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlmodel import func, select
+from starlette.concurrency import run_in_threadpool
+from ..auth import create_calendar_token, get_calendar_user, get_current_active_user
+from ..cadence import to_naive_utc, utc_now
+from ..conditional import is_not_modified, make_etag, not_modified, validator_headers
+from ..database import DBSession, get_session
+from ..ical import CALENDAR_MEDIA_TYPE, CachedFeed, feed_cache, feed_window, render_calendar
+from ..occurrences import OCCURRENCE_COLUMNS, expand
+from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from ..profiling import ProfiledRoute
+from ..serialization import dumps
+from ..sharding import get_task_session, user_task_session
+from ..models.user import User
+from ..models.task import Task
+from ..schemas import CalendarFeedRead, OccurrenceRead
+
+router = APIRouter(route_class=ProfiledRoute)
+
+# Configuration
+# Window of GET /tasks/occurrences when "to" is not given
+OCCURRENCE_DEFAULT_DAYS = 30
+OCCURRENCE_MAX_WINDOW_DAYS = int(os.getenv("OCCURRENCE_MAX_WINDOW_DAYS", "366"))
+
+
+async def _scheduled_tasks(session: DBSession, user_id: int, end: datetime) -> list:
+    """The user's tasks with at least one occurrence before ``end``."""
+    statement = (
+        select(*OCCURRENCE_COLUMNS)
+        .where(Task.assigned_to == user_id, Task.next_due_at.is_not(None), Task.next_due_at < end)
+        .order_by(Task.id)
+    )
+    return list((await session.exec(statement)).all())
+
+
+@router.get("/tasks/occurrences", response_model=List[OccurrenceRead])
+async def read_occurrences(
+    response: Response,
+    current_user: User = Depends(get_current_active_user),
+    session: DBSession = Depends(get_task_session),
+    start: Optional[datetime] = Query(None, alias="from", description="Start of the window (default: now)"),
+    end: Optional[datetime] = Query(None, alias="to", description="End of the window, exclusive (default: 30 days on)"),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+):
+    """Expand the current user's recurring tasks into due times within a window.
+
+    Occurrences are ordered by ``(due_at, task_id)``. A task's first one is
+    its outstanding due time, which may be overdue; later ones assume it is
+    completed on time. Pass ``X-Next-Cursor`` back as ``cursor`` for more.
+    """
+    start = to_naive_utc(start) if start else utc_now()
+    end = to_naive_utc(end) if end else start + timedelta(days=OCCURRENCE_DEFAULT_DAYS)
+    if not start < end <= start + timedelta(days=OCCURRENCE_MAX_WINDOW_DAYS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"'to' must be after 'from' and at most {OCCURRENCE_MAX_WINDOW_DAYS} days later"
+        )
+
+    after = None
+    if cursor is not None:
+        position = decode_cursor(cursor)
+        try:
+            after = (datetime.fromisoformat(position["at"]), position["id"])
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        start = max(start, after[0])
+
+    occurrences = expand(await _scheduled_tasks(session, current_user.id, end), start, end)
+    if after is not None:
+        occurrences = (item for item in occurrences if (item.due_at, item.task_id) > after)
+    page = list(islice(occurrences, limit + 1))
+    if len(page) > limit:
+        page = page[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor({"at": page[-1].due_at.isoformat(), "id": page[-1].task_id})
+    content = [
+        {"task_id": item.task_id, "title": item.task.title, "description": item.task.description, "due_at": item.due_at}
+        for item in page
+    ]
+    return Response(dumps(content), headers=response.headers, media_type="application/json")
+
+
+@router.get("/tasks/calendar", response_model=CalendarFeedRead)
+async def read_calendar_subscription(
+    request: Request,
+    current_user: User = Depends(get_current_active_user)
+):
+    """URL of the current user's iCalendar feed, for subscribing from a calendar app.
+
+    The URL carries a token that only reads the feed and stays valid for
+    ``CALENDAR_TOKEN_EXPIRE_DAYS``, or until the user's tokens are revoked.
+    """
+    url = request.url_for("read_calendar_feed").include_query_params(token=create_calendar_token(current_user))
+    return CalendarFeedRead(url=str(url))
+
+
+@router.get("/tasks/calendar.ics", response_class=Response)
+async def read_calendar_feed(
+    request: Request,
+    token: str = Query(..., description="Feed token from GET /api/tasks/calendar"),
+    session: DBSession = Depends(get_session)
+):
+    """The token owner's task occurrences as an iCalendar feed.
+
+    Rendered feeds are cached per user and re-rendered only when one of the
+    user's tasks changes (or a new day moves the window), which one indexed
+    aggregate query detects; polls send the ETag and get 304 until then.
+    """
+    user = await get_calendar_user(token, session)
+    start, end = feed_window(utc_now())
+    async with user_task_session(session, user.id) as tasks:
+        # Every task write stamps a new, higher change_seq; deletions lower the count
+        statement = select(func.count(Task.id), func.max(Task.change_seq)).where(Task.assigned_to == user.id)
+        count, last_change = (await tasks.exec(statement)).one()
+        validator = (tasks.info.get("shard"), count, last_change, start)
+        headers = validator_headers(make_etag(user.id, *validator))
+        if is_not_modified(request, headers["ETag"]):
+            return not_modified(headers)
+
+        cached = feed_cache.get(user.id)
+        if cached is None or cached.validator != validator:
+            # Read after the validator, so a concurrent write only makes the body newer
+            rows = await _scheduled_tasks(tasks, user.id, end)
+            body = await run_in_threadpool(render_calendar, expand(rows, start, end))
+            cached = CachedFeed(validator, body)
+            feed_cache.set(user.id, cached)
+    return Response(cached.body, headers=headers, media_type=CALENDAR_MEDIA_TYPE)
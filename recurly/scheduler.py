@@ -0,0 +1,429 @@
+import asyncio
+import heapq
+import logging
+import os
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import httpx
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import Session as ORMSession
+from sqlmodel import Session, select
+from .cadence import utc_now
+from .database import dispose_engines, open_session, shard_engines
+from .models.reminder import TaskReminder
+from .models.task import Task, TaskTombstone
+
+# Configuration
+# Run the scheduler inside the API process; enable it in one worker only
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "false").lower() in ("1", "true", "yes")
+SCHEDULER_SINK = os.getenv("SCHEDULER_SINK", "log")  # "log", "webhook" or "outbox"
+SCHEDULER_WEBHOOK_URL = os.getenv("SCHEDULER_WEBHOOK_URL", "http://127.0.0.1:8080/reminders")
+# Only due times within this window are held in memory
+SCHEDULER_HORIZON_SECONDS = float(os.getenv("SCHEDULER_HORIZON_SECONDS", "3600"))
+# Upper bound on scheduled tasks held in memory; the window shrinks to fit
+SCHEDULER_MAX_LOADED = int(os.getenv("SCHEDULER_MAX_LOADED", "100000"))
+# On start, reminders that fell due this recently are still sent
+SCHEDULER_CATCHUP_SECONDS = float(os.getenv("SCHEDULER_CATCHUP_SECONDS", "300"))
+# How often the scheduler polls for task changes, including other workers' writes
+SCHEDULER_POLL_SECONDS = float(os.getenv("SCHEDULER_POLL_SECONDS", "5"))
+
+# Rows per IN query / change poll
+_BATCH_SIZE = 500
+
+logger = logging.getLogger(__name__)
+
+
+class Reminder(NamedTuple):
+    """A task that has become due."""
+    task_id: int
+    assigned_to: int
+    title: str
+    due_at: datetime
+
+
+class ReminderSink(ABC):
+    """Where reminders are delivered."""
+
+    @abstractmethod
+    async def send(self, reminders: Sequence[Reminder]) -> None:
+        """Deliver a batch of reminders, soonest first."""
+
+    async def close(self) -> None:
+        pass
+
+
+class LogSink(ReminderSink):
+    """Log each reminder; useful in development."""
+
+    async def send(self, reminders: Sequence[Reminder]) -> None:
+        for reminder in reminders:
+            logger.info(
+                "Task %d (%r) for user %d is due at %s",
+                reminder.task_id, reminder.title, reminder.assigned_to, reminder.due_at.isoformat(),
+            )
+
+
+class WebhookSink(ReminderSink):
+    """POST reminders as JSON to a (local) webhook, one request per batch."""
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url
+        self._client = httpx.AsyncClient(timeout=timeout)
+
+    async def send(self, reminders: Sequence[Reminder]) -> None:
+        payload = {"reminders": [
+            {**reminder._asdict(), "due_at": reminder.due_at.isoformat()} for reminder in reminders
+        ]}
+        try:
+            response = await self._client.post(self.url, json=payload)
+            response.raise_for_status()
+        except httpx.HTTPError as exc:
+            logger.warning("Reminder webhook failed for %d reminders: %s", len(reminders), exc)
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+class OutboxSink(ReminderSink):
+    """Insert reminders into the task_reminders table for another process to deliver.
+
+    Each (task_id, due_at) is recorded once, so replays after a restart are harmless.
+    """
+
+    async def send(self, reminders: Sequence[Reminder]) -> None:
+        async with open_session() as session:
+            await session.run_sync(_write_outbox, reminders)
+
+
+def _write_outbox(session: Session, reminders: Sequence[Reminder]) -> None:
+    existing = set(session.exec(
+        select(TaskReminder.task_id, TaskReminder.due_at)
+        .where(TaskReminder.task_id.in_({reminder.task_id for reminder in reminders}))
+    ).all())
+    session.add_all(
+        TaskReminder(**reminder._asdict())
+        for reminder in reminders
+        if (reminder.task_id, reminder.due_at) not in existing
+    )
+    session.commit()
+
+
+SINKS: Dict[str, Callable[[], ReminderSink]] = {
+    "log": LogSink,
+    "webhook": lambda: WebhookSink(SCHEDULER_WEBHOOK_URL),
+    "outbox": OutboxSink,
+}
+
+
+def build_sink(name: str = SCHEDULER_SINK) -> ReminderSink:
+    if name not in SINKS:
+        raise ValueError(f"Unknown SCHEDULER_SINK {name!r}; expected one of {sorted(SINKS)}")
+    return SINKS[name]()
+
+
+def _chunks(values: Sequence, size: int = _BATCH_SIZE) -> Iterable[Sequence]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class ReminderScheduler:
+    """Fires reminders when tasks fall due, from a min-heap of due times.
+
+    Only tasks due before ``loaded_until`` (at most ``horizon`` ahead, and at
+    most ``max_loaded`` of them) are held in memory. The window is refilled
+    from the ``next_due_at`` index as time advances, so memory is bounded
+    however many tasks exist and a restart only reads one window.
+
+    Changes arrive incrementally by polling the delta-sync change sequence
+    every ``poll_interval`` seconds, which sees writes from every process.
+    In-process, ``notify`` (fed by the commit hooks below) also applies this
+    worker's own writes at once. Superseded heap entries are skipped lazily,
+    and every due reminder is re-checked against the database before it is
+    sent.
+    """
+
+    def __init__(
+        self,
+        sink: ReminderSink,
+        horizon: float = SCHEDULER_HORIZON_SECONDS,
+        max_loaded: int = SCHEDULER_MAX_LOADED,
+        catchup: float = SCHEDULER_CATCHUP_SECONDS,
+        poll_interval: Optional[float] = None,
+        clock: Callable[[], datetime] = utc_now,
+    ):
+        self.sink = sink
+        self.horizon = timedelta(seconds=horizon)
+        self.max_loaded = max_loaded
+        self.catchup = timedelta(seconds=catchup)
+        self.poll_interval = poll_interval
+        self.fired = 0
+        self._clock = clock
+        self._heap: List[Tuple[datetime, int]] = []
+        self._due: Dict[int, datetime] = {}
+        self._loaded_until: Optional[datetime] = None
+        self._last_seq = 0
+        self._refilling = False
+        self._deferred: List[Tuple[int, Optional[datetime]]] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def notify(self, changes: List[Tuple[int, Optional[datetime]]]) -> None:
+        """Apply ``(task_id, next_due_at)`` changes; safe to call from any thread."""
+        loop = self._loop
+        if loop is None or loop.is_closed() or not changes:
+            return
+        loop.call_soon_threadsafe(self._apply_changes, changes)
+
+    def _apply_changes(self, changes: Iterable[Tuple[int, Optional[datetime]]]) -> None:
+        changes = list(changes)
+        if self._refilling:
+            # The refill query may predate these commits; re-apply once it lands
+            self._deferred.extend(changes)
+        for task_id, due in changes:
+            self._schedule(task_id, due)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _schedule(self, task_id: int, due: Optional[datetime]) -> None:
+        if due is None or self._loaded_until is None or due > self._loaded_until:
+            # Not (or no longer) in the window; any heap entry is now stale
+            self._due.pop(task_id, None)
+            return
+        if self._due.get(task_id) == due:
+            return
+        if task_id not in self._due and len(self._due) >= self.max_loaded:
+            # Full: end the window just before this task rather than exceed the bound
+            self._shrink_window(due - timedelta(microseconds=1))
+            return
+        self._due[task_id] = due
+        heapq.heappush(self._heap, (due, task_id))
+        if len(self._heap) > 2 * len(self._due) + 1024:
+            self._heap = [(due, task_id) for task_id, due in self._due.items()]
+            heapq.heapify(self._heap)
+
+    def _shrink_window(self, until: datetime) -> None:
+        """Unload tasks due after ``until``; a later refill reads them again."""
+        self._loaded_until = until
+        self._due = {task_id: due for task_id, due in self._due.items() if due <= until}
+
+    async def refill(self, now: datetime) -> None:
+        """Extend the window to ``now + horizon`` from the next_due_at index."""
+        budget = self.max_loaded - len(self._due)
+        if budget <= 0:
+            return
+        start = self._loaded_until if self._loaded_until is not None else now - self.catchup
+        until = now + self.horizon
+        if until <= start:
+            return
+        statement = (
+            select(Task.id, Task.next_due_at)
+            .where(Task.next_due_at > start, Task.next_due_at <= until)
+            .order_by(Task.next_due_at)
+            .limit(budget + 1)
+        )
+        self._refilling = True
+        try:
+            async with open_session() as session:
+                rows = (await session.exec(statement)).all()
+        finally:
+            self._refilling = False
+        if len(rows) > budget:
+            # Stop the window just before the first row that did not fit
+            until = rows[budget].next_due_at - timedelta(microseconds=1)
+            rows = [row for row in rows[:budget] if row.next_due_at <= until]
+            if until <= start:
+                self._deferred.clear()
+                return
+        self._loaded_until = until
+        for row in rows:
+            self._schedule(row.id, row.next_due_at)
+        deferred, self._deferred = self._deferred, []
+        for task_id, due in deferred:
+            self._schedule(task_id, due)
+
+    async def poll_changes(self) -> None:
+        """Apply task writes and deletions committed since the last poll."""
+        async with open_session() as session:
+            task_rows = (await session.exec(
+                select(Task.change_seq, Task.id)
+                .where(Task.change_seq > self._last_seq)
+                .order_by(Task.change_seq)
+                .limit(_BATCH_SIZE)
+            )).all()
+            tombstone_rows = (await session.exec(
+                select(TaskTombstone.change_seq, TaskTombstone.task_id)
+                .where(TaskTombstone.change_seq > self._last_seq)
+                .order_by(TaskTombstone.change_seq)
+                .limit(_BATCH_SIZE)
+            )).all()
+            # With a full batch from either source, only advance as far as both are complete
+            truncated = [rows[-1].change_seq for rows in (task_rows, tombstone_rows) if len(rows) == _BATCH_SIZE]
+            seqs = [row.change_seq for row in task_rows] + [row.change_seq for row in tombstone_rows]
+            if not seqs:
+                return
+            upto = min(truncated) if truncated else max(seqs)
+            task_ids = sorted({task_id for seq, task_id in [*task_rows, *tombstone_rows] if seq <= upto})
+
+            # Tombstones also mark reassignment, so read the current state of every id
+            current: Dict[int, Optional[datetime]] = dict.fromkeys(task_ids)
+            for chunk in _chunks(task_ids):
+                rows = (await session.exec(
+                    select(Task.id, Task.next_due_at).where(Task.id.in_(chunk))
+                )).all()
+                current.update((row.id, row.next_due_at) for row in rows)
+        self._last_seq = upto
+        self._apply_changes(current.items())
+
+    async def fire(self, now: datetime) -> None:
+        """Send reminders for every loaded task due at or before ``now``."""
+        expected: Dict[int, datetime] = {}
+        while self._heap and self._heap[0][0] <= now:
+            due, task_id = heapq.heappop(self._heap)
+            if self._due.get(task_id) == due:
+                del self._due[task_id]
+                expected[task_id] = due
+        if not expected:
+            return
+
+        # The schedule may have changed since it was loaded; only send confirmed ones
+        reminders: List[Reminder] = []
+        async with open_session() as session:
+            for chunk in _chunks(sorted(expected)):
+                rows = (await session.exec(
+                    select(Task.id, Task.assigned_to, Task.title, Task.next_due_at)
+                    .where(Task.id.in_(chunk))
+                )).all()
+                reminders.extend(
+                    Reminder(row.id, row.assigned_to, row.title, row.next_due_at)
+                    for row in rows if row.next_due_at == expected[row.id]
+                )
+        if reminders:
+            reminders.sort(key=lambda reminder: reminder.due_at)
+            await self.sink.send(reminders)
+            self.fired += len(reminders)
+
+    async def _max_change_seq(self) -> int:
+        async with open_session() as session:
+            tasks = (await session.exec(select(func.max(Task.change_seq)))).one()
+            tombstones = (await session.exec(select(func.max(TaskTombstone.change_seq)))).one()
+        return max(tasks or 0, tombstones or 0)
+
+    def _next_wakeup(self, now: datetime) -> float:
+        deadlines = []
+        if self._heap:
+            deadlines.append((self._heap[0][0] - now).total_seconds())
+        if self._loaded_until is not None and len(self._due) < self.max_loaded:
+            deadlines.append((self._loaded_until - self.horizon / 2 - now).total_seconds())
+        if self.poll_interval:
+            deadlines.append(self.poll_interval)
+        return max(0.01, min(deadlines, default=self.horizon.total_seconds() / 2))
+
+    async def run(self) -> None:
+        """Schedule reminders until cancelled."""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        if self.poll_interval:
+            # Start the change feed before the first window so no write is missed
+            self._last_seq = await self._max_change_seq()
+        next_poll = self._loop.time()
+        while True:
+            try:
+                now = self._clock()
+                if self._loaded_until is None or self._loaded_until - now < self.horizon / 2:
+                    await self.refill(now)
+                if self.poll_interval and self._loop.time() >= next_poll:
+                    await self.poll_changes()
+                    next_poll = self._loop.time() + self.poll_interval
+                await self.fire(now)
+                timeout = self._next_wakeup(self._clock())
+            except Exception:
+                logger.exception("Reminder scheduler iteration failed; retrying")
+                timeout = 1.0
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+
+# The scheduler running inside this process, fed by the commit hooks below
+active_scheduler: Optional[ReminderScheduler] = None
+_scheduler_task: Optional["asyncio.Task[None]"] = None
+
+
+def start_scheduler(sink: Optional[ReminderSink] = None) -> ReminderScheduler:
+    """Run a scheduler in the background of the current event loop."""
+    global active_scheduler, _scheduler_task
+    if shard_engines:
+        raise ValueError(
+            "The in-process scheduler reads DATABASE_URL only; with TASK_SHARD_URLS, "
+            "run python -m recurly.scheduler with DATABASE_URL set to each shard"
+        )
+    # Other workers' writes only reach this scheduler through the change feed
+    active_scheduler = ReminderScheduler(sink or build_sink(), poll_interval=SCHEDULER_POLL_SECONDS)
+    _scheduler_task = asyncio.get_running_loop().create_task(active_scheduler.run())
+    return active_scheduler
+
+
+async def stop_scheduler() -> None:
+    global active_scheduler, _scheduler_task
+    if _scheduler_task is None:
+        return
+    _scheduler_task.cancel()
+    try:
+        await _scheduler_task
+    except asyncio.CancelledError:
+        pass
+    await active_scheduler.sink.close()
+    active_scheduler = _scheduler_task = None
+
+
+@event.listens_for(ORMSession, "after_flush")
+def _collect_schedule_changes(session: ORMSession, flush_context) -> None:
+    if active_scheduler is None:
+        return
+    changes = session.info.setdefault("schedule_changes", [])
+    for task in session.new:
+        if isinstance(task, Task):
+            changes.append((task.id, task.next_due_at))
+    for task in session.dirty:
+        if isinstance(task, Task) and inspect(task).attrs.next_due_at.history.has_changes():
+            changes.append((task.id, task.next_due_at))
+    for task in session.deleted:
+        if isinstance(task, Task):
+            changes.append((task.id, None))
+
+
+@event.listens_for(ORMSession, "after_commit")
+def _notify_scheduler(session: ORMSession) -> None:
+    changes = session.info.pop("schedule_changes", None)
+    if changes and active_scheduler is not None:
+        active_scheduler.notify(changes)
+
+
+@event.listens_for(ORMSession, "after_rollback")
+def _discard_schedule_changes(session: ORMSession) -> None:
+    session.info.pop("schedule_changes", None)
+
+
+async def main() -> None:
+    """Standalone scheduler, for when no API worker runs one."""
+    scheduler = ReminderScheduler(build_sink(), poll_interval=SCHEDULER_POLL_SECONDS)
+    logger.info("Reminder scheduler started (sink=%s)", SCHEDULER_SINK)
+    try:
+        await scheduler.run()
+    finally:
+        await scheduler.sink.close()
+        await dispose_engines()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
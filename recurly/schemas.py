@@ -1,12 +1,26 @@
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field, field_validator
+
+# Maximum number of items accepted by a single batch request
+MAX_BATCH_SIZE = 1000
 
 
 class Token(BaseModel):
     """Token response schema."""
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+
+class TokenRefresh(BaseModel):
+    """Refresh request schema."""
+    refresh_token: str
+
+
+class Logout(BaseModel):
+    """Logout request schema; the refresh token, if given, is revoked too."""
+    refresh_token: Optional[str] = None
 
 
 class TokenData(BaseModel):
@@ -51,11 +65,112 @@ class TaskRead(BaseModel):
     description: Optional[str] = None
     cadence: str
     last_completed: Optional[datetime] = None
+    next_due_at: Optional[datetime] = None
     assigned_to: int
     created_at: datetime
     updated_at: datetime
 
 
+class TaskChanges(BaseModel):
+    """Delta-sync response schema."""
+    changed: List[TaskRead]
+    deleted: List[int]
+    next_since: int
+    has_more: bool
+
+
 class TaskComplete(BaseModel):
     """Task completion schema."""
     completed_at: Optional[datetime] = None
+
+
+class CompletionStatsRead(BaseModel):
+    """Completion rollups shared by the task and user statistics."""
+    total_completions: int = 0
+    on_time_completions: int = 0
+    adherence: Optional[float] = None  # Share of completions made on time; None before the first
+    current_streak: int = 0
+    longest_streak: int = 0
+    completions_30d: int = 0
+    last_completed_at: Optional[datetime] = None
+
+
+class TaskStatsRead(CompletionStatsRead):
+    """Completion statistics of one task."""
+    task_id: int
+    next_due_at: Optional[datetime] = None
+
+
+class UserTaskStatsRead(CompletionStatsRead):
+    """Completion statistics over every task a user completed."""
+    user_id: int
+
+
+class OccurrenceRead(BaseModel):
+    """One upcoming (or overdue) due time of a recurring task."""
+    task_id: int
+    title: str
+    description: Optional[str] = None
+    due_at: datetime
+
+
+class CalendarFeedRead(BaseModel):
+    """Subscription URL of a user's iCalendar feed."""
+    url: str
+
+
+class TaskBatchUpdateItem(TaskUpdate):
+    """Single item of a batch update."""
+    id: int
+
+
+class TaskBatchCompleteItem(TaskComplete):
+    """Single item of a batch completion."""
+    id: int
+
+
+class TaskBatchCreate(BaseModel):
+    """Batch task creation schema."""
+    items: List[TaskCreate] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+def _unique_task_ids(items: list) -> list:
+    """Reject a batch naming a task twice; its items would overwrite each other."""
+    seen = set()
+    for item in items:
+        if item.id in seen:
+            raise ValueError(f"Task {item.id} appears more than once")
+        seen.add(item.id)
+    return items
+
+
+class TaskBatchUpdate(BaseModel):
+    """Batch task update schema."""
+    items: List[TaskBatchUpdateItem] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+    _unique_ids = field_validator("items")(_unique_task_ids)
+
+
+class TaskBatchComplete(BaseModel):
+    """Batch task completion schema."""
+    items: List[TaskBatchCompleteItem] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+    _unique_ids = field_validator("items")(_unique_task_ids)
+
+
+class TaskBatchDelete(BaseModel):
+    """Batch task deletion schema."""
+    ids: List[int] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class TaskBatchItemResult(BaseModel):
+    """Outcome of one item in a batch request, in request order."""
+    index: int
+    status: int
+    task: Optional[TaskRead] = None
+    detail: Optional[str] = None
+
+
+class TaskBatchResult(BaseModel):
+    """Batch response schema."""
+    results: List[TaskBatchItemResult]
@@ -0,0 +1,65 @@
+import re
+from typing import List
+from fastapi import HTTPException, status
+from sqlalchemy import Subquery, bindparam, column, func, literal_column, select, table
+from .database import engine
+from .models.task import TASKS_FTS_TABLE, TASKS_TSVECTOR, Task
+
+# Maximum number of words in a search query
+MAX_SEARCH_TERMS = 16
+
+# Relative weight of a title match over a description match (SQLite bm25)
+TITLE_WEIGHT = 10.0
+
+_WORD = re.compile(r"\w+")
+
+
+def search_terms(q: str) -> List[str]:
+    """Split a free-text query into words; punctuation and operators are ignored."""
+    terms = _WORD.findall(q.lower())
+    if not terms:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="q must contain at least one word"
+        )
+    if len(terms) > MAX_SEARCH_TERMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"q must contain at most {MAX_SEARCH_TERMS} words"
+        )
+    return terms
+
+
+def match_tasks(q: str, dialect: str = engine.dialect.name) -> Subquery:
+    """Tasks matching every word of ``q`` (the last one as a prefix), with a rank.
+
+    Returns a subquery of ``(id, rank)``; lower ranks are better matches.
+    """
+    terms = search_terms(q)
+    if dialect == "sqlite":
+        fts = table(TASKS_FTS_TABLE, column("rowid"))
+        document = literal_column(TASKS_FTS_TABLE)
+        # Quoted terms are plain words to FTS5, never operators or column filters
+        query = " ".join(f'"{term}"' for term in terms) + "*"
+        return (
+            select(fts.c.rowid.label("id"), func.bm25(document, TITLE_WEIGHT, 1.0).label("rank"))
+            .select_from(fts)
+            .where(document.op("MATCH")(bindparam("search_query", query)))
+            .subquery("matches")
+        )
+    if dialect == "postgresql":
+        # Spelled exactly like the ix_tasks_search expression so the GIN index is used
+        document = literal_column(TASKS_TSVECTOR)
+        query = func.to_tsquery(
+            literal_column("'english'::regconfig"),
+            bindparam("search_query", " & ".join(terms) + ":*"),
+        )
+        return (
+            select(Task.id.label("id"), (-func.ts_rank_cd(document, query)).label("rank"))
+            .where(document.op("@@")(query))
+            .subquery("matches")
+        )
+    raise HTTPException(
+        status_code=status.HTTP_501_NOT_IMPLEMENTED,
+        detail=f"Search is not supported on {dialect}"
+    )
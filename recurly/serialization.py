@@ -0,0 +1,139 @@
+from datetime import datetime, timezone
+from typing import Any, Iterable, Mapping, Optional, Sequence, Tuple
+from fastapi import HTTPException, Request, Response, status
+from pydantic_core import to_json
+from sqlalchemy import Row
+from .models.task import Task
+from .negotiation import negotiate
+from .schemas import TaskRead as TaskReadSchema
+
+try:  # Optional: orjson is faster still, and pydantic-core is the fallback
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+try:  # Optional: application/msgpack task lists are only offered when it is installed
+    import msgpack
+except ImportError:  # pragma: no cover - depends on the environment
+    msgpack = None
+
+# Columns selected for a TaskRead, in the schema's field order
+TASK_READ_COLUMNS = tuple(getattr(Task, name) for name in TaskReadSchema.model_fields)
+TASK_READ_FIELDS: Tuple[str, ...] = tuple(TaskReadSchema.model_fields)
+
+JSON_MEDIA_TYPE = "application/json"
+# One array per field, {"id": [1, 2], "title": ["a", "b"], ...}: every key is sent once
+COLUMNS_MEDIA_TYPE = "application/vnd.recurly.columns+json"
+# An array of maps like the JSON body, with datetimes as msgpack timestamps
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+# Representations of a task list, in the server's order of preference
+LIST_MEDIA_TYPES: Tuple[str, ...] = (JSON_MEDIA_TYPE, COLUMNS_MEDIA_TYPE) + ((MSGPACK_MEDIA_TYPE,) if msgpack else ())
+
+
+def parse_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    """Resolve a ``fields=id,title`` projection to TaskRead field names.
+
+    Returns every field when ``fields`` is empty. ``id`` is always included,
+    and fields keep the schema's order.
+    """
+    if not fields:
+        return TASK_READ_FIELDS
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = sorted(requested.difference(TASK_READ_FIELDS))
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}"
+        )
+    requested.add("id")
+    return tuple(name for name in TASK_READ_FIELDS if name in requested)
+
+
+def task_columns(fields: Sequence[str]) -> tuple:
+    """The Task columns to select for the given TaskRead fields."""
+    if fields is TASK_READ_FIELDS:
+        return TASK_READ_COLUMNS
+    return tuple(getattr(Task, name) for name in fields)
+
+
+def dumps(content: Any) -> bytes:
+    """Encode JSON the way the response models would (UTC datetimes end in "Z")."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+    return to_json(content)
+
+
+def rows_to_dicts(rows: Iterable[Row], fields: Sequence[str] = TASK_READ_FIELDS) -> list:
+    return [dict(zip(fields, row)) for row in rows]
+
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        # Naive datetimes are UTC throughout the app
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return msgpack.Timestamp.from_datetime(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__} to msgpack")
+
+
+def list_media_type(request: Request) -> str:
+    """The task list representation the Accept header prefers, JSON by default."""
+    accept = request.headers.get("accept")
+    return negotiate(accept, LIST_MEDIA_TYPES, ("application/*", "*/*")) or JSON_MEDIA_TYPE
+
+
+def encode_rows(rows: Iterable[Row], fields: Sequence[str] = TASK_READ_FIELDS, media_type: str = JSON_MEDIA_TYPE) -> bytes:
+    """Encode column rows as one of ``LIST_MEDIA_TYPES``.
+
+    Extra trailing columns (such as a sort key) are not encoded.
+    """
+    if media_type == COLUMNS_MEDIA_TYPE:
+        columns = list(zip(*rows)) or [()] * len(fields)
+        return dumps(dict(zip(fields, columns)))
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return msgpack.packb(rows_to_dicts(rows, fields), default=_msgpack_default)
+    return dumps(rows_to_dicts(rows, fields))
+
+
+def rows_response(
+    rows: Iterable[Row],
+    fields: Sequence[str] = TASK_READ_FIELDS,
+    media_type: str = JSON_MEDIA_TYPE,
+    headers: Optional[Mapping[str, str]] = None,
+) -> Response:
+    """Like ``json_rows_response``, in a negotiated list representation."""
+    return Response(encode_rows(rows, fields, media_type), headers=headers, media_type=media_type)
+
+
+def json_rows_response(
+    rows: Iterable[Row],
+    fields: Sequence[str] = TASK_READ_FIELDS,
+    headers: Optional[Mapping[str, str]] = None,
+    status_code: int = 200,
+) -> Response:
+    """Serialise selected column rows straight to a JSON array of objects.
+
+    Skips building ORM instances and re-validating them against the response
+    model. Only use it with columns that already have the response types,
+    such as ``TASK_READ_COLUMNS``. The route's ``response_model`` still
+    documents the shape.
+    """
+    return Response(
+        dumps(rows_to_dicts(rows, fields)),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
+
+
+def json_row_response(
+    row: Row,
+    fields: Sequence[str] = TASK_READ_FIELDS,
+    headers: Optional[Mapping[str, str]] = None,
+) -> Response:
+    """Like ``json_rows_response`` for a single object."""
+    return Response(
+        dumps(dict(zip(fields, row))),
+        headers=headers,
+        media_type="application/json",
+    )
@@ -0,0 +1,468 @@
+import argparse
+import asyncio
+import heapq
+import logging
+import math
+import os
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from fastapi import Depends, HTTPException, Request, status
+from sqlalchemy import Row, Table, case, delete, event, func, insert, update
+from sqlalchemy.orm import Session as ORMSession
+from sqlmodel import Session, select
+from .auth import get_current_active_user
+from .cache import TTLCache
+from .database import (
+    DBSession,
+    create_db_and_tables,
+    dispose_engines,
+    get_session,
+    open_session,
+    shard_engines,
+    stream_partitions,
+)
+from .models.completion import TaskCompletion, TaskStats, UserTaskStats
+from .models.shard import UserShard
+from .models.task import TASK_CHANGE_SEQUENCE, ChangeSequence, Task, TaskTombstone, allocate_change_seqs
+from .models.user import User
+
+# Configuration
+# Task ids are n * SHARD_ID_STRIDE + shard, so ids from different shards never
+# collide and a task keeps its id when it moves; also the maximum shard count
+SHARD_ID_STRIDE = int(os.getenv("TASK_SHARD_ID_STRIDE", "64"))
+# How long a process trusts its copy of a user's directory entry; a move
+# refuses the user's writes for this long before copying
+SHARD_MAP_TTL_SECONDS = float(os.getenv("SHARD_MAP_TTL_SECONDS", "5"))
+
+# Counter handing out the n of new task ids on each shard
+TASK_ID_SEQUENCE = "task_ids"
+
+_CHUNK_SIZE = 500
+
+logger = logging.getLogger(__name__)
+
+if len(shard_engines) > SHARD_ID_STRIDE:
+    raise ValueError(f"At most TASK_SHARD_ID_STRIDE={SHARD_ID_STRIDE} shards are supported")
+
+# user_id -> (shard, moving), from the user_shards table on the primary
+shard_directory: TTLCache[Tuple[int, bool]] = TTLCache(100_000, SHARD_MAP_TTL_SECONDS)
+
+
+def _chunks(values: Sequence, size: int = _CHUNK_SIZE) -> Iterable[Sequence]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def default_shard(user_id: int) -> int:
+    return user_id % len(shard_engines)
+
+
+async def shard_for_user(session: DBSession, user_id: int, write: bool = False) -> Optional[int]:
+    """The shard holding ``user_id``'s tasks, or None when tasks are not sharded.
+
+    ``session`` is a primary (or replica) session. With ``write=True``,
+    raises 503 while the user is being moved to another shard.
+    """
+    if not shard_engines:
+        return None
+    entry = shard_directory.get(user_id)
+    if entry is None:
+        row = (await session.exec(
+            select(UserShard.shard, UserShard.moving).where(UserShard.user_id == user_id)
+        )).first()
+        entry = (row.shard, row.moving) if row else (default_shard(user_id), False)
+        shard_directory.set(user_id, entry)
+    shard, moving = entry
+    if write and moving:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Tasks are being moved to another shard, please retry",
+            headers={"Retry-After": str(math.ceil(SHARD_MAP_TTL_SECONDS))},
+        )
+    return shard
+
+
+def fans_out(session: DBSession) -> bool:
+    """True if a query through ``session`` has to run on every shard."""
+    return bool(shard_engines) and session.info.get("shard") is None
+
+
+async def _shard_rows(shard: int, statement: Any) -> List[Row]:
+    async with open_session(shard=shard) as session:
+        return list((await session.exec(statement)).all())
+
+
+async def fan_out(session: DBSession, statement: Any, user_id: Optional[int] = None) -> List[List[Row]]:
+    """Run a select on every shard concurrently and return the rows of each.
+
+    With ``user_id`` only that user's shard is read. Through a session that
+    is not sharded, or is already on a shard, the statement runs once there.
+    """
+    if not fans_out(session):
+        return [list((await session.exec(statement)).all())]
+    if user_id is not None:
+        return [await _shard_rows(await shard_for_user(session, user_id), statement)]
+    return list(await asyncio.gather(*(_shard_rows(shard, statement) for shard in range(len(shard_engines)))))
+
+
+def merge_rows(
+    results: Iterable[Sequence[Row]], key: Callable[[Row], Any], limit: Optional[int] = None, skip: int = 0
+) -> List[Row]:
+    """Merge per-shard rows, each sorted by ``key``, into one sorted list.
+
+    A task caught between two shards by a move is returned once.
+    """
+    merged: List[Row] = []
+    seen = set()
+    for row in heapq.merge(*results, key=key):
+        if row.id in seen:
+            continue
+        seen.add(row.id)
+        merged.append(row)
+        if limit is not None and len(merged) == skip + limit:
+            break
+    return merged[skip:]
+
+
+@asynccontextmanager
+async def user_task_session(session: DBSession, user_id: int, write: bool = False) -> AsyncIterator[DBSession]:
+    """A session on ``user_id``'s shard; ``session`` itself when tasks are not sharded."""
+    shard = await shard_for_user(session, user_id, write)
+    if shard is None:
+        yield session
+        return
+    async with open_session(shard=shard) as shard_session:
+        yield shard_session
+
+
+async def _has_task(shard: int, task_id: int) -> bool:
+    return bool(await _shard_rows(shard, select(Task.id).where(Task.id == task_id)))
+
+
+@asynccontextmanager
+async def task_session(session: DBSession, user_id: int, task_id: int) -> AsyncIterator[DBSession]:
+    """A session on the shard holding ``task_id``; ``session`` itself when tasks are not sharded.
+
+    Looks on ``user_id``'s shard first, then on the others concurrently. If
+    no shard has the task, the session is on the user's shard.
+    """
+    own = await shard_for_user(session, user_id)
+    if own is None:
+        yield session
+        return
+    shard = own
+    if not await _has_task(own, task_id):
+        others = [other for other in range(len(shard_engines)) if other != own]
+        found = await asyncio.gather(*(_has_task(other, task_id) for other in others))
+        shard = next((other for other, present in zip(others, found) if present), own)
+    async with open_session(shard=shard) as shard_session:
+        yield shard_session
+
+
+async def locate_tasks(session: DBSession, task_ids: Iterable[int]) -> Dict[int, Optional[int]]:
+    """Map task ids to their shards (None when not sharded); missing ids are left out.
+
+    Raises 503 if one of the tasks belongs to a user being moved.
+    """
+    task_ids = sorted(set(task_ids))
+    if not shard_engines:
+        return dict.fromkeys(task_ids)
+    located: Dict[int, Optional[int]] = {}
+    assignees = set()
+    for chunk in _chunks(task_ids):
+        statement = select(Task.id, Task.assigned_to).where(Task.id.in_(chunk))
+        for shard, rows in enumerate(await fan_out(session, statement)):
+            for row in rows:
+                located[row.id] = shard
+                assignees.add(row.assigned_to)
+    for assignee in assignees:
+        await shard_for_user(session, assignee, write=True)
+    return located
+
+
+async def get_task_session(
+    request: Request,
+    current_user: User = Depends(get_current_active_user),
+    session: DBSession = Depends(get_session),
+):
+    """Session on the current user's task shard (the request session when not sharded)."""
+    write = request.method not in ("GET", "HEAD")
+    async with user_task_session(session, current_user.id, write) as tasks:
+        yield tasks
+
+
+async def stream_shards(statement: Any, batch_size: int = 1000) -> AsyncIterator[Sequence[Row]]:
+    """Like ``stream_partitions``, over every shard in turn."""
+    for shard in range(len(shard_engines)) if shard_engines else [None]:
+        async for partition in stream_partitions(statement, batch_size, shard=shard):
+            yield partition
+
+
+@event.listens_for(ORMSession, "before_flush")
+def _assign_task_ids(session: ORMSession, flush_context, instances) -> None:
+    """Give new tasks on a shard ids that are unique across every shard."""
+    shard = session.info.get("shard")
+    if shard is None:
+        return
+    created = [obj for obj in session.new if isinstance(obj, Task) and obj.id is None]
+    if not created:
+        return
+    first = allocate_change_seqs(session.connection(), len(created), TASK_ID_SEQUENCE)
+    for offset, task in enumerate(created):
+        task.id = (first + offset) * SHARD_ID_STRIDE + shard
+
+
+# Moving tasks between shards
+
+
+def _advance_sequence(session: Session, name: str, value: int) -> None:
+    """Raise a counter to at least ``value``."""
+    table = ChangeSequence.__table__
+    connection = session.connection()
+    updated = connection.execute(
+        update(table).where(table.c.name == name)
+        .values(value=case((table.c.value < value, value), else_=table.c.value))
+    )
+    if updated.rowcount == 0:
+        connection.execute(insert(table).values(name=name, value=value))
+
+
+async def _sequence_value(session: DBSession, name: str) -> int:
+    value = (await session.exec(select(ChangeSequence.value).where(ChangeSequence.name == name))).first()
+    return value or 0
+
+
+def _task_tables(task_ids: Sequence[int], user_ids: Sequence[int]) -> List[Tuple[Table, Any, Sequence[int]]]:
+    return [
+        (Task.__table__, Task.id, task_ids),
+        (TaskStats.__table__, TaskStats.task_id, task_ids),
+        (TaskCompletion.__table__, TaskCompletion.task_id, task_ids),
+        (UserTaskStats.__table__, UserTaskStats.user_id, user_ids),
+        (TaskTombstone.__table__, TaskTombstone.assigned_to, user_ids),
+    ]
+
+
+def _replace_rows(session: Session, copies: List[Tuple[Table, Any, Sequence[int], List[dict]]]) -> None:
+    connection = session.connection()
+    for table, column, keys, rows in copies:
+        for chunk in _chunks(keys):
+            connection.execute(delete(table).where(column.in_(chunk)))
+        if not rows:
+            continue
+        if table is Task.__table__:
+            # Fresh change_seqs, so delta-sync clients on this shard see the tasks arrive
+            seq = allocate_change_seqs(connection, len(rows))
+            for offset, row in enumerate(rows):
+                row["change_seq"] = seq + offset
+        elif table is not TaskStats.__table__ and table is not UserTaskStats.__table__:
+            for row in rows:
+                del row["id"]
+        connection.execute(insert(table), rows)
+
+
+async def copy_tasks(
+    source: DBSession, target: DBSession, task_ids: Sequence[int], user_ids: Sequence[int] = ()
+) -> int:
+    """Copy tasks, their completion history and rollups to another shard, uncommitted.
+
+    ``user_ids`` also copies those users' rollups and tombstones. Rows that
+    are already on the target are replaced, so an interrupted move can be
+    run again. Returns the number of tasks copied.
+    """
+    copies = []
+    for table, column, keys in _task_tables(task_ids, user_ids):
+        rows: List[dict] = []
+        for chunk in _chunks(keys):
+            rows.extend(dict(row) for row in (await source.execute(table.select().where(column.in_(chunk)))).mappings())
+        copies.append((table, column, keys, rows))
+    await target.run_sync(_replace_rows, copies)
+    return len(copies[0][3])
+
+
+async def move_task(source: DBSession, task: Task, shard: int, changes: Dict[str, Any]) -> Task:
+    """Move a task to ``shard`` with its history, applying ``changes`` there.
+
+    The target commits first, so a failure leaves the task on both shards
+    (reads show it once) rather than on neither. The source keeps a
+    tombstone for the previous assignee.
+    """
+    async with open_session(shard=shard) as target:
+        await copy_tasks(source, target, [task.id])
+        moved = await target.get(Task, task.id)
+        for field, value in changes.items():
+            setattr(moved, field, value)
+        target.add(moved)
+        await target.commit()
+        await target.refresh(moved)
+    await source.delete(task)
+    await source.commit()
+    return moved
+
+
+async def _set_directory(session: DBSession, moves: Dict[int, Tuple[int, bool]]) -> None:
+    rows = {row.user_id: row for row in (await session.exec(
+        select(UserShard).where(UserShard.user_id.in_(moves))
+    )).all()}
+    for user_id, (shard, moving) in moves.items():
+        row = rows.get(user_id) or UserShard(user_id=user_id, shard=shard)
+        row.shard, row.moving = shard, moving
+        session.add(row)
+        shard_directory.pop(user_id)
+    await session.commit()
+
+
+async def move_users(moves: Dict[int, int], wait: float = SHARD_MAP_TTL_SECONDS) -> int:
+    """Move users, with all their tasks, to other shards; returns the number of tasks moved.
+
+    The users' writes are refused (503) from the start until their tasks are
+    on the target, and the copy only starts once every process has seen
+    that, after ``wait`` seconds. Reads keep working throughout.
+    """
+    async with open_session() as primary:
+        sources = {user_id: await shard_for_user(primary, user_id) for user_id in moves}
+        moves = {user_id: shard for user_id, shard in moves.items() if sources[user_id] != shard}
+        if not moves:
+            return 0
+        await _set_directory(primary, {user_id: (sources[user_id], True) for user_id in moves})
+    await asyncio.sleep(wait)
+
+    moved = 0
+    for user_id, shard in moves.items():
+        async with open_session(shard=sources[user_id]) as source, open_session(shard=shard) as target:
+            task_ids = (await source.exec(select(Task.id).where(Task.assigned_to == user_id))).all()
+            # Keep the user's change feed moving forward on the new shard
+            await target.run_sync(_advance_sequence, TASK_CHANGE_SEQUENCE, await _sequence_value(source, TASK_CHANGE_SEQUENCE))
+            count = await copy_tasks(source, target, task_ids, [user_id])
+            await target.commit()
+            async with open_session() as primary:
+                await _set_directory(primary, {user_id: (shard, False)})
+            # Only now drop the source copy; until then reads see each task once either way
+            for table, column, keys in _task_tables(task_ids, [user_id]):
+                for chunk in _chunks(keys):
+                    await source.execute(delete(table).where(column.in_(chunk)))
+            await source.commit()
+        logger.info("Moved user %d (%d tasks) from shard %d to shard %d", user_id, count, sources[user_id], shard)
+        moved += count
+    return moved
+
+
+async def shard_loads() -> List[Dict[int, int]]:
+    """Number of tasks per assignee on each shard."""
+    statement = select(Task.assigned_to, func.count()).group_by(Task.assigned_to)
+    results = await asyncio.gather(*(_shard_rows(shard, statement) for shard in range(len(shard_engines))))
+    return [dict(rows) for rows in results]
+
+
+def plan_rebalance(loads: List[Dict[int, int]], tolerance: float = 0.1) -> Dict[int, int]:
+    """Pick users to move so every shard is within ``tolerance`` of the mean task count.
+
+    Greedy: repeatedly moves the user from the fullest shard to the emptiest
+    that best halves the gap between them.
+    """
+    loads = [dict(users) for users in loads]
+    totals = [sum(users.values()) for users in loads]
+    mean = sum(totals) / len(totals)
+    moves: Dict[int, int] = {}
+    while True:
+        high = max(range(len(totals)), key=totals.__getitem__)
+        low = min(range(len(totals)), key=totals.__getitem__)
+        gap = totals[high] - totals[low]
+        if gap <= tolerance * mean:
+            break
+        candidates = [(abs(gap / 2 - count), user_id) for user_id, count in loads[high].items() if count < gap]
+        if not candidates:
+            break
+        _, user_id = min(candidates)
+        count = loads[high].pop(user_id)
+        loads[low][user_id] = count
+        totals[high] -= count
+        totals[low] += count
+        moves[user_id] = low
+    return moves
+
+
+async def split_primary() -> int:
+    """Copy every task on the primary to its assignee's shard; returns the number copied.
+
+    For switching an existing deployment to shards, with the API stopped.
+    The primary's tasks are left in place.
+    """
+    async with open_session() as primary:
+        max_id = (await primary.exec(select(func.max(Task.id)))).one() or 0
+        seq = await _sequence_value(primary, TASK_CHANGE_SEQUENCE)
+        owners = (await primary.exec(select(Task.id, Task.assigned_to))).all()
+        by_shard: Dict[int, Tuple[List[int], set]] = {}
+        for task_id, user_id in owners:
+            task_ids, user_ids = by_shard.setdefault(await shard_for_user(primary, user_id), ([], set()))
+            task_ids.append(task_id)
+            user_ids.add(user_id)
+
+        copied = 0
+        for shard in range(len(shard_engines)):
+            async with open_session(shard=shard) as target:
+                # New ids on every shard start above the ones brought over
+                await target.run_sync(_advance_sequence, TASK_ID_SEQUENCE, max_id // SHARD_ID_STRIDE + 1)
+                await target.run_sync(_advance_sequence, TASK_CHANGE_SEQUENCE, seq)
+                if shard in by_shard:
+                    task_ids, user_ids = by_shard[shard]
+                    copied += await copy_tasks(primary, target, task_ids, sorted(user_ids))
+                await target.commit()
+    return copied
+
+
+async def pin_users() -> int:
+    """Record every user's current shard, so changing the shard count does not move them."""
+    async with open_session() as primary:
+        pinned = set((await primary.exec(select(UserShard.user_id))).all())
+        user_ids = [user_id for user_id in (await primary.exec(select(User.id))).all() if user_id not in pinned]
+        primary.add_all(UserShard(user_id=user_id, shard=default_shard(user_id)) for user_id in user_ids)
+        await primary.commit()
+    return len(user_ids)
+
+
+async def main() -> None:
+    """Inspect and rebalance task shards (TASK_SHARD_URLS)."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="tasks and users per shard")
+    move = commands.add_parser("move", help="move one user's tasks to another shard")
+    move.add_argument("user_id", type=int)
+    move.add_argument("shard", type=int)
+    rebalance = commands.add_parser("rebalance", help="move users until shards hold similar task counts")
+    rebalance.add_argument("--tolerance", type=float, default=0.1, help="allowed spread, as a share of the mean")
+    rebalance.add_argument("--dry-run", action="store_true", help="only print the planned moves")
+    commands.add_parser("split", help="copy tasks from DATABASE_URL to the shards (API stopped)")
+    commands.add_parser("pin", help="record every user's shard before changing the number of shards")
+    for command in (move, rebalance):
+        command.add_argument("--wait", type=float, default=SHARD_MAP_TTL_SECONDS,
+                             help="seconds to refuse writes before copying (at least SHARD_MAP_TTL_SECONDS)")
+    args = parser.parse_args()
+
+    if not shard_engines:
+        parser.error("TASK_SHARD_URLS is not set")
+    try:
+        await create_db_and_tables()
+        if args.command == "status":
+            for shard, users in enumerate(await shard_loads()):
+                print(f"shard {shard}: {sum(users.values())} tasks, {len(users)} users")
+        elif args.command == "move":
+            if not 0 <= args.shard < len(shard_engines):
+                parser.error(f"shard must be between 0 and {len(shard_engines) - 1}")
+            print(f"moved {await move_users({args.user_id: args.shard}, args.wait)} tasks")
+        elif args.command == "rebalance":
+            moves = plan_rebalance(await shard_loads(), args.tolerance)
+            for user_id, shard in moves.items():
+                print(f"user {user_id} -> shard {shard}")
+            if moves and not args.dry_run:
+                print(f"moved {await move_users(moves, args.wait)} tasks")
+        elif args.command == "split":
+            print(f"copied {await split_primary()} tasks")
+        elif args.command == "pin":
+            print(f"pinned {await pin_users()} users")
+    finally:
+        await dispose_engines()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(main())
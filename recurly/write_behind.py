@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Set, Union
+from fastapi import HTTPException, status
+from sqlmodel import Session, select
+from .database import open_session
+from .models.task import Task
+from .schemas import TaskRead as TaskReadSchema
+
+# Configuration
+# Queue single-task writes and commit them in groups (worth it on SQLite)
+WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND_ENABLED", "false").lower() in ("1", "true", "yes")
+# How long a batch waits for more writes after the first one; 0 only groups
+# the writes that queued up while the previous commit was running
+WRITE_BEHIND_MAX_DELAY_MS = float(os.getenv("WRITE_BEHIND_MAX_DELAY_MS", "0"))
+WRITE_BEHIND_MAX_BATCH = int(os.getenv("WRITE_BEHIND_MAX_BATCH", "256"))
+
+logger = logging.getLogger(__name__)
+
+# Applies one write to its (loaded) task; raise HTTPException to reject it
+TaskChange = Callable[[Session, Task], None]
+
+
+@dataclass(eq=False)
+class _Write:
+    task_id: int
+    change: TaskChange
+    future: "asyncio.Future[TaskReadSchema]"
+
+
+class TaskWriteBehind:
+    """Group commit for small single-task writes such as completions.
+
+    Writes are queued and applied by one background worker, which loads all
+    tasks of a batch with one query and commits them in one transaction (one
+    fsync, one turn of the SQLite write lock). Each caller is resumed only
+    after the commit that includes its write, with the committed task or
+    its own HTTP error; a failing commit is retried one write at a time so
+    one bad write cannot fail the others. Two writes to the same task never
+    share a batch, so each one is flushed (and recorded) separately. Each
+    task shard has its own queue and worker.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = WRITE_BEHIND_ENABLED,
+        max_delay: float = WRITE_BEHIND_MAX_DELAY_MS / 1000,
+        max_batch: int = WRITE_BEHIND_MAX_BATCH,
+    ):
+        self.enabled = enabled
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self.batches = 0
+        self.writes = 0
+        self._queues: Dict[Optional[int], "asyncio.Queue[_Write]"] = {}
+        self._workers: Dict[Optional[int], "asyncio.Task[None]"] = {}
+
+    async def submit(self, task_id: int, change: TaskChange, shard: Optional[int] = None) -> TaskReadSchema:
+        """Queue ``change`` for ``task_id`` (on ``shard``) and wait until it is committed."""
+        loop = asyncio.get_running_loop()
+        worker = self._workers.get(shard)
+        if worker is None or worker.done():
+            self._queues[shard] = asyncio.Queue()
+            self._workers[shard] = loop.create_task(self._run(shard))
+        write = _Write(task_id, change, loop.create_future())
+        self._queues[shard].put_nowait(write)
+        return await write.future
+
+    def stats(self) -> Dict[str, int]:
+        return {"batches": self.batches, "writes": self.writes}
+
+    async def close(self) -> None:
+        """Stop the workers; writes still queued fail with 503."""
+        for shard, worker in self._workers.items():
+            worker.cancel()
+            try:
+                await worker
+            except asyncio.CancelledError:
+                pass
+            queue = self._queues[shard]
+            while not queue.empty():
+                write = queue.get_nowait()
+                if not write.future.done():
+                    write.future.set_exception(HTTPException(
+                        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                        detail="Server is shutting down"
+                    ))
+        self._workers.clear()
+        self._queues.clear()
+
+    async def _run(self, shard: Optional[int]) -> None:
+        loop = asyncio.get_running_loop()
+        queue = self._queues[shard]
+        deferred: List[_Write] = []
+        while True:
+            batch: List[_Write] = []
+            task_ids: Set[int] = set()
+            pending, deferred = deferred, []
+            for write in pending:
+                _take(write, batch, task_ids, deferred)
+            if not batch:
+                _take(await queue.get(), batch, task_ids, deferred)
+
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch and not deferred:
+                try:
+                    write = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        write = await asyncio.wait_for(queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                _take(write, batch, task_ids, deferred)
+            await self._commit(batch, shard)
+
+    async def _commit(self, batch: List[_Write], shard: Optional[int] = None) -> None:
+        try:
+            async with open_session(shard=shard) as session:
+                results = await session.run_sync(_apply_writes, batch)
+        except Exception as exc:
+            if len(batch) > 1:
+                logger.warning("Group commit of %d writes failed (%s); retrying one by one", len(batch), exc)
+                for write in batch:
+                    await self._commit([write], shard)
+                return
+            results = [exc]
+        self.batches += 1
+        self.writes += len(batch)
+        for write, result in zip(batch, results):
+            if write.future.done():  # The request was cancelled; the write still happened
+                continue
+            if isinstance(result, Exception):
+                write.future.set_exception(result)
+            else:
+                write.future.set_result(result)
+
+
+def _take(write: _Write, batch: List[_Write], task_ids: Set[int], deferred: List[_Write]) -> None:
+    if write.task_id in task_ids:
+        deferred.append(write)
+    else:
+        batch.append(write)
+        task_ids.add(write.task_id)
+
+
+def _apply_writes(session: Session, batch: List[_Write]) -> List[Union[TaskReadSchema, Exception]]:
+    statement = select(Task).where(Task.id.in_({write.task_id for write in batch}))
+    tasks = {task.id: task for task in session.exec(statement).all()}
+    applied: List[Any] = []
+    for write in batch:
+        task = tasks.get(write.task_id)
+        if task is None:
+            applied.append(HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found"))
+            continue
+        try:
+            write.change(session, task)
+        except HTTPException as exc:
+            applied.append(exc)
+            continue
+        applied.append(task)
+
+    session.commit()
+
+    return [
+        result if isinstance(result, Exception) else TaskReadSchema.model_validate(result, from_attributes=True)
+        for result in applied
+    ]
+
+
+task_write_behind = TaskWriteBehind()
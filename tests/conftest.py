@@ -0,0 +1,110 @@
+"""Shared fixtures: the app runs in-process against a throwaway SQLite database.
+
+``recurly`` reads its configuration from the environment at import time, so
+the variables are set here, before any test module imports it.
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+_DATABASE_DIR = tempfile.mkdtemp(prefix="recurly-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DATABASE_DIR, 'recurly.db')}"
+os.environ["RECURLY_ENV"] = "test"
+os.environ["PASSWORD_HASH_EXECUTOR"] = "inline"
+for _variable in ("DATABASE_REPLICA_URLS", "TASK_SHARD_URLS", "SCHEDULER_ENABLED", "WRITE_BEHIND_ENABLED"):
+    os.environ.pop(_variable, None)
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel
+
+PASSWORD = "test-password"
+
+
+def _reset_state() -> None:
+    from recurly import database
+    from recurly.auth import token_cache, user_cache
+    from recurly.ical import feed_cache
+    from recurly.revocation import revocations
+    from recurly.sharding import shard_directory
+
+    SQLModel.metadata.drop_all(database.engine)
+    SQLModel.metadata.create_all(database.engine)
+    for cache in (user_cache, token_cache, feed_cache, shard_directory):
+        cache.clear()
+    revocations._expires.clear()
+    revocations._seen_until = None
+    revocations._users_seen_until = None
+
+
+@pytest.fixture
+def app():
+    from main import app
+
+    _reset_state()
+    return app
+
+
+@pytest.fixture
+def client(app):
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def session(app):
+    """A synchronous session on the primary database, for model-level tests."""
+    from recurly import database
+
+    with Session(database.engine, expire_on_commit=False) as session:
+        yield session
+
+
+@pytest.fixture
+def statements(app):
+    """SQL statements executed on the primary database while the test runs."""
+    from recurly import database
+
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(database.engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(database.engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def login(client):
+    """Log a user in and return the token response."""
+    def login(email: str = "user@example.com", password: str = PASSWORD) -> dict:
+        response = client.post("/auth/login", data={"username": email, "password": password})
+        assert response.status_code == 200, response.text
+        return response.json()
+    return login
+
+
+@pytest.fixture
+def register(client, login):
+    """Create a user through the API and return an Authorization header for it."""
+    def register(email: str = "user@example.com", password: str = PASSWORD) -> dict:
+        response = client.post(
+            "/auth/register", json={"email": email, "password": password, "password_confirm": password}
+        )
+        assert response.status_code == 201, response.text
+        return {"Authorization": f"Bearer {login(email, password)['access_token']}"}
+    return register
+
+
+@pytest.fixture
+def user_id(client):
+    """The id of the user an Authorization header belongs to."""
+    def user_id(headers: dict) -> int:
+        return client.get("/auth/me", headers=headers).json()["id"]
+    return user_id
@@ -0,0 +1,123 @@
+import asyncio
+
+from sqlalchemy import text
+from sqlmodel import select
+
+from recurly import auth
+from recurly.auth import create_access_token, token_cache, user_cache, verify_token
+from recurly.cache import TTLCache
+from recurly.models.user import User
+from recurly.revocation import RevocationList
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_ttl_cache_expires_and_evicts_least_recently_used():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=2, ttl=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    clock.now = 10
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 1
+
+
+def _user_queries(statements) -> int:
+    # Full user rows; the revocation list's background refresh reads only a few columns
+    return sum(1 for statement in statements if "users.password_hash" in statement)
+
+
+def test_authenticated_requests_reuse_the_cached_user(client, register, statements):
+    headers = register()
+    user_cache.clear()
+    client.get("/auth/me", headers=headers)
+    statements.clear()
+    for _ in range(3):
+        assert client.get("/auth/me", headers=headers).status_code == 200
+    assert _user_queries(statements) == 0
+
+
+def test_deactivating_a_user_drops_the_cached_copy(client, session, register):
+    headers = register("leaving@example.com")
+    assert client.get("/auth/me", headers=headers).status_code == 200
+    user = session.exec(select(User).where(User.email == "leaving@example.com")).one()
+    user.is_active = False
+    session.add(user)
+    session.commit()
+    assert user_cache.get(user.id) is None
+    assert client.get("/auth/me", headers=headers).status_code == 401
+
+
+def _token(headers: dict) -> str:
+    return headers["Authorization"].split(" ", 1)[1]
+
+
+def test_users_changed_by_another_worker_leave_the_cache(client, session, register, user_id):
+    headers = register("elsewhere@example.com")
+    me = user_id(headers)
+    worker = RevocationList()
+    worker.user_listeners.append(auth._forget_changed_users)
+    asyncio.run(worker.refresh())
+    # Another worker deactivates the user; no ORM event reaches this one
+    session.execute(
+        text("UPDATE users SET is_active = 0, token_version = token_version + 1, updated_at = CURRENT_TIMESTAMP "
+             "WHERE id = :id"),
+        {"id": me},
+    )
+    session.commit()
+    assert client.get("/auth/me", headers=headers).status_code == 200
+    asyncio.run(worker.refresh())
+    assert user_cache.get(me) is None
+    assert client.get("/auth/me", headers=headers).status_code == 401
+
+
+def test_access_tokens_carry_the_user_id_and_token_version(client, register, user_id):
+    headers = register()
+    claims = verify_token(_token(headers))
+    assert claims["uid"] == user_id(headers)
+    assert claims["ver"] == 0
+    assert claims["sub"] == "user@example.com"
+    assert len(claims["jti"]) == 32
+
+
+def test_verified_claims_are_cached_until_the_token_expires(monkeypatch):
+    token = create_access_token({"sub": "cached@example.com", "uid": 1, "ver": 0})
+    token_cache.clear()
+    decoded = []
+    real_decode = auth.jwt.decode
+    monkeypatch.setattr(auth.jwt, "decode", lambda *args, **kwargs: decoded.append(1) or real_decode(*args, **kwargs))
+    assert verify_token(token) == verify_token(token)
+    assert len(decoded) == 1
+    # Swap in the signature of a different token; editing trailing base64
+    # characters can leave the decoded signature unchanged
+    signature = create_access_token({"sub": "other@example.com", "uid": 2, "ver": 0}).rsplit(".", 1)[1]
+    assert verify_token(token.rsplit(".", 1)[0] + "." + signature) is None
+
+
+def test_changing_the_email_revokes_earlier_tokens(client, session, register):
+    headers = register("before@example.com")
+    assert client.get("/auth/me", headers=headers).status_code == 200
+    user = session.exec(select(User).where(User.email == "before@example.com")).one()
+    user.email = "after@example.com"
+    session.add(user)
+    session.commit()
+    assert user.token_version == 1
+    assert client.get("/auth/me", headers=headers).status_code == 401
+
+
+def test_tokens_without_a_user_id_are_looked_up_by_email(client, register):
+    register("legacy@example.com")
+    token = create_access_token({"sub": "legacy@example.com"})
+    response = client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert response.json()["email"] == "legacy@example.com"
@@ -0,0 +1,80 @@
+import asyncio
+import uuid
+from datetime import timedelta
+
+from sqlmodel import select
+
+from recurly.cadence import utc_now
+from recurly.models.revoked_token import RevokedToken
+from recurly.revocation import RevocationList, revocations
+
+
+def _bearer(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_refresh_token_works_once(client, register, login):
+    register()
+    tokens = login()
+    renewed = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert renewed.status_code == 200
+    assert client.get("/auth/me", headers=_bearer(renewed.json()["access_token"])).status_code == 200
+
+    reused = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert reused.status_code == 401
+    again = client.post("/auth/refresh", json={"refresh_token": renewed.json()["refresh_token"]})
+    assert again.status_code == 200
+
+
+def test_access_and_refresh_tokens_are_not_interchangeable(client, register, login):
+    register()
+    tokens = login()
+    assert client.get("/auth/me", headers=_bearer(tokens["refresh_token"])).status_code == 401
+    assert client.post("/auth/refresh", json={"refresh_token": tokens["access_token"]}).status_code == 401
+
+
+def test_used_refresh_tokens_are_not_held_in_memory(client, session, register, login):
+    register()
+    refresh_token = login()["refresh_token"]
+    for _ in range(3):
+        refresh_token = client.post("/auth/refresh", json={"refresh_token": refresh_token}).json()["refresh_token"]
+
+    rows = session.exec(select(RevokedToken)).all()
+    assert len(rows) == 3 and all(row.single_use for row in rows)
+    assert len(revocations) == 0
+    asyncio.run(revocations.refresh())
+    assert len(revocations) == 0
+
+
+def test_logout_revokes_the_access_and_refresh_token(client, register, login):
+    register()
+    tokens = login()
+    response = client.post(
+        "/auth/logout", json={"refresh_token": tokens["refresh_token"]}, headers=_bearer(tokens["access_token"])
+    )
+    assert response.status_code == 200
+    assert client.get("/auth/me", headers=_bearer(tokens["access_token"])).status_code == 401
+    assert client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+    # Only the access token needs the in-memory check
+    assert len(revocations) == 1
+
+
+def test_other_workers_load_access_token_revocations(client, register, login):
+    register()
+    access_token = login()["access_token"]
+    client.post("/auth/logout", headers=_bearer(access_token))
+
+    worker = RevocationList()
+    assert asyncio.run(worker.refresh()) == 1
+    payload_jti = next(iter(revocations._expires)).hex()
+    assert worker.is_revoked(payload_jti)
+    assert not worker.is_revoked(uuid.uuid4().hex)
+
+
+def test_expired_revocations_leave_the_list(app):
+    revocations_list = RevocationList()
+    jti = uuid.uuid4().hex
+    revocations_list.add([(jti, utc_now() - timedelta(seconds=1))])
+    assert revocations_list.is_revoked(jti)
+    asyncio.run(revocations_list.refresh())
+    assert not revocations_list.is_revoked(jti)
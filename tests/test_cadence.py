@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from recurly.cadence import (
+    Cadence,
+    DAY,
+    MONTH,
+    WEEKDAY,
+    nearest_due,
+    next_due_at,
+    next_occurrence,
+    parse_cadence,
+    to_naive_utc,
+    utc_now,
+)
+from recurly.models.task import Task
+
+# A Monday
+ANCHOR = datetime(2024, 1, 1, 8, 0)
+FIRST_DUE = ANCHOR + timedelta(days=1)
+DAILY = Cadence(DAY, 1)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("daily", Cadence(DAY, 1)),
+    ("Every 3 Days", Cadence(DAY, 3)),
+    ("every other month", Cadence(MONTH, 2)),
+    ("weekdays", Cadence(WEEKDAY, 1)),
+    ("custom", None),
+    ("every 0 days", None),
+])
+def test_parse_cadence(text, expected):
+    assert parse_cadence(text) == expected
+
+
+def test_monthly_keeps_the_anchor_day_clamped_to_short_months():
+    anchor = datetime(2024, 1, 31, 9, 0)
+    assert next_occurrence(Cadence(MONTH, 1), anchor, anchor) == datetime(2024, 2, 29, 9, 0)
+    assert next_occurrence(Cadence(MONTH, 1), anchor, datetime(2024, 2, 29, 9, 0)) == datetime(2024, 3, 31, 9, 0)
+
+
+def test_weekdays_skip_the_weekend():
+    friday = datetime(2024, 1, 5, 8, 0)
+    assert next_occurrence(Cadence(WEEKDAY, 1), ANCHOR, friday) == datetime(2024, 1, 8, 8, 0)
+
+
+def test_utc_now_is_naive_utc():
+    now = utc_now()
+    assert now.tzinfo is None
+    assert abs(now - to_naive_utc(datetime.now(timezone.utc))) < timedelta(seconds=5)
+
+
+def test_first_due_time_is_one_period_after_the_anchor():
+    assert next_due_at(DAILY, ANCHOR, None) == FIRST_DUE
+    assert next_due_at(None, ANCHOR, None) is None
+
+
+@pytest.mark.parametrize("completed_at, expected", [
+    # Early: an hour before the outstanding due time, which it still clears
+    (FIRST_DUE - timedelta(hours=1), FIRST_DUE + timedelta(days=1)),
+    (FIRST_DUE, FIRST_DUE + timedelta(days=1)),
+    # Late by a day and two hours: the missed period is skipped
+    (FIRST_DUE + timedelta(days=1, hours=2), FIRST_DUE + timedelta(days=2)),
+])
+def test_completion_moves_past_the_due_time_it_meets(completed_at, expected):
+    assert next_due_at(DAILY, ANCHOR, completed_at, FIRST_DUE) == expected
+
+
+@pytest.mark.parametrize("completed_at, expected", [
+    # Nearer the next due time: it was met early
+    (FIRST_DUE - timedelta(hours=1), FIRST_DUE + timedelta(days=1)),
+    (FIRST_DUE, FIRST_DUE + timedelta(days=1)),
+    # Nearer the previous due time: it was met late
+    (FIRST_DUE + timedelta(hours=2), FIRST_DUE + timedelta(days=1)),
+    (FIRST_DUE + timedelta(hours=23), FIRST_DUE + timedelta(days=2)),
+])
+def test_backfilled_completions_meet_the_nearest_due_time(completed_at, expected):
+    assert next_due_at(DAILY, ANCHOR, completed_at, nearest_due(DAILY, ANCHOR, completed_at)) == expected
+    assert nearest_due(DAILY, ANCHOR, None) is None
+
+
+def _scheduled_task(session, user_id: int) -> Task:
+    task = Task(title="Water plants", cadence="daily", assigned_to=user_id, created_at=ANCHOR)
+    session.add(task)
+    session.commit()
+    assert task.next_due_at == FIRST_DUE
+    return task
+
+
+def _complete(session, task: Task, completed_at: datetime) -> datetime:
+    task.last_completed = completed_at
+    session.add(task)
+    session.commit()
+    return task.next_due_at
+
+
+def test_task_completed_early_every_day_stays_a_period_ahead(session, register, user_id):
+    task = _scheduled_task(session, user_id(register()))
+    for day in range(3):
+        due = FIRST_DUE + timedelta(days=day)
+        assert _complete(session, task, due - timedelta(hours=1)) == due + timedelta(days=1)
+
+
+def test_task_completed_on_time_and_late(session, register, user_id):
+    task = _scheduled_task(session, user_id(register()))
+    assert _complete(session, task, FIRST_DUE) == FIRST_DUE + timedelta(days=1)
+    assert _complete(session, task, FIRST_DUE + timedelta(days=2, hours=3)) == FIRST_DUE + timedelta(days=3)
+
+
+def test_new_cadence_restarts_from_the_anchor(session, register, user_id):
+    task = _scheduled_task(session, user_id(register()))
+    _complete(session, task, FIRST_DUE - timedelta(hours=1))
+    task.cadence = "weekly"
+    session.add(task)
+    session.commit()
+    assert task.next_due_at == ANCHOR + timedelta(weeks=1)
+
+
+def test_complete_endpoint_advances_an_early_completion(client, register, user_id):
+    headers = register()
+    task = client.post(
+        "/api/tasks", json={"title": "Stretch", "cadence": "daily", "assigned_to": user_id(headers)}, headers=headers
+    ).json()
+    due = datetime.fromisoformat(task["next_due_at"])
+    response = client.patch(
+        f"/api/tasks/{task['id']}/complete",
+        json={"completed_at": (due - timedelta(minutes=5)).isoformat()},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    assert datetime.fromisoformat(response.json()["next_due_at"]) == due + timedelta(days=1)
+
+
+def test_due_tasks_are_soonest_first_and_the_limit_is_bounded(client, register, user_id):
+    headers = register()
+    me = user_id(headers)
+    for title, cadence in (("Weekly", "weekly"), ("Hourly", "hourly"), ("Daily", "daily")):
+        client.post("/api/tasks", json={"title": title, "cadence": cadence, "assigned_to": me}, headers=headers)
+    before = (utc_now() + timedelta(days=8)).isoformat()
+    response = client.get("/api/tasks/due", params={"before": before, "limit": 2}, headers=headers)
+    assert [task["title"] for task in response.json()] == ["Hourly", "Daily"]
+    assert client.get("/api/tasks/due", params={"limit": 0}, headers=headers).status_code == 422
+    assert client.get("/api/tasks/due", params={"limit": 10**6}, headers=headers).status_code == 422
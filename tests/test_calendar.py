@@ -0,0 +1,136 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from recurly.cadence import utc_now
+from recurly.ical import render_calendar
+from recurly.occurrences import Occurrence, expand, task_occurrences
+
+ANCHOR = datetime(2024, 1, 1, 8, 0)
+
+
+def _row(task_id: int, unit: str, interval: int = 1, next_due_at: datetime = ANCHOR + timedelta(days=1)):
+    return SimpleNamespace(
+        id=task_id, title=f"Task {task_id}", description=None, interval=interval, interval_unit=unit,
+        anchor_at=ANCHOR, next_due_at=next_due_at, updated_at=ANCHOR,
+    )
+
+
+def test_occurrences_start_at_the_stored_due_time():
+    # Completed early, so the stored due time is already a period ahead
+    row = _row(1, "day", next_due_at=ANCHOR + timedelta(days=2))
+    due = list(task_occurrences(row, ANCHOR, ANCHOR + timedelta(days=4)))
+    assert due == [ANCHOR + timedelta(days=2), ANCHOR + timedelta(days=3)]
+
+
+def test_overdue_due_time_comes_first_then_jumps_to_the_window():
+    row = _row(1, "day")
+    start = ANCHOR + timedelta(days=10, hours=1)
+    due = task_occurrences(row, start)
+    assert [next(due), next(due)] == [ANCHOR + timedelta(days=1), ANCHOR + timedelta(days=11)]
+
+
+def test_unscheduled_tasks_have_no_occurrences():
+    assert list(task_occurrences(_row(1, None), ANCHOR, ANCHOR + timedelta(days=9))) == []
+
+
+def test_expand_merges_by_due_time_then_task_id():
+    rows = [_row(2, "day"), _row(1, "week", next_due_at=ANCHOR + timedelta(weeks=1))]
+    merged = [(item.due_at, item.task_id) for item in expand(rows, ANCHOR, ANCHOR + timedelta(days=8))]
+    assert merged == sorted(merged)
+    assert (ANCHOR + timedelta(days=7), 1) in merged and (ANCHOR + timedelta(days=7), 2) in merged
+    assert len(merged) == 8
+
+
+def test_render_folds_long_lines_and_escapes_text():
+    row = _row(1, "day")
+    row.title = "Call mum, then; " + "é" * 80
+    body = render_calendar([Occurrence(ANCHOR, 1, row)]).decode()
+    assert body.startswith("BEGIN:VCALENDAR\r\n") and body.endswith("END:VCALENDAR\r\n")
+    assert "SUMMARY:Call mum\\, then\\; " in body
+    assert all(len(line.encode()) <= 75 for line in body.split("\r\n"))
+
+
+def _create(client, headers, title: str, cadence: str, assigned_to: int) -> dict:
+    response = client.post(
+        "/api/tasks", json={"title": title, "cadence": cadence, "assigned_to": assigned_to}, headers=headers
+    )
+    return response.json()
+
+
+def test_occurrences_page_through_with_a_cursor(client, register, user_id):
+    headers = register()
+    me = user_id(headers)
+    _create(client, headers, "Hourly", "hourly", me)
+    _create(client, headers, "Daily", "daily", me)
+    params = {"to": (utc_now() + timedelta(days=2)).isoformat(), "limit": 10}
+    seen = []
+    while True:
+        response = client.get("/api/tasks/occurrences", params=params, headers=headers)
+        assert response.status_code == 200
+        seen += [(item["due_at"], item["task_id"]) for item in response.json()]
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+    assert seen == sorted(set(seen))
+    # Tasks created just before the window opens: 48 hourly and 2 daily due times
+    assert len(seen) == 48 + 2
+
+
+def test_occurrences_follow_an_early_completion(client, register, user_id):
+    headers = register()
+    task = _create(client, headers, "Daily", "daily", user_id(headers))
+    due = datetime.fromisoformat(task["next_due_at"])
+    client.patch(
+        f"/api/tasks/{task['id']}/complete",
+        json={"completed_at": (due - timedelta(hours=1)).isoformat()}, headers=headers,
+    )
+    response = client.get("/api/tasks/occurrences", params={"to": (due + timedelta(days=2)).isoformat()}, headers=headers)
+    assert [datetime.fromisoformat(item["due_at"]) for item in response.json()] == [due + timedelta(days=1)]
+
+
+def test_overdue_occurrences_are_listed_once(client, register, user_id):
+    headers = register()
+    task = _create(client, headers, "Daily", "daily", user_id(headers))
+    due = datetime.fromisoformat(task["next_due_at"])
+    params = {"from": (due + timedelta(hours=1)).isoformat(), "to": (due + timedelta(days=2)).isoformat(), "limit": 1}
+    seen = []
+    while True:
+        response = client.get("/api/tasks/occurrences", params=params, headers=headers)
+        seen += [datetime.fromisoformat(item["due_at"]) for item in response.json()]
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+    # The missed due time is listed before the window, and not again on later pages
+    assert seen == [due, due + timedelta(days=1)]
+
+
+def test_occurrence_window_is_bounded(client, register):
+    headers = register()
+    far = (utc_now() + timedelta(days=1000)).isoformat()
+    assert client.get("/api/tasks/occurrences", params={"to": far}, headers=headers).status_code == 400
+
+
+def test_calendar_feed_is_cached_and_revalidated(client, register, user_id):
+    headers = register()
+    me = user_id(headers)
+    _create(client, headers, "Water plants", "daily", me)
+    url = client.get("/api/tasks/calendar", headers=headers).json()["url"]
+
+    first = client.get(url)
+    assert first.status_code == 200
+    assert first.headers["content-type"].startswith("text/calendar")
+    assert "SUMMARY:Water plants" in first.text
+    assert client.get(url, headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+    _create(client, headers, "Feed cat", "daily", me)
+    changed = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+    assert changed.status_code == 200
+    assert "SUMMARY:Feed cat" in changed.text
+
+
+def test_calendar_token_only_reads_the_feed(client, register):
+    headers = register()
+    url = client.get("/api/tasks/calendar", headers=headers).json()["url"]
+    token = url.split("token=")[1]
+    assert client.get("/auth/me", headers={"Authorization": f"Bearer {token}"}).status_code == 401
+    assert client.get("/api/tasks/calendar.ics", params={"token": headers["Authorization"][7:]}).status_code == 401
@@ -0,0 +1,61 @@
+def _create(client, headers, title: str, assigned_to: int) -> dict:
+    response = client.post(
+        "/api/tasks", json={"title": title, "cadence": "daily", "assigned_to": assigned_to}, headers=headers
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def _changes(client, headers, since: int, limit: int = 50) -> dict:
+    response = client.get("/api/tasks/changes", params={"since": since, "limit": limit}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_changes_report_updates_and_deletions_since_a_cursor(client, register, user_id):
+    headers = register()
+    me = user_id(headers)
+    kept = _create(client, headers, "Kept", me)
+    removed = _create(client, headers, "Removed", me)
+
+    first = _changes(client, headers, 0)
+    assert [task["id"] for task in first["changed"]] == [kept["id"], removed["id"]]
+    assert first["deleted"] == [] and not first["has_more"]
+
+    client.put(f"/api/tasks/{kept['id']}", json={"title": "Renamed"}, headers=headers)
+    assert client.delete(f"/api/tasks/{removed['id']}", headers=headers).status_code == 200
+    delta = _changes(client, headers, first["next_since"])
+    assert [task["title"] for task in delta["changed"]] == ["Renamed"]
+    assert delta["deleted"] == [removed["id"]]
+    assert delta["next_since"] > first["next_since"]
+
+    # Nothing new after the last cursor, and the cursor stays put
+    idle = _changes(client, headers, delta["next_since"])
+    assert idle == {"changed": [], "deleted": [], "next_since": delta["next_since"], "has_more": False}
+
+
+def test_changes_page_through_with_has_more(client, register, user_id):
+    headers = register()
+    me = user_id(headers)
+    created = [_create(client, headers, f"Task {n}", me)["id"] for n in range(5)]
+    client.delete(f"/api/tasks/{created[0]}", headers=headers)
+
+    since, changed, deleted = 0, [], []
+    while True:
+        page = _changes(client, headers, since, limit=2)
+        assert len(page["changed"]) + len(page["deleted"]) <= 2
+        changed += [task["id"] for task in page["changed"]]
+        deleted += page["deleted"]
+        since = page["next_since"]
+        if not page["has_more"]:
+            break
+    assert changed == created[1:]
+    assert deleted == [created[0]]
+
+
+def test_changes_only_cover_the_current_users_tasks(client, register, user_id):
+    mine = register()
+    theirs = register("other@example.com")
+    task = _create(client, theirs, "Not mine", user_id(theirs))
+    client.delete(f"/api/tasks/{task['id']}", headers=theirs)
+    assert _changes(client, mine, 0) == {"changed": [], "deleted": [], "next_since": 0, "has_more": False}
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+from sqlmodel import select
+
+from recurly.cadence import utc_now
+from recurly.models.completion import TaskCompletion
+from recurly.models.task import Task
+
+
+def _create_daily_task(client, headers, assigned_to: int) -> dict:
+    response = client.post(
+        "/api/tasks", json={"title": "Journal", "cadence": "daily", "assigned_to": assigned_to}, headers=headers
+    )
+    assert response.status_code == 201
+    return response.json()
+
+
+def _complete(client, headers, task_id: int, completed_at: datetime) -> dict:
+    response = client.patch(
+        f"/api/tasks/{task_id}/complete", json={"completed_at": completed_at.isoformat()}, headers=headers
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_early_completions_count_as_on_time(client, session, register, user_id):
+    headers = register()
+    me = user_id(headers)
+    task = _create_daily_task(client, headers, me)
+    due = datetime.fromisoformat(task["next_due_at"])
+    met = []
+    for _ in range(3):
+        met.append(due)
+        due = datetime.fromisoformat(_complete(client, headers, task["id"], due - timedelta(hours=1))["next_due_at"])
+
+    stats = client.get(f"/api/tasks/{task['id']}/stats", headers=headers).json()
+    assert stats["total_completions"] == 3
+    assert stats["on_time_completions"] == 3
+    assert stats["adherence"] == 1.0
+    assert stats["current_streak"] == stats["longest_streak"] == 3
+    history = session.exec(select(TaskCompletion).order_by(TaskCompletion.completed_at)).all()
+    assert [completion.due_at for completion in history] == met
+
+    mine = client.get("/api/tasks/my/stats", headers=headers).json()
+    assert mine["user_id"] == me
+    assert mine["current_streak"] == 3
+
+
+def test_late_completion_ends_the_streak(client, register, user_id):
+    headers = register()
+    task = _create_daily_task(client, headers, user_id(headers))
+    due = datetime.fromisoformat(task["next_due_at"])
+    due = datetime.fromisoformat(_complete(client, headers, task["id"], due)["next_due_at"])
+    _complete(client, headers, task["id"], due + timedelta(hours=2))
+
+    stats = client.get(f"/api/tasks/{task['id']}/stats", headers=headers).json()
+    assert stats["on_time_completions"] == 1
+    assert stats["adherence"] == 0.5
+    assert stats["current_streak"] == 0
+    assert stats["longest_streak"] == 1
+
+
+def test_overdue_task_reports_no_current_streak(client, session, register, user_id):
+    headers = register()
+    task = Task(
+        title="Overdue", cadence="daily", assigned_to=user_id(headers),
+        created_at=utc_now() - timedelta(days=3),
+    )
+    session.add(task)
+    session.commit()
+    assert task.next_due_at < utc_now()
+    due = task.next_due_at
+    task.last_completed = due
+    session.add(task)
+    session.commit()
+    # Completed on time once, but the next due time has passed as well
+    stats = client.get(f"/api/tasks/{task.id}/stats", headers=headers).json()
+    assert stats["longest_streak"] == 1
+    assert stats["current_streak"] == 0
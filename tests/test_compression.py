@@ -0,0 +1,105 @@
+import gzip
+
+import pytest
+
+from recurly.compression import COMPRESSORS, compress, is_compressible
+from recurly.negotiation import negotiate, quality_values
+from recurly.serialization import COLUMNS_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, TASK_READ_FIELDS
+
+
+def test_quality_values_parse_weights():
+    header = "gzip;q=0.5, BR, zstd;q=oops, deflate;level=1;q=2, identity;q=0, gzip;q=0.8"
+    assert quality_values(header) == {"gzip": 0.8, "br": 1.0, "zstd": 1.0, "deflate": 1.0, "identity": 0.0}
+    assert quality_values(None) == {}
+
+
+def test_negotiate_prefers_weight_then_server_order():
+    offers = ["zstd", "br", "gzip"]
+    assert negotiate("gzip, br", offers) == "br"
+    assert negotiate("gzip;q=1, br;q=0.5", offers) == "gzip"
+    assert negotiate("*;q=0.3, gzip;q=0.2", offers) == "zstd"
+    assert negotiate("identity", offers) is None
+    assert negotiate("*, gzip;q=0", ["gzip"]) is None
+
+
+def test_compressible_media_types():
+    assert is_compressible("application/json")
+    assert is_compressible("text/calendar; charset=utf-8")
+    assert is_compressible(COLUMNS_MEDIA_TYPE)
+    assert not is_compressible("text/event-stream")
+    assert not is_compressible("image/png")
+
+
+def test_gzip_is_always_available():
+    assert "gzip" in COMPRESSORS
+    body = b'{"title": "Water plants"}' * 100
+    assert gzip.decompress(compress("gzip", body)) == body
+
+
+@pytest.mark.parametrize("encoding, module", [("br", "brotli"), ("zstd", "zstandard")])
+def test_optional_codings_round_trip(encoding, module):
+    if encoding not in COMPRESSORS:
+        pytest.importorskip(module)
+    body = b'{"title": "Water plants"}' * 100
+    compressed = compress(encoding, body)
+    assert len(compressed) < len(body)
+
+
+def _create_tasks(client, headers, count: int) -> None:
+    me = client.get("/auth/me", headers=headers).json()["id"]
+    tasks = [{"title": f"Task {n}", "cadence": "daily", "assigned_to": me} for n in range(count)]
+    assert client.post("/api/tasks:batch", json={"items": tasks}, headers=headers).status_code == 200
+
+
+def test_large_responses_are_compressed(client, register):
+    headers = register()
+    _create_tasks(client, headers, 20)
+    response = client.get("/api/tasks", headers={**headers, "Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert int(response.headers["content-length"]) < len(response.content)
+    assert len(response.json()) == 20
+
+    plain = client.get("/api/tasks", headers={**headers, "Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.json() == response.json()
+
+
+def test_small_responses_are_sent_as_is(client, register):
+    headers = register()
+    response = client.get("/auth/me", headers={**headers, "Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+
+def test_streamed_exports_are_compressed_chunk_by_chunk(client, register):
+    headers = register()
+    _create_tasks(client, headers, 20)
+    response = client.get("/api/tasks/export", headers={**headers, "Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert len(response.text.splitlines()) == 20
+
+
+def test_task_lists_can_be_sent_as_columns(client, register):
+    headers = register()
+    assert client.get("/api/tasks", headers={**headers, "Accept": COLUMNS_MEDIA_TYPE}).json() == {
+        name: [] for name in TASK_READ_FIELDS
+    }
+    _create_tasks(client, headers, 3)
+    rows = client.get("/api/tasks", headers=headers).json()
+    response = client.get("/api/tasks", params={"fields": "title"}, headers={**headers, "Accept": COLUMNS_MEDIA_TYPE})
+    assert response.headers["content-type"] == COLUMNS_MEDIA_TYPE
+    assert response.json() == {"id": [row["id"] for row in rows], "title": [row["title"] for row in rows]}
+    # Each representation is validated separately
+    assert response.headers["ETag"] != client.get("/api/tasks", params={"fields": "title"}, headers=headers).headers["ETag"]
+
+
+def test_task_lists_can_be_sent_as_msgpack(client, register):
+    msgpack = pytest.importorskip("msgpack")
+    headers = register()
+    _create_tasks(client, headers, 3)
+    rows = client.get("/api/tasks", headers=headers).json()
+    response = client.get("/api/tasks", headers={**headers, "Accept": MSGPACK_MEDIA_TYPE})
+    assert response.headers["content-type"] == MSGPACK_MEDIA_TYPE
+    decoded = msgpack.unpackb(response.content, timestamp=3)
+    assert [row["title"] for row in decoded] == [row["title"] for row in rows]
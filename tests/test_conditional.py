@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+from email.utils import format_datetime, parsedate_to_datetime
+
+from recurly.conditional import make_etag
+
+
+def test_etags_are_weak_and_deterministic():
+    assert make_etag(1, "a") == make_etag(1, "a")
+    assert make_etag(1, "a") != make_etag(1, "b")
+    assert make_etag(1).startswith('W/"')
+
+
+def _create(client, headers, assigned_to: int) -> dict:
+    return client.post(
+        "/api/tasks", json={"title": "Sweep", "cadence": "weekly", "assigned_to": assigned_to}, headers=headers
+    ).json()
+
+
+def test_task_read_revalidates_with_etag_and_last_modified(client, register, user_id):
+    headers = register()
+    task = _create(client, headers, user_id(headers))
+    url = f"/api/tasks/{task['id']}"
+
+    first = client.get(url, headers=headers)
+    assert first.status_code == 200
+    assert first.headers["Cache-Control"] == "private, no-cache"
+    etag, last_modified = first.headers["ETag"], first.headers["Last-Modified"]
+
+    cached = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304 and cached.content == b""
+    assert cached.headers["ETag"] == etag
+    # Weak comparison and lists of tags
+    assert client.get(url, headers={**headers, "If-None-Match": f'"other", {etag[2:]}'}).status_code == 304
+    assert client.get(url, headers={**headers, "If-Modified-Since": last_modified}).status_code == 304
+    earlier = format_datetime(parsedate_to_datetime(last_modified) - timedelta(seconds=5), usegmt=True)
+    assert client.get(url, headers={**headers, "If-Modified-Since": earlier}).status_code == 200
+
+    client.put(url, json={"title": "Mop"}, headers=headers)
+    changed = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200 and changed.json()["title"] == "Mop"
+
+
+def test_task_list_etag_changes_on_insert_and_delete(client, register, user_id):
+    headers = register()
+    me = user_id(headers)
+    _create(client, headers, me)
+    etag = client.get("/api/tasks/my", headers=headers).headers["ETag"]
+    assert client.get("/api/tasks/my", headers={**headers, "If-None-Match": etag}).status_code == 304
+
+    task = _create(client, headers, me)
+    added = client.get("/api/tasks/my", headers={**headers, "If-None-Match": etag})
+    assert added.status_code == 200
+    client.delete(f"/api/tasks/{task['id']}", headers=headers)
+    removed = client.get("/api/tasks/my", headers={**headers, "If-None-Match": added.headers["ETag"]})
+    assert removed.status_code == 200
+    # The same rows as the first response, so its copy is current again
+    assert client.get("/api/tasks/my", headers={**headers, "If-None-Match": etag}).status_code == 304
+    assert removed.headers["Vary"] == "Accept"
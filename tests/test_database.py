@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from recurly import database
+from recurly.database import ThreadedSession, is_async_url, open_session
+from recurly.models.user import User
+
+
+def test_driver_selects_the_mode():
+    assert is_async_url("sqlite+aiosqlite:///./recurly.db")
+    assert not is_async_url("sqlite:///./recurly.db")
+
+
+def test_sync_driver_sessions_run_in_the_threadpool(app):
+    async def run():
+        async with open_session() as session:
+            assert isinstance(session, ThreadedSession)
+            session.add(User(email="threaded@example.com", password_hash="x"))
+            await session.commit()
+            return (await session.exec(select(User.email))).all()
+
+    assert asyncio.run(run()) == ["threaded@example.com"]
+
+
+@pytest.fixture
+def async_database(app, tmp_path, monkeypatch):
+    """Point the app at an aiosqlite database, as DATABASE_URL=sqlite+aiosqlite:// would."""
+    async_engine, engine = database._create_engines(f"sqlite+aiosqlite:///{tmp_path / 'async.db'}")
+    monkeypatch.setattr(database, "async_engine", async_engine)
+    monkeypatch.setattr(database, "engine", engine)
+    yield async_engine
+    asyncio.run(async_engine.dispose())
+
+
+def test_async_driver_serves_the_api(async_database, client, register, user_id):
+    assert isinstance(async_database, AsyncEngine)
+
+    async def session_type():
+        async with open_session() as session:
+            return type(session)
+
+    assert asyncio.run(session_type()) is AsyncSession
+
+    headers = register()
+    me = user_id(headers)
+    created = client.post("/api/tasks", json={"title": "Async", "cadence": "daily", "assigned_to": me}, headers=headers)
+    assert created.status_code == 201
+    completed = client.patch(f"/api/tasks/{created.json()['id']}/complete", json={}, headers=headers)
+    assert completed.json()["last_completed"] is not None
+    assert [task["title"] for task in client.get("/api/tasks/my", headers=headers).json()] == ["Async"]
+    export = client.get("/api/tasks/export", headers=headers)
+    assert export.status_code == 200 and "Async" in export.text
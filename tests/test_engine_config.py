@@ -0,0 +1,43 @@
+import pytest
+
+from recurly.engine_config import EngineConfig, PRESETS, engine_kwargs, load_engine_config, sqlite_pragmas
+
+
+def test_no_preset_echoes_sql_by_default():
+    assert not any(preset.echo for preset in PRESETS.values())
+    assert load_engine_config("development", {}).echo is False
+
+
+def test_sql_echo_is_opt_in():
+    assert load_engine_config("development", {"RECURLY_SQL_ECHO": "1"}).echo is True
+    assert load_engine_config("production", {"RECURLY_SQL_ECHO": "0"}).echo is False
+
+
+def test_overrides_are_coerced_to_the_field_type():
+    config = load_engine_config("production", {"DB_POOL_SIZE": "3", "DB_POOL_PRE_PING": "no"})
+    assert config.pool_size == 3
+    assert config.pool_pre_ping is False
+    assert config.pool_recycle == PRESETS["production"].pool_recycle
+
+
+def test_unknown_environment_is_rejected():
+    with pytest.raises(ValueError):
+        load_engine_config("staging", {})
+
+
+def test_in_memory_sqlite_gets_no_pool_sizing():
+    assert "pool_size" not in engine_kwargs("sqlite://", EngineConfig())
+    assert engine_kwargs("sqlite:///./recurly.db", EngineConfig(pool_size=7))["pool_size"] == 7
+
+
+def test_pragmas_skip_empty_and_negative_values():
+    config = EngineConfig(sqlite_journal_mode="", sqlite_mmap_size=-1)
+    assert sqlite_pragmas(config) == {"synchronous": "NORMAL", "busy_timeout": 5000}
+
+
+def test_every_sqlite_connection_runs_in_wal_mode(app):
+    from recurly import database
+
+    with database.engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert connection.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
@@ -0,0 +1,92 @@
+import asyncio
+import json
+from datetime import datetime
+
+from recurly import events
+from recurly.events import CREATED, DELETED, UPDATED, TaskEvent, TaskEventHub, sse_events, task_events
+from recurly.models.task import Task
+
+
+def _drain(queue: asyncio.Queue) -> list:
+    items = []
+    while not queue.empty():
+        items.append(queue.get_nowait())
+    return items
+
+
+def test_committed_changes_reach_the_assignees_subscribers(session, register, user_id):
+    me = user_id(register())
+    other = user_id(register("other@example.com"))
+
+    async def run():
+        mine = task_events.subscribe(me)
+        theirs = task_events.subscribe(other)
+        try:
+            task = Task(title="Stretch", cadence="daily", assigned_to=me, created_at=datetime(2024, 1, 1))
+            session.add(task)
+            session.commit()
+            await asyncio.sleep(0)
+            created = _drain(mine.queue)
+
+            task.title = "Rolled back"
+            session.add(task)
+            session.flush()
+            session.rollback()
+            await asyncio.sleep(0)
+            assert _drain(mine.queue) == []
+
+            task = session.get(Task, task.id)
+            task.title = "Stretch more"
+            session.add(task)
+            session.commit()
+            session.delete(task)
+            session.commit()
+            await asyncio.sleep(0)
+            return task.id, created, _drain(mine.queue), _drain(theirs.queue)
+        finally:
+            task_events.unsubscribe(mine)
+            task_events.unsubscribe(theirs)
+
+    task_id, created, later, theirs = asyncio.run(run())
+    assert [(item.type, item.task_id) for item in created] == [(CREATED, task_id)]
+    assert created[0].task["title"] == "Stretch"
+    assert [item.type for item in later] == [UPDATED, DELETED]
+    assert later[0].task["title"] == "Stretch more"
+    assert later[1].change_seq is not None and later[1].change_seq > later[0].change_seq
+    assert theirs == []
+    assert not task_events.has_subscribers
+
+
+def test_slow_subscriber_is_dropped_with_an_overflow_event(monkeypatch):
+    monkeypatch.setattr(events, "TASK_STREAM_BUFFER_SIZE", 2)
+    hub = TaskEventHub()
+
+    async def run():
+        subscription = hub.subscribe(1)
+        hub._deliver([TaskEvent(UPDATED, 1, task_id, task_id) for task_id in range(3)])
+        assert subscription.dropped and not hub.has_subscribers
+        return [message async for message in sse_events(subscription, hub)]
+
+    messages = asyncio.run(run())
+    # The backlog is discarded; the client resyncs from /tasks/changes
+    assert len(messages) == 1 and messages[0].startswith("event: overflow\n")
+    assert hub.stats() == {"subscribers": 0, "delivered": 2, "dropped": 1}
+
+
+def test_stream_formats_events_and_sends_keep_alives():
+    hub = TaskEventHub()
+
+    async def run():
+        subscription = hub.subscribe(1)
+        stream = sse_events(subscription, hub, heartbeat=0.01)
+        assert await stream.__anext__() == ": keep-alive\n\n"
+        hub.publish([TaskEvent(DELETED, 1, 7, 42)])
+        message = await stream.__anext__()
+        await stream.aclose()
+        return message
+
+    message = asyncio.run(run())
+    lines = message.rstrip("\n").split("\n")
+    assert lines[:2] == ["event: deleted", "id: 42"]
+    assert json.loads(lines[2][len("data: "):]) == {"task_id": 7, "change_seq": 42}
+    assert not hub.has_subscribers
@@ -0,0 +1,65 @@
+import asyncio
+import csv
+import io
+import json
+
+from recurly.export import EXPORT_FIELDS, csv_chunks, ndjson_chunks
+
+
+async def _partitions(*partitions):
+    for rows in partitions:
+        yield rows
+
+
+async def _collect(chunks) -> list:
+    return [chunk async for chunk in chunks]
+
+
+def _row(task_id: int) -> tuple:
+    return tuple(task_id if field == "id" else None for field in EXPORT_FIELDS)
+
+
+def test_one_chunk_per_partition():
+    chunks = asyncio.run(_collect(ndjson_chunks(_partitions([_row(1), _row(2)], [_row(3)]))))
+    assert len(chunks) == 2
+    assert [json.loads(line)["id"] for line in b"".join(chunks).splitlines()] == [1, 2, 3]
+    csv_data = asyncio.run(_collect(csv_chunks(_partitions([_row(1)], [_row(2)]))))
+    assert len(csv_data) == 2 and csv_data[0].startswith(",".join(EXPORT_FIELDS).encode())
+
+
+def _create(client, headers, title: str, assigned_to: int) -> dict:
+    return client.post(
+        "/api/tasks", json={"title": title, "cadence": "daily", "assigned_to": assigned_to}, headers=headers
+    ).json()
+
+
+def test_export_streams_ndjson_and_csv(client, register, user_id):
+    headers = register()
+    me = user_id(headers)
+    titles = ['Plain', 'Quote "and", comma', "Line\nbreak"]
+    for title in titles:
+        _create(client, headers, title, me)
+
+    ndjson = client.get("/api/tasks/export", headers=headers)
+    assert ndjson.headers["content-type"] == "application/x-ndjson"
+    assert ndjson.headers["content-disposition"] == 'attachment; filename="tasks.ndjson"'
+    records = [json.loads(line) for line in ndjson.text.splitlines()]
+    assert [record["title"] for record in records] == titles
+    assert set(records[0]) == set(EXPORT_FIELDS)
+
+    exported = client.get("/api/tasks/export", params={"format": "csv"}, headers=headers)
+    assert exported.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(exported.text)))
+    assert [row["title"] for row in rows] == titles
+
+
+def test_export_filters(client, register, user_id):
+    owner = register("owner@example.com")
+    other = register("other@example.com")
+    _create(client, owner, "Mine", user_id(owner))
+    _create(client, owner, "Theirs", user_id(other))
+    response = client.get("/api/tasks/export", params={"assigned_to": user_id(other)}, headers=owner)
+    assert [json.loads(line)["title"] for line in response.text.splitlines()] == ["Theirs"]
+    response = client.get("/api/tasks/export", params={"due_before": "2000-01-01T00:00:00"}, headers=owner)
+    assert response.text == ""
+    assert client.get("/api/tasks/export", params={"format": "xml"}, headers=owner).status_code == 422
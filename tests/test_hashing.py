@@ -0,0 +1,86 @@
+import asyncio
+import threading
+
+import pytest
+from passlib.hash import bcrypt
+from sqlmodel import select
+
+from recurly.hashing import PASSWORD_HASH_ROUNDS, PasswordHasher, PasswordHasherBusy, password_hasher, pwd_context
+from recurly.models.user import User
+
+
+def test_hash_and_verify_in_the_pool():
+    hasher = PasswordHasher("thread", workers=2, queue_size=0)
+
+    async def run():
+        hashed = await hasher.hash("correct horse")
+        return hashed, await hasher.verify_and_update("correct horse", hashed), await hasher.verify_and_update("wrong", hashed)
+
+    try:
+        hashed, right, wrong = asyncio.run(run())
+    finally:
+        hasher.shutdown()
+    assert hashed.startswith("$2")
+    assert right == (True, None)
+    assert wrong[0] is False
+
+
+def test_full_pool_fails_fast():
+    hasher = PasswordHasher("thread", workers=1, queue_size=1)
+    release = threading.Event()
+
+    async def run():
+        blocked = [asyncio.ensure_future(hasher._submit(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(PasswordHasherBusy):
+            await hasher._submit(release.wait)
+        release.set()
+        await asyncio.gather(*blocked)
+        return hasher.pending
+
+    try:
+        assert asyncio.run(run()) == 0
+    finally:
+        hasher.shutdown()
+
+
+def test_unknown_executor_is_rejected():
+    with pytest.raises(ValueError):
+        PasswordHasher("fiber")
+
+
+def test_busy_hasher_answers_503_with_retry_after(client, monkeypatch):
+    monkeypatch.setattr(password_hasher, "kind", "thread")
+    monkeypatch.setattr(password_hasher, "capacity", 0)
+    response = client.post(
+        "/auth/register",
+        json={"email": "busy@example.com", "password": "pw-123456", "password_confirm": "pw-123456"},
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_login_checks_the_password(client, register):
+    register("someone@example.com")
+    response = client.post("/auth/login", data={"username": "someone@example.com", "password": "nope"})
+    assert response.status_code == 401
+
+
+def test_login_upgrades_a_low_cost_hash(client, session, register, login):
+    register("rehash@example.com", "rehash-me")
+    user = session.exec(select(User).where(User.email == "rehash@example.com")).one()
+    weak_hash = bcrypt.using(rounds=4).hash("rehash-me")
+    user.password_hash = weak_hash
+    session.add(user)
+    session.commit()
+
+    response = client.post("/auth/login", data={"username": "rehash@example.com", "password": "nope"})
+    assert response.status_code == 401
+    session.refresh(user)
+    assert user.password_hash == weak_hash
+
+    login("rehash@example.com", "rehash-me")
+    session.refresh(user)
+    assert user.password_hash != weak_hash
+    assert bcrypt.from_string(user.password_hash).rounds == PASSWORD_HASH_ROUNDS
+    assert pwd_context.verify("rehash-me", user.password_hash)
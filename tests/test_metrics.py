@@ -0,0 +1,91 @@
+import bisect
+import threading
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+from recurly import metrics
+from recurly.metrics import Counter, Histogram, REGISTRY, _Metric, instrument_engine
+
+
+@pytest.fixture
+def registry():
+    before = list(REGISTRY)
+    yield
+    REGISTRY[:] = before
+
+
+def test_metric_subclasses_must_render_samples(registry):
+    with pytest.raises(TypeError):
+        _Metric("incomplete", "Has no samples.")
+
+
+def test_counter_sums_the_shards_of_every_thread(registry):
+    counter = Counter("test_events_total", "Events.", ("kind",))
+    threads = [threading.Thread(target=lambda: [counter.inc(("a",)) for _ in range(1000)]) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counter.inc(("b",), 2)
+    assert counter.values() == {("a",): 4000, ("b",): 2}
+    assert 'test_events_total{kind="a"} 4000' in counter.render()
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    histogram = Histogram("test_latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value)
+    lines = list(histogram.samples())
+    assert lines == [
+        'test_latency_seconds_bucket{le="0.1"} 1',
+        'test_latency_seconds_bucket{le="1"} 3',
+        'test_latency_seconds_bucket{le="+Inf"} 4',
+        "test_latency_seconds_sum 6.05",
+        "test_latency_seconds_count 4",
+    ]
+
+
+def test_requests_are_labelled_by_route_template(client, register):
+    headers = register()
+    client.get("/api/tasks/12345", headers=headers)
+    body = client.get("/metrics").text
+    assert 'http_requests_total{method="GET",route="/api/tasks/{task_id}",status="404"} 1' in body
+    assert "/api/tasks/12345" not in body
+
+
+def test_pool_checkouts_are_counted_and_returned(client, register):
+    hold_count = lambda: sum(sum(entry[:-1]) for entry in metrics.db_pool_connection_hold.values().values())
+    before = hold_count()
+    register()
+    assert hold_count() > before
+    # Every connection checked out by the requests has been checked back in
+    assert metrics.db_pool_connections_in_use.values().get((), 0) == 0
+
+
+def test_pool_checkout_wait_is_timed(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=QueuePool,
+        pool_size=1,
+        max_overflow=0,
+        connect_args={"check_same_thread": False},
+    )
+    instrument_engine(engine)
+    buckets = metrics.db_pool_checkout_wait.buckets
+    waits = lambda: metrics.db_pool_checkout_wait.values().get((), [0] * (len(buckets) + 2))
+    before = waits()
+    held = engine.connect()
+    releaser = threading.Timer(0.2, held.close)
+    releaser.start()
+    # The pool's only connection is held, so this waits for the timer to return it
+    with engine.connect():
+        pass
+    releaser.join()
+    engine.dispose()
+    after = waits()
+    slow = bisect.bisect_left(buckets, 0.2)
+    assert sum(after[:-1]) - sum(before[:-1]) == 2
+    assert sum(after[slow:-1]) - sum(before[slow:-1]) == 1
+    assert after[-1] - before[-1] >= 0.2
@@ -0,0 +1,89 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import text
+
+from recurly.pagination import decode_cursor, decode_id_cursor, encode_cursor
+
+
+def test_cursor_round_trip_is_url_safe():
+    cursor = encode_cursor({"id": 12345, "at": "2024-01-01T08:00:00"})
+    assert "=" not in cursor and "/" not in cursor and "+" not in cursor
+    assert decode_cursor(cursor) == {"id": 12345, "at": "2024-01-01T08:00:00"}
+
+
+@pytest.mark.parametrize("cursor", ["!!!", encode_cursor({"id": "7"}), "WzFd"])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(HTTPException) as raised:
+        decode_id_cursor(cursor)
+    assert raised.value.status_code == 400
+
+
+def _create_tasks(client, headers, assigned_to: int, count: int) -> list:
+    return [
+        client.post(
+            "/api/tasks", json={"title": f"Task {i}", "cadence": "daily", "assigned_to": assigned_to}, headers=headers
+        ).json()["id"]
+        for i in range(count)
+    ]
+
+
+def _pages(client, path: str, headers: dict, limit: int, **params) -> list:
+    pages, params = [], {"limit": limit, **params}
+    while True:
+        response = client.get(path, params=params, headers=headers)
+        assert response.status_code == 200
+        pages.append([task["id"] for task in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return pages
+        params["cursor"] = cursor
+
+
+@pytest.mark.parametrize("path", ["/api/tasks", "/api/tasks/my"])
+def test_pages_partition_the_tasks(client, register, user_id, path):
+    headers = register()
+    ids = _create_tasks(client, headers, user_id(headers), 5)
+    pages = _pages(client, path, headers, limit=2)
+    assert pages == [ids[0:2], ids[2:4], ids[4:5]]
+
+
+@pytest.mark.parametrize("path", ["/api/tasks", "/api/tasks/my"])
+def test_due_order_pages_scheduled_tasks_then_unscheduled(client, session, register, user_id, path):
+    headers = register()
+    me = user_id(headers)
+    ids = [
+        client.post("/api/tasks", json={"title": cadence, "cadence": cadence, "assigned_to": me}, headers=headers).json()["id"]
+        for cadence in ("weekly", "custom", "hourly", "daily", "custom", "hourly")
+    ]
+    # Tie the two hourly tasks, so the id breaks it
+    session.execute(
+        text("UPDATE tasks SET next_due_at = '2030-01-01 08:00:00.000000' WHERE id IN (:a, :b)"),
+        {"a": ids[2], "b": ids[5]},
+    )
+    session.commit()
+    expected = [ids[3], ids[0], ids[2], ids[5], ids[1], ids[4]]
+    for limit in (1, 2, 4, 6):
+        pages = _pages(client, path, headers, limit, order="due", fields="title")
+        assert [task_id for page in pages for task_id in page] == expected
+    cursor = encode_cursor({"due": "yesterday", "id": 1})
+    assert client.get(path, params={"order": "due", "cursor": cursor}, headers=headers).status_code == 400
+
+
+def test_full_last_page_has_no_cursor(client, register, user_id):
+    headers = register()
+    ids = _create_tasks(client, headers, user_id(headers), 4)
+    assert _pages(client, "/api/tasks", headers, limit=2) == [ids[0:2], ids[2:4]]
+    assert _pages(client, "/api/tasks", headers, limit=4) == [ids]
+
+
+def test_deprecated_skip_still_pages(client, register, user_id):
+    headers = register()
+    ids = _create_tasks(client, headers, user_id(headers), 3)
+    response = client.get("/api/tasks", params={"skip": 1, "limit": 1}, headers=headers)
+    assert [task["id"] for task in response.json()] == ids[1:2]
+
+
+def test_bad_cursor_and_limits_are_client_errors(client, register):
+    headers = register()
+    assert client.get("/api/tasks", params={"cursor": "nonsense"}, headers=headers).status_code == 400
+    assert client.get("/api/tasks/my", params={"limit": 0}, headers=headers).status_code == 422
@@ -0,0 +1,81 @@
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from recurly import database, profiling
+from recurly.profiling import Profile, ProfilingMiddleware, _report_repeated_statements
+
+
+@pytest.fixture
+def profiled(client):
+    """A client for the app with every request sampled; ``client`` runs the lifespan."""
+    return TestClient(ProfilingMiddleware(client.app, sample_rate=1))
+
+
+def _timings(header: str) -> dict:
+    timings = {}
+    for part in header.split(", "):
+        name, duration = part.split(";")[:2]
+        timings[name] = float(duration[len("dur="):])
+    return timings
+
+
+def test_sampled_requests_get_a_server_timing_breakdown(profiled, register, user_id):
+    headers = register()
+    created = profiled.post(
+        "/api/tasks", json={"title": "Sweep", "cadence": "daily", "assigned_to": user_id(headers)}, headers=headers
+    )
+    assert created.status_code == 201, created.text
+    response = profiled.get("/api/tasks", headers=headers)
+    assert response.status_code == 200
+    header = response.headers["server-timing"]
+    timings = _timings(header)
+    assert list(timings) == ["auth", "db", "handler", "serialize", "total"]
+    assert timings["total"] >= timings["db"]
+    assert timings["total"] >= timings["handler"]
+    assert 'desc="0 queries"' not in header
+
+
+def test_unsampled_requests_are_left_alone(client, register):
+    headers = register()
+    assert "server-timing" not in client.get("/api/tasks", headers=headers).headers
+
+
+def test_repeated_statements_are_reported_as_n_plus_one(caplog, monkeypatch):
+    monkeypatch.setattr(profiling, "N_PLUS_ONE_THRESHOLD", 3)
+    profile = Profile()
+    profile.statements["SELECT tasks.id FROM tasks WHERE tasks.id = ?"] = 3
+    profile.statements["SELECT users.id FROM users"] = 2
+    with caplog.at_level(logging.WARNING, logger=profiling.__name__):
+        _report_repeated_statements({"method": "GET"}, profile)
+    assert [record.getMessage() for record in caplog.records] == [
+        "Possible N+1: GET <unmatched> ran the same statement 3 times: SELECT tasks.id FROM tasks WHERE tasks.id = ?"
+    ]
+
+
+def test_listing_tasks_does_not_repeat_statements(profiled, register, user_id, caplog):
+    headers = register()
+    me = user_id(headers)
+    for n in range(profiling.N_PLUS_ONE_THRESHOLD + 1):
+        created = profiled.post(
+            "/api/tasks", json={"title": f"Task {n}", "cadence": "daily", "assigned_to": me}, headers=headers
+        )
+        assert created.status_code == 201, created.text
+    with caplog.at_level(logging.WARNING, logger=profiling.__name__):
+        response = profiled.get("/api/tasks", headers=headers)
+    assert response.status_code == 200
+    assert len(response.json()) == profiling.N_PLUS_ONE_THRESHOLD + 1
+    assert not [record for record in caplog.records if "N+1" in record.getMessage()]
+
+
+def test_slow_queries_are_logged_with_their_plan(app, caplog, monkeypatch):
+    monkeypatch.setattr(profiling, "SLOW_QUERY_MS", 0)
+    with caplog.at_level(logging.WARNING, logger=profiling.__name__):
+        with database.engine.connect() as conn:
+            conn.execute(text("SELECT title FROM tasks WHERE id = :id"), {"id": 1}).all()
+    message = caplog.records[-1].getMessage()
+    assert message.startswith("Slow query (")
+    assert "SELECT title FROM tasks WHERE id = ?" in message
+    assert "USING INTEGER PRIMARY KEY" in message
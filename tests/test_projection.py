@@ -0,0 +1,60 @@
+from recurly.pagination import MAX_PAGE_SIZE
+
+
+def _create(client, headers, title: str, assigned_to: int) -> int:
+    response = client.post(
+        "/api/tasks", json={"title": title, "cadence": "daily", "assigned_to": assigned_to}, headers=headers
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def test_fields_project_lists_and_single_tasks(client, register, user_id, statements):
+    headers = register()
+    task_id = _create(client, headers, "Water plants", user_id(headers))
+
+    statements.clear()
+    listed = client.get("/api/tasks", params={"fields": "title, next_due_at"}, headers=headers).json()
+    assert list(listed[0]) == ["id", "title", "next_due_at"]
+    page_query = next(statement for statement in statements if "ORDER BY tasks.id" in statement)
+    assert "tasks.description" not in page_query
+
+    mine = client.get("/api/tasks/my", params={"fields": "title"}, headers=headers).json()
+    assert mine == [{"id": task_id, "title": "Water plants"}]
+    single = client.get(f"/api/tasks/{task_id}", params={"fields": "cadence"}, headers=headers).json()
+    assert single == {"id": task_id, "cadence": "daily"}
+
+
+def test_projections_are_cached_separately(client, register, user_id):
+    headers = register()
+    task_id = _create(client, headers, "Water plants", user_id(headers))
+    full = client.get(f"/api/tasks/{task_id}", headers=headers)
+    slim = client.get(f"/api/tasks/{task_id}", params={"fields": "title"}, headers=headers)
+    assert full.headers["ETag"] != slim.headers["ETag"]
+
+
+def test_unknown_fields_are_rejected(client, register):
+    headers = register()
+    response = client.get("/api/tasks", params={"fields": "title,password,secret"}, headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown fields: password, secret"
+
+
+def test_ids_fetch_several_tasks_in_one_request(client, register, user_id):
+    headers = register()
+    me = user_id(headers)
+    created = [_create(client, headers, f"Task {n}", me) for n in range(3)]
+    missing = created[-1] + 100
+    response = client.get(
+        "/api/tasks", params={"ids": f"{created[2]},{missing},{created[0]},{created[0]}", "fields": "title"},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    # Sorted by id, duplicates collapsed and missing ids left out
+    assert response.json() == [{"id": created[0], "title": "Task 0"}, {"id": created[2], "title": "Task 2"}]
+
+
+def test_ids_must_be_a_bounded_list_of_integers(client, register):
+    headers = register()
+    for ids in ("1,two", ",", ",".join(str(n) for n in range(MAX_PAGE_SIZE + 1))):
+        assert client.get("/api/tasks", params={"ids": ids}, headers=headers).status_code == 400
@@ -0,0 +1,63 @@
+import itertools
+
+import pytest
+
+from recurly import database
+from recurly.database import STICKY_COOKIE
+from recurly.replica import copy_database
+
+
+@pytest.fixture
+def replica(app, tmp_path, monkeypatch):
+    """One read replica, refreshed from the primary only when the test copies it."""
+    path = str(tmp_path / "replica.db")
+    engines = [database._create_engines(f"sqlite:///{path}")]
+    monkeypatch.setattr(database, "replica_engines", engines)
+    monkeypatch.setattr(database, "_next_replica", itertools.cycle(engines))
+
+    def sync():
+        copy_database(database.engine.url.database, path)
+
+    yield sync
+    engines[0][1].dispose()
+
+
+def _titles(client, headers) -> list:
+    response = client.get("/api/tasks", headers=headers)
+    assert response.status_code == 200, response.text
+    return [task["title"] for task in response.json()]
+
+
+def test_reads_go_to_the_replica_outside_the_sticky_window(client, register, user_id, replica):
+    headers = register()
+    me = user_id(headers)
+    replica()
+    created = client.post("/api/tasks", json={"title": "Fresh", "cadence": "daily", "assigned_to": me}, headers=headers)
+    assert created.status_code == 201
+    assert STICKY_COOKIE in created.cookies
+
+    # Within the sticky window the client reads its own write from the primary
+    assert _titles(client, headers) == ["Fresh"]
+    client.cookies.clear()
+    # Afterwards reads are served by the (lagging) replica
+    assert _titles(client, headers) == []
+    replica()
+    assert _titles(client, headers) == ["Fresh"]
+
+
+def test_expired_or_malformed_sticky_cookies_read_from_the_replica(client, register, user_id, replica):
+    headers = register()
+    me = user_id(headers)
+    client.post("/api/tasks", json={"title": "Fresh", "cadence": "daily", "assigned_to": me}, headers=headers)
+    replica()
+    client.post("/api/tasks", json={"title": "Newer", "cadence": "daily", "assigned_to": me}, headers=headers)
+    for value in ("0", "not-a-time"):
+        client.cookies.set(STICKY_COOKIE, value)
+        assert _titles(client, headers) == ["Fresh"]
+
+
+def test_reads_without_replicas_set_no_cookie(client, register, user_id):
+    headers = register()
+    me = user_id(headers)
+    created = client.post("/api/tasks", json={"title": "Fresh", "cadence": "daily", "assigned_to": me}, headers=headers)
+    assert STICKY_COOKIE not in created.cookies
@@ -0,0 +1,95 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import List, Sequence
+
+import pytest
+
+from recurly import scheduler as scheduler_module
+from recurly.models.task import Task
+from recurly.scheduler import Reminder, ReminderScheduler, ReminderSink, build_sink
+
+NOW = datetime(2024, 1, 1, 12, 0)
+
+
+class ListSink(ReminderSink):
+    def __init__(self):
+        self.sent: List[Reminder] = []
+
+    async def send(self, reminders: Sequence[Reminder]) -> None:
+        self.sent.extend(reminders)
+
+
+def _add_task(session, user_id: int, title: str, next_due_at: datetime) -> Task:
+    # An hourly task created an hour before its first due time
+    task = Task(title=title, cadence="hourly", assigned_to=user_id, created_at=next_due_at - timedelta(hours=1))
+    session.add(task)
+    session.commit()
+    assert task.next_due_at == next_due_at
+    return task
+
+
+def test_sink_must_implement_send():
+    with pytest.raises(TypeError):
+        ReminderSink()
+    with pytest.raises(ValueError):
+        build_sink("carrier-pigeon")
+
+
+def test_schedule_never_grows_past_max_loaded():
+    scheduler = ReminderScheduler(ListSink(), horizon=3600, max_loaded=2)
+    scheduler._loaded_until = NOW + timedelta(hours=1)
+    scheduler._apply_changes([(1, NOW + timedelta(minutes=10)), (2, NOW + timedelta(minutes=20))])
+    scheduler._apply_changes([(3, NOW + timedelta(minutes=5)), (4, NOW + timedelta(minutes=30))])
+    assert len(scheduler) <= 2
+    # The window now ends before the first task that did not fit
+    assert scheduler._loaded_until < NOW + timedelta(minutes=5)
+    assert all(due <= scheduler._loaded_until for due in scheduler._due.values())
+    # Rescheduling a loaded task is not an addition
+    scheduler._apply_changes([(1, NOW + timedelta(minutes=1))])
+    assert scheduler._due == {1: NOW + timedelta(minutes=1)}
+
+
+def test_refill_loads_one_window_and_fires_confirmed_reminders(session, register, user_id):
+    me = user_id(register())
+    soon = _add_task(session, me, "Soon", NOW + timedelta(minutes=5))
+    _add_task(session, me, "Later", NOW + timedelta(hours=3))
+    sink = ListSink()
+    scheduler = ReminderScheduler(sink, horizon=3600)
+
+    async def run():
+        await scheduler.refill(NOW)
+        assert set(scheduler._due) == {soon.id}
+        await scheduler.fire(NOW + timedelta(minutes=5))
+
+    asyncio.run(run())
+    assert [(reminder.task_id, reminder.title) for reminder in sink.sent] == [(soon.id, "Soon")]
+
+
+def test_poll_picks_up_writes_the_hooks_never_saw(session, register, user_id):
+    me = user_id(register())
+    scheduler = ReminderScheduler(ListSink(), horizon=3600, poll_interval=5)
+
+    async def run():
+        scheduler._last_seq = await scheduler._max_change_seq()
+        await scheduler.refill(NOW)
+        # Committed by "another worker": no scheduler is active to be notified
+        task = _add_task(session, me, "Elsewhere", NOW + timedelta(minutes=30))
+        assert len(scheduler) == 0
+        await scheduler.poll_changes()
+        return task
+
+    task = asyncio.run(run())
+    assert scheduler._due == {task.id: task.next_due_at}
+
+
+def test_in_process_scheduler_polls_the_change_feed(app, monkeypatch):
+    monkeypatch.setattr(scheduler_module, "SCHEDULER_POLL_SECONDS", 0.5)
+
+    async def run():
+        started = scheduler_module.start_scheduler(ListSink())
+        try:
+            return started.poll_interval
+        finally:
+            await scheduler_module.stop_scheduler()
+
+    assert asyncio.run(run()) == 0.5
@@ -0,0 +1,78 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+from recurly.search import MAX_SEARCH_TERMS, match_tasks, search_terms
+
+
+def _create(client, headers, title: str, description: str = None) -> int:
+    me = client.get("/auth/me", headers=headers).json()["id"]
+    response = client.post(
+        "/api/tasks",
+        json={"title": title, "description": description, "cadence": "daily", "assigned_to": me},
+        headers=headers,
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def _search(client, headers, q: str, **params) -> list:
+    response = client.get("/api/tasks/search", params={"q": q, **params}, headers=headers)
+    assert response.status_code == 200, response.text
+    return [task["id"] for task in response.json()]
+
+
+def test_search_ranks_title_matches_first_and_needs_every_word(client, register):
+    headers = register()
+    in_description = _create(client, headers, "Weekend chores", "Water the garden plants")
+    in_title = _create(client, headers, "Water plants", "Kitchen window")
+    _create(client, headers, "Water filter", "Replace the cartridge")
+
+    assert _search(client, headers, "water plants") == [in_title, in_description]
+    # The last word also matches as a prefix, and case and accents are ignored
+    assert _search(client, headers, "WATER plan") == [in_title, in_description]
+    assert _search(client, headers, "gärden") == [in_description]
+
+
+def test_search_follows_updates_and_deletes(client, register):
+    headers = register()
+    task_id = _create(client, headers, "Call the plumber")
+    client.put(f"/api/tasks/{task_id}", json={"title": "Call the electrician"}, headers=headers)
+    assert _search(client, headers, "plumber") == []
+    assert _search(client, headers, "electrician") == [task_id]
+    client.delete(f"/api/tasks/{task_id}", headers=headers)
+    assert _search(client, headers, "electrician") == []
+
+
+def test_search_pages_through_with_a_cursor(client, register):
+    headers = register()
+    created = [_create(client, headers, f"Stretch {n}") for n in range(5)]
+    params, seen = {"limit": 2}, []
+    while True:
+        response = client.get("/api/tasks/search", params={"q": "stretch", **params}, headers=headers)
+        seen += [task["id"] for task in response.json()]
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+    assert sorted(seen) == created and len(seen) == len(set(seen))
+
+
+def test_search_input_is_never_a_query_language(client, register):
+    headers = register()
+    task_id = _create(client, headers, "Pay rent")
+    assert _search(client, headers, '"pay"^ -(rent*') == [task_id]
+    assert client.get("/api/tasks/search", params={"q": "?!"}, headers=headers).status_code == 400
+    assert client.get("/api/tasks/search", params={"q": "pay", "cursor": "bogus"}, headers=headers).status_code == 400
+
+
+def test_search_terms_are_bounded():
+    assert search_terms("Pay the RENT, now!") == ["pay", "the", "rent", "now"]
+    with pytest.raises(HTTPException):
+        search_terms(" ".join(["word"] * (MAX_SEARCH_TERMS + 1)))
+
+
+def test_postgresql_search_uses_the_indexed_expression():
+    compiled = str(match_tasks("water pla", "postgresql").compile(dialect=postgresql.dialect()))
+    assert "to_tsvector('english'::regconfig, title || ' ' || coalesce(description, '')) @@ to_tsquery(" in compiled
+    with pytest.raises(HTTPException):
+        match_tasks("water", "mysql")
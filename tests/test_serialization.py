@@ -0,0 +1,59 @@
+import json
+from datetime import datetime, timezone
+
+from sqlmodel import select
+
+from recurly.models.task import Task
+from recurly.schemas import TaskRead as TaskReadSchema
+from recurly.serialization import (
+    TASK_READ_COLUMNS,
+    TASK_READ_FIELDS,
+    dumps,
+    json_row_response,
+    json_rows_response,
+    task_columns,
+)
+
+
+def _add_tasks(session, assigned_to: int) -> list:
+    tasks = [
+        Task(title="Daily", cadence="daily", assigned_to=assigned_to, created_at=datetime(2024, 1, 1, 8, 30)),
+        Task(title="Weekly", description="With a description", cadence="weekly", assigned_to=assigned_to),
+    ]
+    session.add_all(tasks)
+    session.commit()
+    return tasks
+
+
+def _model_json(task: Task) -> dict:
+    return json.loads(TaskReadSchema.model_validate(task, from_attributes=True).model_dump_json())
+
+
+def test_column_rows_serialise_like_the_response_model(session, register, user_id):
+    tasks = _add_tasks(session, user_id(register()))
+    rows = session.exec(select(*TASK_READ_COLUMNS).order_by(Task.id)).all()
+
+    response = json_rows_response(rows, headers={"X-Total-Count": "2"}, status_code=201)
+    assert response.status_code == 201
+    assert response.media_type == "application/json"
+    assert response.headers["X-Total-Count"] == "2"
+    assert json.loads(response.body) == [_model_json(task) for task in tasks]
+    assert json.loads(json_row_response(rows[0]).body) == _model_json(tasks[0])
+
+
+def test_list_and_detail_endpoints_match_the_response_model(client, session, register, user_id):
+    headers = register()
+    tasks = _add_tasks(session, user_id(headers))
+    assert client.get("/api/tasks", headers=headers).json() == [_model_json(task) for task in tasks]
+    assert client.get("/api/tasks/my", headers=headers).json() == [_model_json(task) for task in tasks]
+    assert client.get(f"/api/tasks/{tasks[0].id}", headers=headers).json() == _model_json(tasks[0])
+
+
+def test_task_columns_follow_the_requested_fields():
+    assert task_columns(TASK_READ_FIELDS) is TASK_READ_COLUMNS
+    assert task_columns(("id", "title")) == (Task.id, Task.title)
+
+
+def test_dumps_matches_pydantic_datetime_encoding():
+    value = {"naive": datetime(2024, 1, 1, 8, 30), "utc": datetime(2024, 1, 1, 8, 30, tzinfo=timezone.utc)}
+    assert json.loads(dumps(value)) == {"naive": "2024-01-01T08:30:00", "utc": "2024-01-01T08:30:00Z"}
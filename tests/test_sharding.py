@@ -0,0 +1,103 @@
+import asyncio
+from collections import namedtuple
+
+import pytest
+from sqlmodel import Session, SQLModel, select
+
+from recurly import database
+from recurly.models.task import Task
+from recurly.sharding import SHARD_ID_STRIDE, merge_rows, move_users, plan_rebalance
+
+Row = namedtuple("Row", "id due")
+
+
+@pytest.fixture
+def shards(app, tmp_path):
+    """Two task shards; users are placed by ``user_id % 2`` until moved."""
+    engines = [database._create_engines(f"sqlite:///{tmp_path / f'shard{n}.db'}") for n in range(2)]
+    for _, engine in engines:
+        SQLModel.metadata.create_all(engine)
+    # Modules hold on to the list itself, so it is filled in rather than replaced
+    database.shard_engines[:] = engines
+    yield [engine for _, engine in engines]
+    database.shard_engines.clear()
+    for _, engine in engines:
+        engine.dispose()
+
+
+def _task_ids_on(engine) -> list:
+    with Session(engine) as session:
+        return list(session.exec(select(Task.id).order_by(Task.id)).all())
+
+
+def _create(client, headers, title: str, assigned_to: int) -> int:
+    response = client.post(
+        "/api/tasks", json={"title": title, "cadence": "daily", "assigned_to": assigned_to}, headers=headers
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def test_merge_rows_keeps_order_and_drops_duplicates():
+    first = [Row(1, 1), Row(3, 3), Row(5, 5)]
+    # Task 3 is caught mid-move and is on both shards
+    second = [Row(2, 2), Row(3, 3), Row(4, 4)]
+    merged = merge_rows([first, second], lambda row: row.due)
+    assert [row.id for row in merged] == [1, 2, 3, 4, 5]
+    assert [row.id for row in merge_rows([first, second], lambda row: row.due, limit=2, skip=1)] == [2, 3]
+
+
+def test_plan_rebalance_evens_out_shards():
+    loads = [{1: 40, 2: 30, 3: 20}, {4: 10}]
+    moves = plan_rebalance(loads)
+    totals = [0, 0]
+    for shard, users in enumerate(loads):
+        for user_id, count in users.items():
+            totals[moves.get(user_id, shard)] += count
+    assert max(totals) - min(totals) <= 0.1 * sum(totals) / 2
+    assert plan_rebalance([{1: 10}, {2: 10}]) == {}
+
+
+def test_task_ids_are_strided_by_shard(client, register, user_id, shards):
+    created = {}
+    for email in ("one@example.com", "two@example.com"):
+        headers = register(email)
+        me = user_id(headers)
+        created[me] = (headers, [_create(client, headers, f"Task {n}", me) for n in range(2)])
+
+    all_ids = []
+    for me, (headers, task_ids) in created.items():
+        shard = me % 2
+        assert all(task_id % SHARD_ID_STRIDE == shard for task_id in task_ids)
+        assert _task_ids_on(shards[shard]) == task_ids
+        assert [task["id"] for task in client.get("/api/tasks/my", headers=headers).json()] == task_ids
+        all_ids += task_ids
+    # Listing every task fans out to both shards and merges by id
+    listed = client.get("/api/tasks", headers=created[1][0]).json()
+    assert [task["id"] for task in listed] == sorted(all_ids)
+    # Or by due time, a page at a time
+    by_due = sorted(listed, key=lambda task: (task["next_due_at"], task["id"]))
+    seen, params = [], {"order": "due", "limit": 3}
+    while True:
+        response = client.get("/api/tasks", params=params, headers=created[1][0])
+        seen += [task["id"] for task in response.json()]
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+    assert seen == [task["id"] for task in by_due]
+
+
+def test_moved_tasks_keep_their_ids(client, register, user_id, shards):
+    headers = register()
+    me = user_id(headers)
+    source, target = me % 2, 1 - me % 2
+    task_ids = [_create(client, headers, f"Task {n}", me) for n in range(2)]
+
+    assert asyncio.run(move_users({me: target}, wait=0)) == 2
+    assert _task_ids_on(shards[source]) == []
+    assert _task_ids_on(shards[target]) == task_ids
+    assert [task["id"] for task in client.get("/api/tasks/my", headers=headers).json()] == task_ids
+
+    new_id = _create(client, headers, "After the move", me)
+    assert new_id % SHARD_ID_STRIDE == target
+    assert new_id not in task_ids
@@ -0,0 +1,76 @@
+from sqlmodel import select
+
+from recurly.models.completion import TaskCompletion
+
+
+def _items(assigned_to: int, count: int) -> list:
+    return [{"title": f"Task {i}", "cadence": "daily", "assigned_to": assigned_to} for i in range(count)]
+
+
+def test_batch_create_reports_each_item_in_order(client, register, user_id):
+    headers = register()
+    me = user_id(headers)
+    items = _items(me, 50)
+    items[3]["assigned_to"] = 999999
+    response = client.post("/api/tasks:batch", json={"items": items}, headers=headers)
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["index"] for result in results] == list(range(50))
+    assert results[3] == {"index": 3, "status": 400, "task": None, "detail": "Assigned user not found"}
+    assert {result["status"] for result in results[:3] + results[4:]} == {201}
+    assert len(client.get("/api/tasks/my", headers=headers).json()) == 49
+
+
+def test_batch_update_complete_and_delete(client, register, user_id):
+    owner = register("owner@example.com")
+    other = register("other@example.com")
+    me, them = user_id(owner), user_id(other)
+    created = client.post("/api/tasks:batch", json={"items": _items(me, 2) + _items(them, 1)}, headers=owner).json()
+    mine_a, mine_b, theirs = (result["task"]["id"] for result in created["results"])
+
+    updated = client.put("/api/tasks:batch", json={"items": [
+        {"id": mine_a, "title": "Renamed"}, {"id": 999999, "title": "Ghost"},
+    ]}, headers=owner).json()["results"]
+    assert updated[0]["status"] == 200 and updated[0]["task"]["title"] == "Renamed"
+    assert updated[1]["status"] == 404
+
+    completed = client.post("/api/tasks:batchComplete", json={"items": [
+        {"id": mine_b}, {"id": theirs},
+    ]}, headers=owner).json()["results"]
+    assert completed[0]["status"] == 200 and completed[0]["task"]["last_completed"] is not None
+    assert completed[1]["status"] == 403
+
+    deleted = client.post("/api/tasks:batchDelete", json={"ids": [mine_a, 999999]}, headers=owner).json()["results"]
+    assert [result["status"] for result in deleted] == [200, 404]
+    assert client.get(f"/api/tasks/{mine_a}", headers=owner).status_code == 404
+
+
+def test_batches_naming_a_task_twice_are_rejected(client, session, register, user_id):
+    headers = register()
+    created = client.post("/api/tasks:batch", json={"items": _items(user_id(headers), 1)}, headers=headers).json()
+    task_id = created["results"][0]["task"]["id"]
+    response = client.post("/api/tasks:batchComplete", json={"items": [
+        {"id": task_id, "completed_at": "2024-01-01T08:00:00"}, {"id": task_id, "completed_at": "2024-01-02T08:00:00"},
+    ]}, headers=headers)
+    assert response.status_code == 422
+    assert "appears more than once" in response.text
+    assert session.exec(select(TaskCompletion)).all() == []
+    response = client.put("/api/tasks:batch", json={"items": [
+        {"id": task_id, "title": "First"}, {"id": task_id, "title": "Second"},
+    ]}, headers=headers)
+    assert response.status_code == 422
+
+
+def test_empty_batches_are_rejected(client, register):
+    headers = register()
+    assert client.post("/api/tasks:batch", json={"items": []}, headers=headers).status_code == 422
+    assert client.post("/api/tasks:batchDelete", json={"ids": []}, headers=headers).status_code == 422
+
+
+def test_batch_update_is_one_executemany(client, register, user_id, statements):
+    headers = register()
+    created = client.post("/api/tasks:batch", json={"items": _items(user_id(headers), 20)}, headers=headers).json()
+    statements.clear()
+    items = [{"id": result["task"]["id"], "title": "Renamed"} for result in created["results"]]
+    assert client.put("/api/tasks:batch", json={"items": items}, headers=headers).status_code == 200
+    assert sum(statement.startswith("UPDATE tasks ") for statement in statements) == 1
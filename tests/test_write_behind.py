@@ -0,0 +1,102 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from recurly.models.task import Task
+from recurly.write_behind import TaskWriteBehind, task_write_behind
+
+
+def _add_tasks(session, assigned_to: int, count: int) -> list:
+    tasks = [Task(title=f"Task {n}", cadence="daily", assigned_to=assigned_to) for n in range(count)]
+    session.add_all(tasks)
+    session.commit()
+    return [task.id for task in tasks]
+
+
+def _rename(title):
+    def change(session, task):
+        task.title = title
+    return change
+
+
+def _reject(session, task):
+    raise HTTPException(status_code=409, detail="Rejected")
+
+
+def _run(writer: TaskWriteBehind, *writes):
+    async def run():
+        try:
+            return await asyncio.gather(
+                *(writer.submit(task_id, change) for task_id, change in writes), return_exceptions=True
+            )
+        finally:
+            await writer.close()
+    return asyncio.run(run())
+
+
+def test_concurrent_writes_share_one_commit(session, register, user_id):
+    task_ids = _add_tasks(session, user_id(register()), 3)
+    writer = TaskWriteBehind(enabled=True)
+    results = _run(writer, *((task_id, _rename(f"Renamed {task_id}")) for task_id in task_ids))
+    assert [result.title for result in results] == [f"Renamed {task_id}" for task_id in task_ids]
+    assert writer.stats() == {"batches": 1, "writes": 3}
+    session.expire_all()
+    assert [session.get(Task, task_id).title for task_id in task_ids] == [result.title for result in results]
+
+
+def test_writes_to_the_same_task_commit_in_order(session, register, user_id):
+    (task_id,) = _add_tasks(session, user_id(register()), 1)
+    writer = TaskWriteBehind(enabled=True)
+    first, second = _run(writer, (task_id, _rename("First")), (task_id, _rename("Second")))
+    assert (first.title, second.title) == ("First", "Second")
+    assert writer.stats() == {"batches": 2, "writes": 2}
+
+
+def test_rejected_and_missing_writes_fail_alone(session, register, user_id):
+    task_ids = _add_tasks(session, user_id(register()), 2)
+    writer = TaskWriteBehind(enabled=True)
+    renamed, rejected, missing = _run(
+        writer, (task_ids[0], _rename("Renamed")), (task_ids[1], _reject), (task_ids[1] + 100, _rename("Nope"))
+    )
+    assert renamed.title == "Renamed"
+    assert rejected.status_code == 409
+    assert missing.status_code == 404
+    assert writer.stats() == {"batches": 1, "writes": 3}
+
+
+def test_failed_group_commit_is_retried_one_write_at_a_time(session, register, user_id):
+    task_ids = _add_tasks(session, user_id(register()), 2)
+    writer = TaskWriteBehind(enabled=True)
+    # A NULL title fails the whole transaction, not just its own write
+    renamed, broken = _run(writer, (task_ids[0], _rename("Renamed")), (task_ids[1], _rename(None)))
+    assert renamed.title == "Renamed"
+    assert isinstance(broken, Exception) and not isinstance(broken, HTTPException)
+    assert writer.stats() == {"batches": 2, "writes": 2}
+    session.expire_all()
+    assert session.get(Task, task_ids[0]).title == "Renamed"
+    assert session.get(Task, task_ids[1]).title == "Task 1"
+
+
+@pytest.fixture
+def write_behind(monkeypatch):
+    monkeypatch.setattr(task_write_behind, "enabled", True)
+    monkeypatch.setattr(task_write_behind, "batches", 0)
+    monkeypatch.setattr(task_write_behind, "writes", 0)
+    return task_write_behind
+
+
+def test_completions_go_through_the_queue(client, register, user_id, write_behind):
+    headers = register()
+    task = client.post(
+        "/api/tasks", json={"title": "Stretch", "cadence": "daily", "assigned_to": user_id(headers)}, headers=headers
+    ).json()
+    completed_at = datetime.fromisoformat(task["next_due_at"])
+    response = client.patch(
+        f"/api/tasks/{task['id']}/complete", json={"completed_at": completed_at.isoformat()}, headers=headers
+    )
+    assert response.status_code == 200, response.text
+    assert datetime.fromisoformat(response.json()["last_completed"]) == completed_at
+    assert client.put(f"/api/tasks/{task['id'] + 100}", json={"title": "Nope"}, headers=headers).status_code == 404
+    assert write_behind.stats() == {"batches": 2, "writes": 2}